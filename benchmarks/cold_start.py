@@ -0,0 +1,98 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cold start benchmark for the bot's imports. Each run is a fresh interpreter
+# started with -X importtime, so the per-module report comes from the same
+# runs as the timings.
+#
+#   python benchmarks/cold_start.py --runs 5 --top 20
+#   python benchmarks/cold_start.py --max-seconds 0.8   # fails on regression
+
+
+def run_once(module):
+    env = dict(os.environ)
+    # telethon_service reads its API id at import time; nothing connects here
+    env.setdefault("TELEGRAM_API_ID", "0")
+
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT,
+        env=env,
+        capture_output=True,
+        text=True
+    )
+    elapsed = time.perf_counter() - started
+
+    if result.returncode != 0:
+        print(result.stderr)
+        raise SystemExit(f"❌ import {module} failed")
+    return elapsed, parse_importtime(result.stderr)
+
+
+def parse_importtime(stderr):
+    # Lines look like "import time:   self [us] | cumulative | package"
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def top_level_packages(modules):
+    totals = {}
+    for name, (self_us, _) in modules.items():
+        package = name.split(".")[0]
+        totals[package] = totals.get(package, 0) + self_us
+    return totals
+
+
+def print_report(modules, top):
+    print(f"\n📦 Slowest modules by cumulative import time (top {top})")
+    ranked = sorted(modules.items(), key=lambda item: item[1][1], reverse=True)[:top]
+    for name, (self_us, cumulative_us) in ranked:
+        print(f"  {cumulative_us / 1000:8.1f} ms  (self {self_us / 1000:6.1f} ms)  {name}")
+
+    print(f"\n📦 Import cost by top-level package (top {top})")
+    totals = sorted(top_level_packages(modules).items(), key=lambda item: item[1], reverse=True)[:top]
+    for package, total_us in totals:
+        print(f"  {total_us / 1000:8.1f} ms  {package}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold start import time of the bot")
+    parser.add_argument("--module", default="bot.main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--max-seconds", type=float, help="exit non-zero if the median exceeds this")
+    args = parser.parse_args()
+
+    # First run warms the bytecode cache and isn't counted
+    run_once(args.module)
+
+    timings = []
+    modules = {}
+    for _ in range(args.runs):
+        elapsed, modules = run_once(args.module)
+        timings.append(elapsed)
+
+    median = statistics.median(timings)
+    print(f"⏱️ import {args.module}: median {median:.3f}s, min {min(timings):.3f}s, max {max(timings):.3f}s over {args.runs} runs")
+    print_report(modules, args.top)
+
+    if args.max_seconds is not None and median > args.max_seconds:
+        print(f"\n❌ Cold start {median:.3f}s is over the {args.max_seconds:.3f}s budget")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,456 @@
+import asyncio
+import copy
+import itertools
+import json
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from telegram.ext import BaseUpdateProcessor
+from telegram.request import BaseRequest
+
+# In-process stand-ins for the Bot API, Telethon and Firestore, used by
+# load_test.py to run the real Application and handlers without a network.
+# Each one counts its calls and can add a per-call latency.
+
+BOT_ID = 7000000001
+BOT_USERNAME = "BookaCourt_bot"
+
+
+# Firestore
+
+class Increment:
+    def __init__(self, value):
+        self.value = value
+
+
+class ArrayUnion:
+    def __init__(self, values):
+        self.values = list(values)
+
+
+class ArrayRemove:
+    def __init__(self, values):
+        self.values = list(values)
+
+
+class FieldFilter:
+    def __init__(self, field_path, op_string, value):
+        self.field_path = field_path
+        self.op_string = op_string
+        self.value = value
+
+
+class NotFound(Exception):
+    pass
+
+
+def _matches(data, field, op, value):
+    if field not in data:
+        return False
+    current = data[field]
+    try:
+        if op == "==":
+            return current == value
+        if op == "!=":
+            return current != value
+        if op == "<":
+            return current < value
+        if op == "<=":
+            return current <= value
+        if op == ">":
+            return current > value
+        if op == ">=":
+            return current >= value
+        if op == "in":
+            return current in value
+        if op == "not-in":
+            return current not in value
+        if op == "array_contains":
+            return value in (current or [])
+        if op == "array_contains_any":
+            return any(item in (current or []) for item in value)
+    except TypeError:
+        return False
+    raise ValueError(f"Unsupported operator {op}")
+
+
+class InMemoryFirestore:
+    # Stands in for the firebase_admin.firestore module. Calls block for
+    # `latency` seconds like the real (synchronous) SDK does, so handlers
+    # that read on the event loop stall it in the load test too.
+
+    SERVER_TIMESTAMP = object()
+    DELETE_FIELD = object()
+    Increment = Increment
+    ArrayUnion = ArrayUnion
+    ArrayRemove = ArrayRemove
+    FieldFilter = FieldFilter
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.collections = {}
+        self.calls = Counter()
+
+    def client(self):
+        return FakeFirestoreClient(self)
+
+    def _call(self, op, documents=1):
+        self.calls[op] += documents
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _collection(self, name):
+        return self.collections.setdefault(name, {})
+
+    def _resolve(self, current, value):
+        if value is self.SERVER_TIMESTAMP:
+            return datetime.now(timezone.utc)
+        if isinstance(value, Increment):
+            return (current or 0) + value.value
+        if isinstance(value, ArrayUnion):
+            current = list(current or [])
+            return current + [item for item in value.values if item not in current]
+        if isinstance(value, ArrayRemove):
+            return [item for item in (current or []) if item not in value.values]
+        return copy.deepcopy(value)
+
+    def _write(self, collection, doc_id, data, merge=True):
+        documents = self._collection(collection)
+        stored = dict(documents.get(doc_id, {})) if merge else {}
+        for field, value in data.items():
+            if value is self.DELETE_FIELD:
+                stored.pop(field, None)
+            else:
+                stored[field] = self._resolve(stored.get(field), value)
+        documents[doc_id] = stored
+
+
+class FakeSnapshot:
+    def __init__(self, reference, data):
+        self.reference = reference
+        self.id = reference.id
+        self._data = data
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+    def to_dict(self):
+        return copy.deepcopy(self._data) if self._data is not None else None
+
+    def get(self, field):
+        return (self._data or {}).get(field)
+
+
+class FakeDocument:
+    def __init__(self, store, collection, doc_id):
+        self._store = store
+        self._collection_name = collection
+        self.id = doc_id
+        self.path = f"{collection}/{doc_id}"
+
+    def __eq__(self, other):
+        return isinstance(other, FakeDocument) and other.path == self.path
+
+    def __hash__(self):
+        return hash(self.path)
+
+    def get(self, *args, **kwargs):
+        self._store._call("get")
+        return FakeSnapshot(self, self._data())
+
+    def _data(self):
+        return self._store._collection(self._collection_name).get(self.id)
+
+    def set(self, data, merge=False):
+        self._store._call("set")
+        self._store._write(self._collection_name, self.id, data, merge=merge)
+
+    def create(self, data):
+        self._store._call("create")
+        if self._data() is not None:
+            raise ValueError(f"Document {self.path} already exists")
+        self._store._write(self._collection_name, self.id, data, merge=False)
+
+    def update(self, data):
+        self._store._call("update")
+        if self._data() is None:
+            raise NotFound(f"No document to update: {self.path}")
+        self._store._write(self._collection_name, self.id, data)
+
+    def delete(self):
+        self._store._call("delete")
+        self._store._collection(self._collection_name).pop(self.id, None)
+
+    def collection(self, name):
+        return FakeQuery(self._store, f"{self.path}/{name}")
+
+
+class FakeQuery:
+    # Collection references and queries share one class; refinements
+    # return a new query
+
+    def __init__(self, store, collection, filters=(), order=None, limit=None):
+        self._store = store
+        self._collection_name = collection
+        self._filters = tuple(filters)
+        self._order = order
+        self._limit = limit
+        self.id = collection.rsplit("/", 1)[-1]
+
+    def document(self, doc_id=None):
+        return FakeDocument(self._store, self._collection_name, doc_id or uuid.uuid4().hex[:20])
+
+    def add(self, data):
+        reference = self.document()
+        reference.set(data)
+        return datetime.now(timezone.utc), reference
+
+    def where(self, field_path=None, op_string=None, value=None, filter=None):
+        if filter is not None:
+            field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+        return FakeQuery(self._store, self._collection_name, self._filters + ((field_path, op_string, value),), self._order, self._limit)
+
+    def order_by(self, field_path, direction="ASCENDING"):
+        return FakeQuery(self._store, self._collection_name, self._filters, (field_path, direction), self._limit)
+
+    def limit(self, count):
+        return FakeQuery(self._store, self._collection_name, self._filters, self._order, count)
+
+    def _results(self):
+        documents = self._store._collection(self._collection_name)
+        results = [
+            (doc_id, data) for doc_id, data in list(documents.items())
+            if all(_matches(data, *condition) for condition in self._filters)
+        ]
+        if self._order:
+            field, direction = self._order
+            results.sort(key=lambda item: item[1].get(field), reverse=direction == "DESCENDING")
+        if self._limit is not None:
+            results = results[:self._limit]
+        return [FakeSnapshot(self.document(doc_id), data) for doc_id, data in results]
+
+    def stream(self, *args, **kwargs):
+        results = self._results()
+        self._store._call("query", max(1, len(results)))
+        return iter(results)
+
+    def get(self, *args, **kwargs):
+        results = self._results()
+        self._store._call("query", max(1, len(results)))
+        return results
+
+
+class FakeBatch:
+    def __init__(self, store):
+        self._store = store
+        self._operations = []
+
+    def set(self, reference, data, merge=False):
+        self._operations.append(lambda: self._store._write(reference._collection_name, reference.id, data, merge=merge))
+
+    def create(self, reference, data):
+        self.set(reference, data)
+
+    def update(self, reference, data):
+        def apply():
+            if reference._data() is None:
+                raise NotFound(f"No document to update: {reference.path}")
+            self._store._write(reference._collection_name, reference.id, data)
+        self._operations.append(apply)
+
+    def delete(self, reference):
+        self._operations.append(lambda: self._store._collection(reference._collection_name).pop(reference.id, None))
+
+    def commit(self):
+        self._store._call("batch_commit")
+        operations, self._operations = self._operations, []
+        for operation in operations:
+            operation()
+
+
+class FakeFirestoreClient:
+    def __init__(self, store):
+        self._store = store
+
+    def collection(self, name):
+        return FakeQuery(self._store, name)
+
+    def document(self, path):
+        collection, doc_id = path.rsplit("/", 1)
+        return FakeDocument(self._store, collection, doc_id)
+
+    def batch(self):
+        return FakeBatch(self._store)
+
+    def get_all(self, references, *args, **kwargs):
+        references = list(references)
+        self._store._call("get_all", len(references))
+        for reference in references:
+            yield FakeSnapshot(reference, reference._data())
+
+
+def fake_firebase_admin():
+    # firebase_admin with an app already initialised, so no credentials are read
+    return SimpleNamespace(_apps={"[DEFAULT]": object()}, initialize_app=lambda *args, **kwargs: None)
+
+
+# Bot API
+
+class FakeBotApi(BaseRequest):
+    # Answers Bot API calls in-process with plausible JSON results, going
+    # through PTB's normal request serialisation and response parsing
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = Counter()
+        self.sent = Counter()
+        self._message_ids = itertools.count(1000)
+        self.last_message = {}
+        # Latest text of every message, keyed by (chat_id, message_id)
+        self.texts = {}
+        # Member counts reported per chat; unlisted groups hold the host and the bot
+        self.member_counts = {}
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    @property
+    def read_timeout(self):
+        return None
+
+    async def do_request(self, url, method, request_data=None, read_timeout=None,
+                         write_timeout=None, connect_timeout=None, pool_timeout=None):
+        endpoint = url.rsplit("/", 1)[-1]
+        params = request_data.parameters if request_data is not None else {}
+        self.calls[endpoint] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        result = self._result(endpoint, params)
+        return 200, json.dumps({"ok": True, "result": result}).encode()
+
+    @staticmethod
+    def bot_user():
+        return {"id": BOT_ID, "is_bot": True, "first_name": "Booka Court", "username": BOT_USERNAME}
+
+    @staticmethod
+    def chat(chat_id):
+        if isinstance(chat_id, str) and chat_id.startswith("@"):
+            return {"id": -1001000000000, "type": "channel", "title": chat_id, "username": chat_id[1:]}
+        chat_id = int(chat_id)
+        if chat_id < 0:
+            return {"id": chat_id, "type": "supergroup", "title": f"Game {chat_id}"}
+        return {"id": chat_id, "type": "private", "first_name": f"User {chat_id}"}
+
+    def _message(self, params):
+        chat_id = params.get("chat_id")
+        message_id = params.get("message_id") or next(self._message_ids)
+        self.sent[chat_id] += 1
+        self.last_message[chat_id] = message_id
+        self.texts[(chat_id, message_id)] = params.get("text", "")
+        message = {
+            "message_id": message_id,
+            "date": int(time.time()),
+            "chat": self.chat(chat_id),
+            "from": self.bot_user(),
+            "text": params.get("text", ""),
+        }
+        if params.get("reply_markup"):
+            message["reply_markup"] = params["reply_markup"]
+        return message
+
+    def _result(self, endpoint, params):
+        if endpoint == "getMe":
+            return {**self.bot_user(), "can_join_groups": True, "can_read_all_group_messages": False,
+                    "supports_inline_queries": False}
+        if endpoint in ("sendMessage", "editMessageText", "editMessageReplyMarkup", "copyMessage",
+                        "forwardMessage", "sendPoll"):
+            if "inline_message_id" in params:
+                return True
+            return self._message(params)
+        if endpoint == "getChatAdministrators":
+            return [{"status": "creator", "user": self.bot_user(), "is_anonymous": False}]
+        if endpoint == "getChatMemberCount":
+            return self.member_counts.get(int(params["chat_id"]), 2)
+        if endpoint == "getChat":
+            return {**self.chat(params["chat_id"]), "accent_color_id": 0, "max_reaction_count": 11,
+                    "accepted_gift_types": {"unlimited_gifts": False, "limited_gifts": False,
+                                            "unique_gifts": False, "premium_subscription": False}}
+        if endpoint == "getChatMember":
+            return {"status": "member", "user": {"id": params["user_id"], "is_bot": False, "first_name": "User"}}
+        if endpoint == "getUpdates":
+            return []
+        return True
+
+
+# Telethon
+
+class FakeTelethonClient:
+    # Stands in for the TelegramClient used to create game groups
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = Counter()
+        self._group_ids = itertools.count(2000000001)
+
+    async def _wait(self, name):
+        self.calls[name] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def __call__(self, request):
+        name = type(request).__name__
+        await self._wait(name)
+        if name == "CreateChannelRequest":
+            return SimpleNamespace(chats=[SimpleNamespace(id=next(self._group_ids))])
+        if name == "ExportChatInviteRequest":
+            return SimpleNamespace(link=f"https://t.me/+{uuid.uuid4().hex[:16]}")
+        return SimpleNamespace()
+
+    async def get_entity(self, entity):
+        await self._wait("get_entity")
+        return SimpleNamespace(id=entity if isinstance(entity, int) else BOT_ID)
+
+    async def send_message(self, *args, **kwargs):
+        await self._wait("send_message")
+
+    async def start(self, *args, **kwargs):
+        pass
+
+    async def disconnect(self):
+        pass
+
+
+# Update processing
+
+class TimingUpdateProcessor(BaseUpdateProcessor):
+    # Resolves a waiter when an update has been fully handled, so the load
+    # test can measure end-to-end latency including time spent queued
+
+    def __init__(self, max_concurrent_updates=1):
+        super().__init__(max_concurrent_updates)
+        self.waiters = {}
+
+    def expect(self, update_id):
+        future = asyncio.get_running_loop().create_future()
+        self.waiters[update_id] = future
+        return future
+
+    async def do_process_update(self, update, coroutine):
+        try:
+            await coroutine
+        finally:
+            future = self.waiters.pop(getattr(update, "update_id", None), None)
+            if future is not None and not future.done():
+                future.set_result(time.perf_counter())
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
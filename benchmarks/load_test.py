@@ -0,0 +1,396 @@
+import argparse
+import asyncio
+import contextlib
+import itertools
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+# End-to-end load test. Runs the real Application, handlers and background
+# services in-process against a fake Bot API, a fake Telethon client and an
+# in-memory Firestore (benchmarks/fakes.py), and drives scripted host and
+# browse journeys through host_conv and join_conv.
+#
+#   python benchmarks/load_test.py --users 1000 --hosts 100
+#   python benchmarks/load_test.py --json before.json
+#   python benchmarks/load_test.py --json after.json --compare before.json
+#
+# Latency is measured from putting an update on the queue until the bot has
+# finished handling it, so it includes time spent waiting behind other
+# updates. Firestore calls block for --firestore-latency-ms like the real SDK.
+
+os.environ.setdefault("TELEGRAM_API_ID", "0")
+os.environ.setdefault("BOT_TOKEN", "7000000001:load-test")
+os.environ.setdefault("ANNOUNCEMENT_CHANNEL", "@loadtest_games")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("LOG_FORMAT", "text")
+
+from telegram import Update
+from fakes import (
+    FakeBotApi, FakeTelethonClient, InMemoryFirestore, TimingUpdateProcessor, fake_firebase_admin
+)
+from bot.main import build_application, start_services, stop_services
+from bot.handlers import user_preferences
+from bot.services import database
+from bot.services.metrics import HANDLER_ERRORS
+from bot.services.startup import get_startup_state
+from bot.services.telethon_service import telethon_service
+from bot.utils.constants import SPORTS_LIST, SKILL_LEVELS, VENUES
+from bot.utils.structured_logging import setup_logging, stop_logging
+
+TIMES = ["8am-10am", "10am-12pm", "2pm-4pm", "4pm-6pm", "7pm-9pm"]
+TIME_SLOTS = {"8am-10am": ("08:00", "10:00"), "10am-12pm": ("10:00", "12:00"), "2pm-4pm": ("14:00", "16:00"),
+              "4pm-6pm": ("16:00", "18:00"), "7pm-9pm": ("19:00", "21:00")}
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def future_date(rng):
+    return (datetime.now() + timedelta(days=rng.randint(2, 20))).strftime("%d/%m/%Y")
+
+
+def seed_games(store, count, rng, group_ids=()):
+    # The first games take the given group ids, e.g. the groups in a recording
+    games = store._collection("game")
+    group_ids = list(group_ids)
+    for i in range(max(count, len(group_ids))):
+        time_display = rng.choice(TIMES)
+        start, end = TIME_SLOTS[time_display]
+        date = future_date(rng)
+        games[f"seed{i:05d}"] = {
+            "sport": rng.choice(SPORTS_LIST)[1],
+            "date": date,
+            "time_display": time_display,
+            "venue": rng.choice(list(VENUES)),
+            "skill": rng.choice(SKILL_LEVELS),
+            "group_link": f"https://t.me/+seed{i}",
+            "start_time_24": start,
+            "end_time_24": end,
+            "end_at": datetime.strptime(f"{date} {end}", "%d/%m/%Y %H:%M"),
+            "host": 900000 + i,
+            "status": "open",
+            "group_id": group_ids[i] if i < len(group_ids) else str(3000000000 + i),
+            "reminder_24h_sent": False,
+            "reminder_2h_sent": False,
+            # The fake Bot API reports the host and the bot in every group
+            "player_count": 1,
+            "players_list": [],
+            "host_username": f"seedhost{i}",
+            "announcement_msg_id": 500000 + i,
+        }
+
+
+class Driver:
+    # Sends updates on behalf of simulated users and records how long each
+    # one took to handle
+
+    def __init__(self, application, processor, api, timeout):
+        self.application = application
+        self.processor = processor
+        self.api = api
+        self.timeout = timeout
+        self._update_ids = itertools.count(1)
+        self._message_ids = itertools.count(1)
+        self.latencies = defaultdict(list)
+        self.timeouts = Counter()
+
+    @staticmethod
+    def user(user_id):
+        return {"id": user_id, "is_bot": False, "first_name": f"Load {user_id}", "username": f"load{user_id}"}
+
+    async def send(self, step, payload):
+        # Every update gets a fresh id, so recorded payloads can be sent again
+        update_id = next(self._update_ids)
+        update = Update.de_json({**payload, "update_id": update_id}, self.application.bot)
+        done = self.processor.expect(update_id)
+        started = time.perf_counter()
+        await self.application.update_queue.put(update)
+        try:
+            finished = await asyncio.wait_for(done, self.timeout)
+            self.latencies[step].append(finished - started)
+        except asyncio.TimeoutError:
+            self.processor.waiters.pop(update_id, None)
+            self.timeouts[step] += 1
+
+    async def press(self, step, user_id, data):
+        # Buttons are pressed on the last message the bot sent the user
+        message = {
+            "message_id": self.api.last_message.get(user_id, 1),
+            "date": int(time.time()),
+            "chat": FakeBotApi.chat(user_id),
+            "from": FakeBotApi.bot_user(),
+            "text": "menu",
+        }
+        await self.send(step, {"callback_query": {
+            "id": uuid.uuid4().hex, "from": self.user(user_id), "chat_instance": str(user_id),
+            "data": data, "message": message,
+        }})
+
+    async def type(self, step, user_id, text):
+        await self.send(step, {"message": {
+            "message_id": next(self._message_ids), "date": int(time.time()),
+            "chat": FakeBotApi.chat(user_id), "from": self.user(user_id), "text": text,
+        }})
+
+
+async def host_journey(driver, user_id, rng, think):
+    venue = rng.choice(list(VENUES))
+    steps = [
+        ("press", "host_game", "host_game"),
+        ("press", "create_game", "create_game"),
+        ("press", "venue_yes", "venue_yes"),
+        ("press", "sport", rng.choice(SPORTS_LIST)[1]),
+        ("type", "date", future_date(rng)),
+        ("type", "time", rng.choice(TIMES)),
+        ("type", "venue", venue),
+        ("press", "venue_confirm", f"venue_confirm:{venue}"),
+        ("press", "skill", rng.choice(SKILL_LEVELS)),
+        ("press", "confirm_game", "confirm_game"),
+    ]
+    await _walk(driver, user_id, steps, rng, think)
+
+
+async def browse_journey(driver, user_id, rng, think):
+    display, _ = rng.choice(SPORTS_LIST)
+    steps = [("press", "join_game", "join_game")]
+    if rng.random() < 0.3:
+        # Opening the venue filter reads every open game
+        steps += [("press", "filter_venue", "filter_venue"), ("press", "back_to_filters", "back_to_filters")]
+    steps += [
+        ("press", "filter_sport", "filter_sport"),
+        ("press", "toggle_filter", f"toggle_filter_sport_{display.lower()}"),
+        ("press", "apply_filters", "apply_filters_sport"),
+        ("press", "show_results", "show_results"),
+    ]
+    steps += [("press", "next_game", "next_game")] * rng.randint(0, 3)
+    steps.append(("press", "join_selected_game", "join_selected_game"))
+    await _walk(driver, user_id, steps, rng, think)
+
+
+async def _walk(driver, user_id, steps, rng, think):
+    for kind, step, value in steps:
+        if kind == "press":
+            await driver.press(step, user_id, value)
+        else:
+            await driver.type(step, user_id, value)
+        if think:
+            await asyncio.sleep(rng.uniform(0, think))
+
+
+class Fakes:
+    # The stand-ins for Firestore, Telethon and the Bot API, patched into
+    # the bot's modules
+
+    def __init__(self, args, rng, group_ids=()):
+        self.store = InMemoryFirestore(latency=args.firestore_latency_ms / 1000)
+        seed_games(self.store, args.seed_games, rng, group_ids)
+        database.firebase_admin = fake_firebase_admin()
+        database.firestore = self.store
+        user_preferences.firestore = self.store
+
+        self.telethon = FakeTelethonClient(latency=args.telethon_latency_ms / 1000)
+        telethon_service.client = self.telethon
+        telethon_service.initialized = True
+
+        self.api = FakeBotApi(latency=args.api_latency_ms / 1000)
+
+    def reset_counts(self):
+        self.api.calls.clear()
+        self.telethon.calls.clear()
+        self.store.calls.clear()
+
+
+@contextlib.asynccontextmanager
+async def running_bot(args, fakes):
+    # Yields a Driver once the bot has finished warming up
+    processor = TimingUpdateProcessor(args.concurrency)
+    application = build_application(os.environ["BOT_TOKEN"], request=fakes.api, update_processor=processor)
+
+    async with application:
+        await application.start()
+        await start_services(application)
+        try:
+            startup = get_startup_state(application)
+            if not await startup.wait_ready("bootstrap", timeout=60):
+                raise SystemExit(f"❌ Bot did not start: {startup.summary()}")
+            yield Driver(application, processor, fakes.api, args.timeout)
+        finally:
+            await application.stop()
+            await stop_services(application)
+
+
+class Measurement:
+    # Counts only what happens between start() and stop()
+
+    def __init__(self, args, fakes):
+        self.args = args
+        self.fakes = fakes
+        self.elapsed = 0.0
+        self.peak_traced = None
+
+    def start(self):
+        # Only the load itself is counted
+        self.fakes.reset_counts()
+        self.errors_before = HANDLER_ERRORS.totals_by("handler")
+        if self.args.tracemalloc:
+            tracemalloc.start()
+        self.started = time.perf_counter()
+
+    def stop(self):
+        self.elapsed = time.perf_counter() - self.started
+        if self.args.tracemalloc:
+            self.peak_traced = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+    def results(self, driver):
+        errors_after = HANDLER_ERRORS.totals_by("handler")
+        total_updates = sum(len(values) for values in driver.latencies.values())
+        elapsed = self.elapsed
+        store = self.fakes.store
+        return {
+            "config": {key: value for key, value in vars(self.args).items() if key not in ("json", "compare")},
+            "duration_s": round(elapsed, 2),
+            "updates": total_updates,
+            "throughput_per_s": round(total_updates / elapsed, 1) if elapsed else 0,
+            "steps": {
+                step: {
+                    "count": len(values),
+                    "p50_ms": round(percentile(values, 0.5) * 1000, 1),
+                    "p95_ms": round(percentile(values, 0.95) * 1000, 1),
+                    "p99_ms": round(percentile(values, 0.99) * 1000, 1),
+                    "max_ms": round(max(values) * 1000, 1),
+                }
+                for step, values in sorted(driver.latencies.items())
+            },
+            "timeouts": dict(driver.timeouts),
+            "handler_errors": {
+                handler: count - self.errors_before.get(handler, 0)
+                for handler, count in errors_after.items() if count - self.errors_before.get(handler, 0)
+            },
+            "games_created": sum(1 for doc_id in store._collection("game") if not doc_id.startswith("seed")),
+            "bot_api_calls": dict(self.fakes.api.calls.most_common()),
+            "telethon_calls": dict(self.fakes.telethon.calls.most_common()),
+            "firestore_ops": dict(store.calls.most_common()),
+            "memory": {
+                # ru_maxrss is in KB on Linux
+                "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+                "traced_peak_mb": round(self.peak_traced / 1e6, 1) if self.peak_traced is not None else None,
+            },
+        }
+
+
+async def run(args):
+    rng = random.Random(args.seed)
+    fakes = Fakes(args, rng)
+
+    async with running_bot(args, fakes) as driver:
+        async def delayed(journey, user_id):
+            await asyncio.sleep(rng.uniform(0, args.ramp))
+            await journey(driver, user_id, random.Random(rng.random()), args.think)
+
+        journeys = [delayed(host_journey, 100000 + i) for i in range(args.hosts)]
+        journeys += [delayed(browse_journey, 200000 + i) for i in range(args.users)]
+        measurement = Measurement(args, fakes)
+        measurement.start()
+        await asyncio.gather(*journeys)
+        measurement.stop()
+
+    return measurement.results(driver)
+
+
+def print_report(results, baseline=None):
+    def delta(now, before):
+        if before in (None, 0):
+            return ""
+        return f" ({(now - before) / before:+.0%})"
+
+    base_steps = baseline["steps"] if baseline else {}
+    print(f"🚦 {results['updates']} updates in {results['duration_s']}s: "
+          f"{results['throughput_per_s']} updates/s"
+          + delta(results["throughput_per_s"], baseline and baseline["throughput_per_s"]))
+    print(f"🎮 {results['games_created']} games created")
+
+    width = max([20] + [len(step) + 2 for step in results["steps"]])
+    print(f"\n{'step':<{width}}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for step, stats in results["steps"].items():
+        line = (f"{step:<{width}}{stats['count']:>7}{stats['p50_ms']:>10}{stats['p95_ms']:>10}"
+                f"{stats['p99_ms']:>10}{stats['max_ms']:>10}")
+        before = base_steps.get(step)
+        if before:
+            line += f"   p50{delta(stats['p50_ms'], before['p50_ms']) or ' (=)'} p99{delta(stats['p99_ms'], before['p99_ms']) or ' (=)'}"
+        print(line)
+
+    if results["timeouts"]:
+        print(f"\n⏱ Timed out: {results['timeouts']}")
+    if results["handler_errors"]:
+        print(f"❌ Handler errors: {results['handler_errors']}")
+    print(f"\n📡 Bot API calls: {sum(results['bot_api_calls'].values())} {results['bot_api_calls']}")
+    print(f"👥 Telethon calls: {sum(results['telethon_calls'].values())} {results['telethon_calls']}")
+    print(f"🔥 Firestore ops: {sum(results['firestore_ops'].values())} {results['firestore_ops']}")
+    memory = results["memory"]
+    print(f"🧠 Max RSS {memory['max_rss_mb']} MB"
+          + (f", traced peak {memory['traced_peak_mb']} MB" if memory["traced_peak_mb"] is not None else ""))
+
+
+def add_fake_arguments(parser):
+    parser.add_argument("--seed-games", type=int, default=200, help="open games in the store before the run")
+    parser.add_argument("--concurrency", type=int, default=1, help="updates handled at once (the bot runs with 1)")
+    parser.add_argument("--firestore-latency-ms", type=float, default=15.0)
+    parser.add_argument("--api-latency-ms", type=float, default=40.0)
+    parser.add_argument("--telethon-latency-ms", type=float, default=150.0)
+    parser.add_argument("--timeout", type=float, default=120.0, help="seconds before an update counts as lost")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--tracemalloc", action="store_true", help="also report peak Python allocations (slower)")
+    parser.add_argument("--verbose", action="store_true", help="keep the bot's own output")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--compare", help="results file from an earlier run to compare against")
+
+
+def run_and_report(run, args, report=print_report, failed=lambda results: results["timeouts"]):
+    setup_logging(stream=sys.stderr)
+    with tempfile.TemporaryDirectory() as workdir:
+        os.environ.setdefault("TIMER_STORE_PATH", os.path.join(workdir, "timers.sqlite3"))
+        output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(open(os.devnull, "w"))
+        with output:
+            results = asyncio.run(run(args))
+    stop_logging()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+    report(results, baseline)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 1 if failed(results) else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive the bot with simulated users against in-process fakes")
+    parser.add_argument("--users", type=int, default=1000, help="users browsing and joining games")
+    parser.add_argument("--hosts", type=int, default=100, help="hosts creating games")
+    parser.add_argument("--ramp", type=float, default=10.0, help="seconds over which journeys start")
+    parser.add_argument("--think", type=float, default=1.0, help="max seconds a user waits between steps")
+    add_fake_arguments(parser)
+    return run_and_report(run, parser.parse_args())
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,264 @@
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+# Membership-event storm. Synthesises join and leave traffic across many game
+# groups (new_chat_members and left_chat_member service messages, chat_member
+# updates, and both at once for the same change) and runs it through the real
+# member tracking handlers, the per-game update queue and the announcement
+# editor against the load-test fakes.
+#
+#   python benchmarks/member_storm.py --events 5000 --seed-games 50
+#   python benchmarks/member_storm.py --rate 0 --json before.json
+#   python benchmarks/member_storm.py --rate 0 --json after.json --compare before.json
+#
+# Traffic is skewed towards a few popular games (--skew). After the storm the
+# benchmark waits for announcement edits to drain through the channel's rate
+# limit (reported as the settle time), then checks the stored player counts,
+# player lists and announcement texts against the membership it produced.
+
+from load_test import Fakes, Measurement, add_fake_arguments, print_report, running_bot, run_and_report
+from fakes import FakeBotApi
+from bot.utils import GroupIdHelper
+
+WRITE_OPS = ("set", "update", "create", "delete", "batch_commit")
+READ_OPS = ("get", "query", "get_all")
+
+
+def storm_user(user_id):
+    return {"id": user_id, "is_bot": False, "first_name": f"Player {user_id}", "username": f"player{user_id}"}
+
+
+class StormPlan:
+    # Generates the storm and keeps the membership it should leave behind
+
+    def __init__(self, groups, events, rng, skew=1.0, leave_rate=0.3, duplicate_rate=0.3, chat_member_rate=0.3,
+                 multi_join_rate=0.1, users_per_group=500):
+        self.groups = groups
+        self.rng = rng
+        self.leave_rate = leave_rate
+        self.duplicate_rate = duplicate_rate
+        self.chat_member_rate = chat_member_rate
+        self.multi_join_rate = multi_join_rate
+        self.users_per_group = users_per_group
+        self.weights = [1 / (rank + 1) ** skew for rank in range(len(groups))]
+        self.members = {group["group_id"]: set() for group in groups}
+        self.changes = 0
+        self.updates = []
+        # Telegram dates have one second resolution; every change gets its own
+        # second so the expected final state is unambiguous
+        for date in itertools.count(1_700_000_000):
+            if len(self.updates) >= events:
+                break
+            self.updates.extend(self._change(date))
+
+    def _change(self, date):
+        group = self.rng.choices(self.groups, self.weights)[0]
+        members = self.members[group["group_id"]]
+        chat = FakeBotApi.chat(GroupIdHelper.to_telegram_format(group["group_id"]))
+
+        if members and self.rng.random() < self.leave_rate:
+            user_id = self.rng.choice(sorted(members))
+            members.discard(user_id)
+            changed = [user_id]
+            is_join = False
+        else:
+            count = self.rng.randint(2, 4) if self.rng.random() < self.multi_join_rate else 1
+            base = 400000 + group["index"] * self.users_per_group
+            candidates = [user_id for user_id in range(base, base + self.users_per_group) if user_id not in members]
+            changed = self.rng.sample(candidates, min(count, len(candidates)))
+            members.update(changed)
+            is_join = True
+        self.changes += len(changed)
+
+        # Telegram reports a change as a service message, a chat_member
+        # update, or both, depending on the group and the bot's rights
+        if self.rng.random() < self.duplicate_rate:
+            forms = ("service", "chat_member")
+        else:
+            forms = ("chat_member",) if self.rng.random() < self.chat_member_rate else ("service",)
+
+        # What Telegram reports once this change has happened: the members,
+        # the host and the bot
+        member_count = len(members) + 2
+        updates = []
+        for form in forms:
+            if form == "service":
+                updates.append(self._service_message(chat, changed, is_join, date))
+            else:
+                updates.extend(self._chat_member(chat, user_id, is_join, date) for user_id in changed)
+        return [(step, payload, chat["id"], member_count) for step, payload in updates]
+
+    def _service_message(self, chat, user_ids, is_join, date):
+        users = [storm_user(user_id) for user_id in user_ids]
+        message = {"message_id": date, "date": date, "chat": chat, "from": users[0]}
+        if is_join:
+            message["new_chat_members"] = users
+            return "new_chat_members", {"message": message}
+        message["left_chat_member"] = users[0]
+        return "left_chat_member", {"message": message}
+
+    @staticmethod
+    def _chat_member(chat, user_id, is_join, date):
+        user = storm_user(user_id)
+        old, new = ("left", "member") if is_join else ("member", "left")
+        return f"chat_member:{'join' if is_join else 'leave'}", {"chat_member": {
+            "chat": chat, "from": user, "date": date,
+            "old_chat_member": {"status": old, "user": user},
+            "new_chat_member": {"status": new, "user": user},
+        }}
+
+
+async def settle_announcements(bot_data, timeout):
+    # The announcement channel allows ~17 edits a minute, so the last counts
+    # can take a while to go out after a storm. Shutdown would drop them.
+    editor = bot_data.get("announcement_editor")
+    limiter = bot_data.get("rate_limiter")
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    quiet = 0
+    # An edit leaving the editor isn't queued in the limiter straight away,
+    # so both have to look idle twice in a row
+    while quiet < 2 and loop.time() - started < timeout:
+        busy = (editor is not None and editor.pending_count) or (limiter is not None and limiter.queue_depth)
+        quiet = 0 if busy else quiet + 1
+        await asyncio.sleep(0.1)
+    return round(loop.time() - started, 1)
+
+
+def check_counts(plan, fakes):
+    # Compares what the bot stored and announced with the storm's membership
+    games = fakes.store._collection("game")
+    channel = os.environ["ANNOUNCEMENT_CHANNEL"]
+    mismatches = []
+    checked = 0
+    for group in plan.groups:
+        members = plan.members[group["group_id"]]
+        game = games[group["id"]]
+        announced = fakes.api.texts.get((channel, game["announcement_msg_id"]))
+        if announced is None:
+            # The storm never reached this game
+            continue
+        checked += 1
+        expected = 1 + len(members)
+        stored_members = {int(user_id) for user_id in game.get("players_list") or []}
+        problems = []
+        if game.get("player_count") != expected:
+            problems.append(f"stored count {game.get('player_count')}")
+        if stored_members != members:
+            problems.append(f"players_list off by {len(stored_members ^ members)}")
+        if f"👥 Players: {expected}\n" not in announced:
+            problems.append("announcement out of date")
+        if problems:
+            mismatches.append({"game": group["id"], "expected": expected, "problems": problems})
+    return checked, mismatches
+
+
+async def run(args):
+    rng = random.Random(args.seed)
+    fakes = Fakes(args, rng)
+    groups = [
+        {"id": doc_id, "index": index, "group_id": game["group_id"]}
+        for index, (doc_id, game) in enumerate(sorted(fakes.store._collection("game").items()))
+    ]
+    plan = StormPlan(
+        groups, args.events, random.Random(rng.random()), skew=args.skew, leave_rate=args.leave_rate,
+        duplicate_rate=args.duplicate_rate, chat_member_rate=args.chat_member_rate,
+    )
+
+    async with running_bot(args, fakes) as driver:
+        loop = asyncio.get_running_loop()
+        measurement = Measurement(args, fakes)
+        measurement.start()
+        started = loop.time()
+        sends = []
+        for index, (step, payload, chat_id, member_count) in enumerate(plan.updates):
+            if args.rate:
+                delay = index / args.rate - (loop.time() - started)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            # Reconciliation reads the same membership the updates describe
+            fakes.api.member_counts[chat_id] = member_count
+            sends.append(asyncio.create_task(driver.send(step, payload)))
+        await asyncio.gather(*sends)
+        measurement.stop()
+        bot_data = driver.application.bot_data
+        queue = bot_data.get("game_update_queue")
+        batches = queue.stats["batches"] if queue else 0
+        settle = await settle_announcements(bot_data, args.settle)
+
+    # Buffered writes are flushed on shutdown, so they are counted here
+    results = measurement.results(driver)
+    checked, mismatches = check_counts(plan, fakes)
+    updates = results["updates"] or 1
+    writes = sum(fakes.store.calls[op] for op in WRITE_OPS)
+    reads = sum(fakes.store.calls[op] for op in READ_OPS)
+    results["storm"] = {
+        "membership_changes": plan.changes,
+        "events_per_s": results["throughput_per_s"],
+        "db_writes_per_event": round(writes / updates, 3),
+        "db_reads_per_event": round(reads / updates, 3),
+        "announcement_edits_per_event": round(fakes.api.calls["editMessageText"] / updates, 3),
+        "apply_batches": batches,
+        "announcements_settled_s": settle,
+        "games_checked": checked,
+        "count_mismatches": mismatches,
+    }
+    return results
+
+
+def print_storm_report(results, baseline=None):
+    def delta(key):
+        before = baseline and baseline.get("storm", {}).get(key)
+        if not before:
+            return ""
+        return f" ({(storm[key] - before) / before:+.0%})"
+
+    storm = results["storm"]
+    print(f"🌩 {results['updates']} member updates ({storm['membership_changes']} changes) "
+          f"in {results['duration_s']}s: {storm['events_per_s']} events/s{delta('events_per_s')}")
+    print(f"💾 DB writes per event: {storm['db_writes_per_event']}{delta('db_writes_per_event')}, "
+          f"reads per event: {storm['db_reads_per_event']}{delta('db_reads_per_event')}")
+    print(f"📣 Announcement edits per event: {storm['announcement_edits_per_event']}"
+          f"{delta('announcement_edits_per_event')}")
+    print(f"📦 {storm['apply_batches']} batched applies, "
+          f"announcements settled {storm['announcements_settled_s']}s after the storm")
+    mismatches = storm["count_mismatches"]
+    if mismatches:
+        print(f"❌ {len(mismatches)} of {storm['games_checked']} games have wrong counts:")
+        for mismatch in mismatches[:10]:
+            print(f"   {mismatch['game']}: expected {mismatch['expected']}, {', '.join(mismatch['problems'])}")
+    else:
+        print(f"✅ Counts correct in all {storm['games_checked']} games")
+    print()
+    print_report(results, baseline)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive member tracking with join/leave storms against fakes")
+    parser.add_argument("--events", type=int, default=5000, help="member updates to send")
+    parser.add_argument("--rate", type=float, default=500.0, help="updates sent per second (0 sends all at once)")
+    parser.add_argument("--skew", type=float, default=1.0, help="how strongly traffic favours popular games")
+    parser.add_argument("--leave-rate", type=float, default=0.3, help="share of changes that are leaves")
+    parser.add_argument("--duplicate-rate", type=float, default=0.3,
+                        help="share of changes delivered both as a service message and a chat_member update")
+    parser.add_argument("--chat-member-rate", type=float, default=0.3,
+                        help="share of the remaining changes delivered only as chat_member updates")
+    parser.add_argument("--settle", type=float, default=300.0,
+                        help="max seconds to wait for announcement edits before checking counts")
+    add_fake_arguments(parser)
+    parser.set_defaults(seed_games=50)
+    return run_and_report(
+        run, parser.parse_args(), report=print_storm_report,
+        failed=lambda results: results["timeouts"] or results["storm"]["count_mismatches"],
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
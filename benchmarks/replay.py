@@ -0,0 +1,87 @@
+import argparse
+import asyncio
+import os
+import random
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+# Replays update streams recorded by the bot (RECORD_UPDATES_DIR) against the
+# same in-process fakes as load_test.py, and reports per-step latency in the
+# same format, so a recording of real traffic works as a regression test.
+#
+#   python benchmarks/replay.py recordings/updates-20261019-180000.jsonl.gz
+#   python benchmarks/replay.py recording.jsonl.gz --speed 4 --json before.json
+#   python benchmarks/replay.py recording.jsonl.gz --fast --compare before.json
+#
+# Updates keep their recorded gaps (divided by --speed), or with --fast are
+# all queued at once in recorded order. Every group chat in the recording
+# gets a seeded game, so member tracking and group commands find one; steps
+# that name a game document from the recording still find it missing.
+
+from load_test import Fakes, Measurement, add_fake_arguments, running_bot, run_and_report
+from telegram import Update
+from bot.main import describe_update
+from bot.utils import GroupIdHelper
+from bot.services.update_recorder import read_recording
+
+
+def load_recordings(paths, limit=None):
+    entries = [entry for path in paths for entry in read_recording(path)]
+    entries.sort(key=lambda entry: entry[0])
+    return entries[:limit] if limit else entries
+
+
+def recorded_group_ids(entries):
+    # Group chat ids survive scrubbing, in the format games are stored with
+    group_ids = {}
+    for _, payload in entries:
+        chat = Update.de_json(payload, None).effective_chat
+        if chat and chat.type in ("group", "supergroup"):
+            group_ids.setdefault(GroupIdHelper.normalize_group_id(chat.id), None)
+    return list(group_ids)
+
+
+async def run(args):
+    entries = load_recordings(args.recordings, args.limit)
+    if not entries:
+        raise SystemExit("❌ No updates in the recording")
+    fakes = Fakes(args, random.Random(args.seed), recorded_group_ids(entries))
+
+    async with running_bot(args, fakes) as driver:
+        loop = asyncio.get_running_loop()
+        measurement = Measurement(args, fakes)
+        measurement.start()
+        started = loop.time()
+        first = entries[0][0]
+        sends = []
+        for recorded_at, payload in entries:
+            if not args.fast:
+                delay = (recorded_at - first) / args.speed - (loop.time() - started)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            step = describe_update(Update.de_json(payload, driver.application.bot))
+            # Tasks start in creation order, so updates are queued in recorded order
+            sends.append(asyncio.create_task(driver.send(step, payload)))
+        await asyncio.gather(*sends)
+        measurement.stop()
+
+    results = measurement.results(driver)
+    results["recorded_span_s"] = round(entries[-1][0] - first, 2)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded updates against in-process fakes")
+    parser.add_argument("recordings", nargs="+", help="recorded .jsonl.gz files, merged by time")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay this many times faster than recorded")
+    parser.add_argument("--fast", action="store_true", help="queue every update at once")
+    parser.add_argument("--limit", type=int, help="only replay the first N updates")
+    add_fake_arguments(parser)
+    parser.set_defaults(seed_games=50)
+    return run_and_report(run, parser.parse_args())
+
+
+if __name__ == "__main__":
+    sys.exit(main())
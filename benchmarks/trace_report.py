@@ -0,0 +1,78 @@
+import argparse
+import json
+import statistics
+import sys
+from collections import defaultdict
+
+# Per-stage latency breakdown from a trace file written with
+# TRACE_EXPORT=file:<path>
+#
+#   python benchmarks/trace_report.py traces.jsonl --root save_game
+
+
+def load_spans(path):
+    spans = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            payload = json.loads(line)
+            for resource in payload["resourceSpans"]:
+                for scope in resource["scopeSpans"]:
+                    spans.extend(scope["spans"])
+    return spans
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def duration_ms(span):
+    return (int(span["endTimeUnixNano"]) - int(span["startTimeUnixNano"])) / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarise exported trace spans per stage")
+    parser.add_argument("path")
+    parser.add_argument("--root", help="only include traces whose root span has this name")
+    parser.add_argument("--slowest", type=int, default=3, help="show the stages of the N slowest traces")
+    args = parser.parse_args()
+
+    spans = load_spans(args.path)
+    traces = defaultdict(list)
+    for span in spans:
+        traces[span["traceId"]].append(span)
+
+    roots = {}
+    for trace_id, trace_spans in traces.items():
+        root = next((span for span in trace_spans if "parentSpanId" not in span), None)
+        if root and (args.root is None or root["name"] == args.root):
+            roots[trace_id] = root
+    if not roots:
+        print("No matching traces")
+        return 1
+
+    by_stage = defaultdict(list)
+    for trace_id in roots:
+        for span in traces[trace_id]:
+            by_stage[span["name"]].append(duration_ms(span))
+
+    print(f"🧭 {len(roots)} traces, {sum(len(traces[t]) for t in roots)} spans")
+    print(f"{'stage':45} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for name, durations in sorted(by_stage.items(), key=lambda item: -percentile(item[1], 0.99)):
+        print(f"{name[:45]:45} {len(durations):6} {statistics.median(durations):9.1f} "
+              f"{percentile(durations, 0.95):9.1f} {percentile(durations, 0.99):9.1f} {max(durations):9.1f}")
+
+    slowest = sorted(roots.items(), key=lambda item: -duration_ms(item[1]))[:args.slowest]
+    for trace_id, root in slowest:
+        print(f"\n🐢 {root['name']} {duration_ms(root):.1f} ms (trace {trace_id})")
+        for span in sorted(traces[trace_id], key=lambda s: int(s["startTimeUnixNano"])):
+            if span is root:
+                continue
+            offset = (int(span["startTimeUnixNano"]) - int(root["startTimeUnixNano"])) / 1e6
+            print(f"  +{offset:8.1f} ms {duration_ms(span):8.1f} ms  {span['name']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -56,9 +56,13 @@ from .membertracking import (
     track_chat_member_updates,
     get_game_by_group_id,
     update_member_count,
+    queue_member_change,
     update_announcement_with_count,
     get_actual_member_count,
+    get_bot_member_offset,
+    invalidate_bot_member_offset,
     sync_member_count,
+    reconcile_member_count,
     initialize_member_counts,
     track_all_chat_member_changes,
     periodic_member_sync
@@ -114,9 +118,13 @@ __all__ = [
     'track_chat_member_updates',
     'get_game_by_group_id',
     'update_member_count',
+    'queue_member_change',
     'update_announcement_with_count',
     'get_actual_member_count',
+    'get_bot_member_offset',
+    'invalidate_bot_member_offset',
     'sync_member_count',
+    'reconcile_member_count',
     'initialize_member_counts',
     'track_all_chat_member_changes',
     'periodic_member_sync'
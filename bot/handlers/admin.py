@@ -0,0 +1,196 @@
+import os
+import logging
+from telegram import Update
+from telegram.ext import ContextTypes
+from ..services.firestore_costs import FIRESTORE_COSTS
+from ..services.rate_limiter import background_priority
+from ..services.profiler import PROFILER
+from ..services.metrics import HANDLER_SECONDS, EVENT_LOOP_LAG_SECONDS, CACHE_REQUESTS, TELEGRAM_RETRY_AFTER
+
+logger = logging.getLogger(__name__)
+
+
+def get_admin_ids():
+    return {int(user_id) for user_id in os.getenv("ADMIN_USER_IDS", "").split(",") if user_id.strip().isdigit()}
+
+
+def is_admin(user):
+    return user is not None and user.id in get_admin_ids()
+
+
+def get_cost_ledger(context: ContextTypes.DEFAULT_TYPE):
+    return get_cost_ledger_from(context.bot_data)
+
+
+def get_cost_ledger_from(bot_data):
+    db = bot_data.get('db')
+    return db.cost_ledger if db else FIRESTORE_COSTS
+
+
+async def firestore_costs(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    # Admin-only; other users get no reply so the command stays hidden
+    if not is_admin(update.effective_user):
+        return
+
+    await update.message.reply_text(get_cost_ledger(context).report())
+
+
+async def report_firestore_costs(context: ContextTypes.DEFAULT_TYPE):
+    report = get_cost_ledger(context).report()
+    logger.info(report)
+
+    with background_priority():
+        for admin_id in get_admin_ids():
+            try:
+                await context.bot.send_message(chat_id=admin_id, text=report)
+            except Exception as e:
+                logger.warning("⚠️ Couldn't send Firestore report to admin %s: %s", admin_id, e)
+
+
+PROFILE_USAGE = (
+    "Usage:\n"
+    "/profile — status\n"
+    "/profile rate <0-1> — sample a fraction of updates\n"
+    "/profile user <id> — profile every update from a user\n"
+    "/profile handler <name> — profile every call of a handler\n"
+    "/profile dump — write flamegraph files and reset\n"
+    "/profile off — stop profiling"
+)
+
+
+def _profile_status():
+    lines = [
+        f"🔬 Profiling {'on' if PROFILER.enabled else 'off'}",
+        f"Rate: {PROFILER.sample_rate}",
+        f"Users: {', '.join(map(str, sorted(PROFILER.users))) or '-'}",
+        f"Handlers: {', '.join(sorted(PROFILER.handlers)) or '-'}",
+    ]
+    summary = PROFILER.summary()
+    if summary:
+        lines.append("")
+        for source, stats in list(summary.items())[:10]:
+            lines.append(f"• {source}: {stats['calls']} calls, ~{stats['ms']} ms on loop")
+    return "\n".join(lines)
+
+
+async def profile(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    if not is_admin(update.effective_user):
+        return
+
+    args = context.args or []
+    try:
+        if not args:
+            text = _profile_status()
+        elif args[0] == "rate" and len(args) == 2:
+            PROFILER.configure(sample_rate=min(1.0, max(0.0, float(args[1]))))
+            text = _profile_status()
+        elif args[0] == "user" and len(args) == 2:
+            PROFILER.configure(users=PROFILER.users | {int(args[1])})
+            text = _profile_status()
+        elif args[0] == "handler" and len(args) == 2:
+            PROFILER.configure(handlers=PROFILER.handlers | {args[1]})
+            text = _profile_status()
+        elif args[0] == "off":
+            PROFILER.configure(sample_rate=0.0, users=set(), handlers=set())
+            text = _profile_status()
+        elif args[0] == "dump":
+            paths, _ = PROFILER.dump()
+            text = "🔬 Wrote:\n" + "\n".join(paths) if paths else "🔬 No samples collected yet"
+        else:
+            text = PROFILE_USAGE
+    except ValueError:
+        text = PROFILE_USAGE
+
+    await update.message.reply_text(text)
+
+
+STATS_DEFAULT_MINUTES = 15
+
+
+def _ms(seconds):
+    return "-" if seconds is None else f"{seconds * 1000:.0f}ms"
+
+
+def _rate(hits, total):
+    return f"{hits / total:.0%} of {total}" if total else "-"
+
+
+def build_stats(bot_data, minutes=STATS_DEFAULT_MINUTES):
+    # Reads in-memory state only: no Firestore, Telegram or Telethon calls,
+    # so it stays cheap while the bot is under load
+    engine = bot_data.get('reminder_engine')
+    db = bot_data.get('db')
+    editor = bot_data.get('announcement_editor')
+    creation = bot_data.get('creation_service')
+    ledger = bot_data.get('membership_ledger')
+    sync = bot_data.get('member_sync_scheduler')
+    updates = bot_data.get('game_update_queue')
+    limiter = bot_data.get('rate_limiter')
+    timers = engine.kind_counts() if engine is not None else {}
+
+    lines = ["📈 Bot stats", ""]
+
+    # Every open game holds an expiry timer
+    lines.append(f"🎮 Open games: {timers.get('expiry', 0)}")
+    lines.append(
+        f"🗂 Indexes: {len(engine) if engine is not None else 0} timers, "
+        f"{ledger.loaded_count if ledger else 0} member ledgers, "
+        f"{len(sync) if sync is not None else 0} synced games, "
+        f"{len(bot_data.get('bot_offset_cache', {}))} bot offsets"
+    )
+
+    lines.append("")
+    lines.append("♻️ Cache hit rates:")
+    cache = CACHE_REQUESTS
+    hits, misses = cache.value(cache="bot_offset", result="hit"), cache.value(cache="bot_offset", result="miss")
+    lines.append(f"• bot offsets: {_rate(hits, hits + misses)}")
+    if editor:
+        lines.append(f"• unchanged edits skipped: {_rate(editor.stats['skipped'], editor.stats['submitted'])}")
+    if db:
+        buffer_stats = db.write_buffer.stats
+        lines.append(f"• buffered writes merged: {_rate(buffer_stats['merged'], buffer_stats['staged'])}")
+
+    lines.append("")
+    lines.append("📬 Queues:")
+    reminders = sum(count for kind, count in timers.items() if kind != 'expiry')
+    lines.append(f"• reminders: {reminders} scheduled")
+    lines.append(f"• announcement edits: {editor.pending_count if editor else 0} pending")
+    lines.append(f"• group creations: {creation.in_flight_count if creation else 0} in flight")
+    lines.append(f"• member updates: {updates.busy_count if updates else 0} games busy")
+    lines.append(f"• Firestore writes: {db.write_buffer.pending_count if db else 0} buffered")
+    lines.append(f"• Bot API: {limiter.queue_depth if limiter else 0} waiting")
+
+    per_handler, (count, (p50, p99)) = HANDLER_SECONDS.recent_quantiles((0.5, 0.99), minutes)
+    lines.append("")
+    lines.append(f"⏱ Handlers, last {minutes}m: {count} calls, p50 {_ms(p50)}, p99 {_ms(p99)}")
+    slowest = sorted(per_handler.items(), key=lambda item: item[1][1][1], reverse=True)[:5]
+    for handler, (calls, (h50, h99)) in slowest:
+        lines.append(f"• {handler}: {calls} calls, p50 {_ms(h50)}, p99 {_ms(h99)}")
+
+    _, (_, (lag50, lag_max)) = EVENT_LOOP_LAG_SECONDS.recent_quantiles((0.5, 1.0), minutes)
+    monitor = bot_data.get('loop_monitor')
+    lines.append(
+        f"🌀 Event loop lag: now {_ms(monitor.last_lag if monitor else None)}, "
+        f"p50 {_ms(lag50)}, max {_ms(lag_max)}, {monitor.slow_callbacks if monitor else 0} slow callbacks"
+    )
+
+    reads = get_cost_ledger_from(bot_data).recent(60)["reads"]
+    lines.append(f"🔥 Firestore reads, last hour: {reads}")
+
+    retries = TELEGRAM_RETRY_AFTER.totals_by("endpoint")
+    top = ", ".join(f"{endpoint} {count}" for endpoint, count in sorted(retries.items(), key=lambda item: -item[1])[:3])
+    lines.append(f"🚦 Telegram 429s since start: {sum(retries.values())}" + (f" ({top})" if top else ""))
+    return "\n".join(lines)
+
+
+async def stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    if not is_admin(update.effective_user):
+        return
+
+    try:
+        minutes = int(context.args[0]) if context.args else STATS_DEFAULT_MINUTES
+    except ValueError:
+        minutes = STATS_DEFAULT_MINUTES
+    minutes = min(60, max(1, minutes))
+
+    await update.message.reply_text(build_stats(context.bot_data, minutes))
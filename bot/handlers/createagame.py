@@ -1,14 +1,19 @@
 import os
+import logging
 from dotenv import load_dotenv
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, ConversationHandler
-from ..utils import validate_date_format, parse_time_input
+from ..utils import validate_date_format, parse_time_input, DateTimeHelper
 from ..services.telethon_service import telethon_service
+from ..services.game_creation import GameCreationService
+from ..services.tracing import TRACER
 from ..utils.constants import *
 from fuzzywuzzy import process
 
 load_dotenv() 
 
+logger = logging.getLogger(__name__)
+
 async def host_game(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     query = update.callback_query
     await query.answer() 
@@ -40,6 +45,7 @@ async def create_game(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int
 
     # Set auto-create group flag
     context.user_data["auto_create_group"] = True
+    context.user_data["creation_key"] = GameCreationService.new_key()
     
     await query.edit_message_text(
         text="Do you already have a venue booked?",
@@ -60,7 +66,7 @@ async def handle_venue_response(update: Update, context: ContextTypes.DEFAULT_TY
                     message_id=context.user_data["booking_msg_id"]
                 )
             except Exception as e:
-                print(f"Couldn't delete message: {e}")
+                logger.warning("Couldn't delete message: %s", e)
         
         # Clear the booking message data
         context.user_data.pop("booking_msg_id", None)
@@ -75,7 +81,7 @@ async def handle_venue_response(update: Update, context: ContextTypes.DEFAULT_TY
         return SPORT
 
     elif query.data == "venue_no":
-        print("✅ venue_no clicked")
+        logger.debug("✅ venue_no clicked")
         
         booking_keyboard = [
             [InlineKeyboardButton("🏫 NUS Facilities", url=BOOKING_URLS['NUS_FACILITIES'])],
@@ -109,7 +115,7 @@ async def after_booking (update: Update, context: ContextTypes.DEFAULT_TYPE):
             )
             await query.message.delete()
         except Exception as e:
-            print(f"Couldn't delete message: {e}")
+            logger.warning("Couldn't delete message: %s", e)
     
     # Clear the booking message data
     context.user_data.pop("booking_msg_id", None)
@@ -278,34 +284,79 @@ async def save_game(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
 
+    if 'creation_service' not in context.bot_data:
+        context.bot_data['creation_service'] = GameCreationService(context.bot_data['db'])
+    creation_service = context.bot_data['creation_service']
+
+    # Retries and double taps on the same draft share its idempotency key
+    creation_key = context.user_data.setdefault("creation_key", GameCreationService.new_key())
+
+    try:
+        return await creation_service.run(
+            creation_key,
+            lambda: _create_game(update, context, creation_service, creation_key)
+        )
+   
+    except Exception as e:
+        logger.error("Error saving game: %s", e)
+
+        await query.edit_message_text(
+            text ="⚠️ Failed to save game. Please try again.",
+            reply_markup=InlineKeyboardMarkup([
+                [InlineKeyboardButton("🔄 Try Again", callback_data="confirm_game")],
+                [InlineKeyboardButton("❌ Cancel", callback_data="cancel_game")]
+            ])
+            )
+        return CONFIRMATION
+
+async def _create_game(update, context, creation_service, creation_key):
+    query = update.callback_query
     db = context.bot_data['db']
     reminder_service = context.bot_data['reminder_service']
 
-    try:
+    game_data = context.user_data
+    record = creation_service.load(creation_key)
 
-        game_data = context.user_data
+    if record.get("status") == "completed":
+        logger.info("🔁 Creation %s already completed for game %s", creation_key, record.get('game_id'))
+        await _show_creation_success(query, context, record)
+        return ConversationHandler.END
+
+    if context.user_data.get("auto_create_group"):
+        if record.get("group_id"):
+            group_result = {
+                "group_link": record["group_link"],
+                "group_id": record["group_id"],
+                "group_name": record["group_name"]
+            }
+            logger.info("🔁 Reusing group %s from creation %s", group_result['group_id'], creation_key)
+        else:
+            # Group creation needs the Telethon client; if it's still connecting
+            # at startup, give it a moment before asking the host to retry
+            startup = context.bot_data.get('startup_state')
+            if startup and not startup.is_ready("telethon") and not startup.has_failed("telethon"):
+                if not await startup.wait_ready("telethon", timeout=float(os.getenv("TELETHON_READY_WAIT", "10"))):
+                    await query.edit_message_text(
+                        text="⏳ Group creation is still starting up. Please try again in a moment.",
+                        reply_markup=InlineKeyboardMarkup([
+                            [InlineKeyboardButton("🔄 Try Again", callback_data="confirm_game")],
+                            [InlineKeyboardButton("❌ Cancel", callback_data="cancel_game")]
+                        ])
+                    )
+                    return CONFIRMATION
 
-        if context.user_data.get("auto_create_group"):
             loading_msg = await query.edit_message_text(
                 text="🔄 Creating your game group... Please wait!",
                 reply_markup=None
             ) 
             
-            group_result = await telethon_service.create_game_group(
-                game_data, 
-                update.effective_user
-            )
-            
-            if group_result:
-                game_data["group_link"] = group_result["group_link"]
-                game_data["group_id"] = group_result["group_id"]
-                game_data["group_name"] = group_result["group_name"]
-                
-                await loading_msg.edit_text(
-                    text="✅ Group created successfully! Saving game...",
-                    reply_markup=None
+            with TRACER.span("create_game.group", root=False):
+                group_result = await telethon_service.create_game_group(
+                    game_data, 
+                    update.effective_user
                 )
-            else:
+            
+            if not group_result:
                 await loading_msg.edit_text(
                     text="❌ Failed to create group. Please try again. ",
                     reply_markup=InlineKeyboardMarkup([
@@ -314,9 +365,29 @@ async def save_game(update: Update, context: ContextTypes.DEFAULT_TYPE):
                     ])
                 )
                 return CONFIRMATION
-            
-        initial_player_count = 1 #Host is the first player    
+
+            record = creation_service.record(
+                creation_key, record,
+                status="group_created",
+                host=update.effective_user.id,
+                group_link=group_result["group_link"],
+                group_id=group_result["group_id"],
+                group_name=group_result["group_name"]
+            )
+
+            await loading_msg.edit_text(
+                text="✅ Group created successfully! Saving game...",
+                reply_markup=None
+            )
+
+        game_data["group_link"] = group_result["group_link"]
+        game_data["group_id"] = group_result["group_id"]
+        game_data["group_name"] = group_result["group_name"]
         
+    initial_player_count = 1 #Host is the first player    
+    
+    game_id = record.get("game_id")
+    if not game_id:
         game_doc_data = {
             "sport": game_data["sport"],
             "date": game_data["date"],
@@ -326,24 +397,34 @@ async def save_game(update: Update, context: ContextTypes.DEFAULT_TYPE):
             "group_link": game_data["group_link"], 
             "start_time_24": game_data["start_time_24"],
             "end_time_24": game_data["end_time_24"],      
+            # Timestamp copy of the end time for the expiry sweep's range query
+            "end_at": DateTimeHelper.parse_game_datetime(game_data["date"], game_data["end_time_24"]),
             "host": update.effective_user.id,
             "status": "open",
             "group_id": str(group_result["group_id"]), 
             "reminder_24h_sent": False,
             "reminder_2h_sent": False,
             "player_count": initial_player_count,
-            "host_username": update.effective_user.username
+            "host_username": update.effective_user.username,
+            "creation_key": creation_key
         }
         
-        game_id = db.save_game(game_doc_data)
+        with TRACER.span("create_game.save", root=False):
+            game_id = db.save_game(game_doc_data)
+        record = creation_service.record(creation_key, record, status="saved", game_id=game_id)
 
         try:
-            await reminder_service.schedule_game_reminders(context, game_doc_data, game_id)
-            print(f"✅ Reminders scheduled for new game {game_id}")
+            with TRACER.span("create_game.reminders", root=False):
+                await reminder_service.schedule_game_reminders(context, game_doc_data, game_id)
+            logger.info("✅ Reminders scheduled for new game %s", game_id)
         except Exception as reminder_error:
-            print(f"⚠️ Error scheduling reminders for game {game_id}: {reminder_error}")
-    
+            logger.warning("⚠️ Error scheduling reminders for game %s: %s", game_id, reminder_error)
+
+        expiry_service = context.bot_data.get('expiry_service')
+        if expiry_service:
+            expiry_service.schedule_game_expiry(game_doc_data, game_id)
 
+    if not record.get("announcement_msg_id"):
         announcement_data = {
             "sport": game_data["sport"],
             "date": game_data["date"],
@@ -355,35 +436,38 @@ async def save_game(update: Update, context: ContextTypes.DEFAULT_TYPE):
             "host_username": update.effective_user.username
         }
 
-        announcement_msg = await post_announcement(context, announcement_data, update.effective_user)
-
-        #Store announcement message id for status updates later on 
-        db.update_game(game_id, {"announcement_msg_id": announcement_msg.message_id})
-    
-       
-        if context.user_data.get("auto_create_group"):
-            success_text = f"\n🎉 Group '{game_data.get('group_name')}' created and announced!"
-        
-        success_text += f"\n\nView announcement: {announcement_msg.link}"
+        with TRACER.span("create_game.announcement", root=False):
+            announcement_msg = await post_announcement(context, announcement_data, update.effective_user)
 
-        await query.edit_message_text(
-            text=success_text,
-            reply_markup=InlineKeyboardMarkup([
-                [InlineKeyboardButton("🔗 Join Group", url=game_data["group_link"])]
-            ])
+            #Store announcement message id for status updates later on 
+            db.update_game(game_id, {"announcement_msg_id": announcement_msg.message_id})
+        record = creation_service.record(
+            creation_key, record,
+            status="completed",
+            announcement_msg_id=announcement_msg.message_id,
+            announcement_link=announcement_msg.link
         )
+    else:
+        record = creation_service.record(creation_key, record, status="completed")
 
-        context.user_data.clear()
-        return ConversationHandler.END
-   
-    except Exception as e:
-        print(f"Error saving game: {str(e)}")
+    await _show_creation_success(query, context, record)
+    return ConversationHandler.END
 
-        await query.edit_message_text(
-            text ="⚠️ Failed to save game. Please try again.",
-            reply_markup=None
-            )
-        return ConversationHandler.END
+async def _show_creation_success(query, context, record):
+    success_text = ""
+    if context.user_data.get("auto_create_group"):
+        success_text = f"\n🎉 Group '{record.get('group_name')}' created and announced!"
+    
+    success_text += f"\n\nView announcement: {record.get('announcement_link')}"
+
+    await query.edit_message_text(
+        text=success_text,
+        reply_markup=InlineKeyboardMarkup([
+            [InlineKeyboardButton("🔗 Join Group", url=record.get("group_link"))]
+        ])
+    )
+
+    context.user_data.clear()
 
 async def post_announcement(context, game_data, user):
     ANNOUNCEMENT_CHANNEL = os.getenv("ANNOUNCEMENT_CHANNEL")
@@ -384,7 +384,7 @@ async def show_results(update: Update, context: ContextTypes.DEFAULT_TYPE):
         game_doc = game_ref.get()
         
         if game_doc.exists:
-            fresh_game_data = game_doc.to_dict()
+            fresh_game_data = db.with_pending_writes(game_doc.id, game_doc.to_dict())
             game.update(fresh_game_data)
             game['id'] = game_doc.id
             
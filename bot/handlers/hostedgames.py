@@ -1,12 +1,16 @@
 import os
+import logging
 from dotenv import load_dotenv
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, ConversationHandler
 from ..utils import ValidationHelper, DateTimeHelper
 from ..utils.constants import *
+from ..services.announcement_editor import get_announcement_editor
 
 load_dotenv() 
 
+logger = logging.getLogger(__name__)
+
 class HostedGamesService:
     
     @staticmethod
@@ -80,7 +84,7 @@ class HostedGamesService:
             if query and not query.answered:
                 await query.answer()
         except Exception as e:
-            print(f"Warning: Could not answer query: {e}")
+            logger.warning("Could not answer query: %s", e)
     
     @staticmethod
     async def safe_edit_message(query, text, reply_markup=None, fallback_message=None):
@@ -89,13 +93,13 @@ class HostedGamesService:
                 await query.edit_message_text(text=text, reply_markup=reply_markup)
                 return True
         except Exception as e:
-            print(f"Error editing message: {e}")
+            logger.error("Error editing message: %s", e)
             if fallback_message and query and query.message:
                 try:
                     await query.message.reply_text(text=fallback_message, reply_markup=reply_markup)
                     return True
                 except Exception as fallback_error:
-                    print(f"Fallback message also failed: {fallback_error}")
+                    logger.warning("Fallback message also failed: %s", fallback_error)
             return False
 
 async def view_hosted_games(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -106,15 +110,15 @@ async def view_hosted_games(update: Update, context: ContextTypes.DEFAULT_TYPE):
         # Check if db exists
         db = context.bot_data.get('db')
         if not db:
-            print("❌ Database not found in context")
+            logger.error("❌ Database not found in context")
             await query.edit_message_text("❌ System error. Please try again later.")
             return ConversationHandler.END
         
         user_id = update.effective_user.id
-        print(f"🔍 Fetching hosted games for user {user_id}")
+        logger.debug("🔍 Fetching hosted games for user %s", user_id)
         
         games = await db.get_hosted_games(context, user_id)
-        print(f"✅ Found {len(games) if games else 0} games for user {user_id}")
+        logger.debug("✅ Found %s games for user %s", len(games) if games else 0, user_id)
         
         if not games:
             await HostedGamesService.safe_edit_message(
@@ -127,13 +131,13 @@ async def view_hosted_games(update: Update, context: ContextTypes.DEFAULT_TYPE):
         # Store games data and initialize navigation
         context.user_data["hosted_games"] = games
         context.user_data["current_game_index"] = 0
-        print(f"✅ Stored {len(games)} games in context, index set to 0")
+        logger.debug("✅ Stored %s games in context, index set to 0", len(games))
         
         await display_game(update, context)
         return VIEW_HOSTED_GAMES
         
     except Exception as e:
-        print(f"❌ Error in view_hosted_games: {e}")
+        logger.error("❌ Error in view_hosted_games: %s", e)
         import traceback
         traceback.print_exc()
         await query.edit_message_text("❌ Failed to load your games. Please try again.")
@@ -149,22 +153,22 @@ async def display_game(update: Update, context: ContextTypes.DEFAULT_TYPE):
         current_index = context.user_data.get("current_game_index")
         
         if not games:
-            print("❌ No games data found in context")
+            logger.error("❌ No games data found in context")
             await query.edit_message_text("❌ No games found. Please start over.")
             return ConversationHandler.END
         
         if current_index is None:
-            print("❌ No current_game_index found, setting to 0")
+            logger.error("❌ No current_game_index found, setting to 0")
             current_index = 0
             context.user_data["current_game_index"] = 0
         
         if not (0 <= current_index < len(games)):
-            print(f"❌ Invalid game index: {current_index} for {len(games)} games, resetting to 0")
+            logger.error("❌ Invalid game index: %s for %s games, resetting to 0", current_index, len(games))
             context.user_data["current_game_index"] = 0
             current_index = 0
         
         game = games[current_index]
-        print(f"✅ Displaying game {current_index + 1}/{len(games)}: {game.get('sport', 'Unknown')}")
+        logger.debug("✅ Displaying game %s/%s: %s", current_index + 1, len(games), game.get('sport', 'Unknown'))
         
 
         text = HostedGamesService.format_game_display(game, current_index, len(games))
@@ -174,8 +178,8 @@ async def display_game(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return VIEW_HOSTED_GAMES
         
     except Exception as e:
-        print(f"❌ Error in display_game: {e}")
-        print(f"Context data: games={len(context.user_data.get('hosted_games', []))}, index={context.user_data.get('current_game_index')}")
+        logger.error("❌ Error in display_game: %s", e)
+        logger.debug("Context data: games=%s, index=%s", len(context.user_data.get('hosted_games', [])), context.user_data.get('current_game_index'))
         await query.edit_message_text("❌ Display error. Please try again with /start")
         return ConversationHandler.END
 
@@ -197,13 +201,13 @@ async def navigate_hosted_games(update: Update, context: ContextTypes.DEFAULT_TY
         elif query.data == "next_game" and current_index < len(games) - 1:
             context.user_data["current_game_index"] = current_index + 1
         else:
-            print(f"Invalid navigation: {query.data} at index {current_index}")
+            logger.warning("Invalid navigation: %s at index %s", query.data, current_index)
     
         await display_game(update, context)
         return VIEW_HOSTED_GAMES
 
     except Exception as e:
-        print(f"Navigation error: {e}")
+        logger.error("Navigation error: %s", e)
         await query.edit_message_text("⚠️ Navigation failed. Use /start to begin again.")
         return ConversationHandler.END
 
@@ -244,6 +248,19 @@ async def confirm_cancel_game(update: Update, context: ContextTypes.DEFAULT_TYPE
         
         # Update announcement channel message 
         await _update_announcement_message(context, announcement_msg_id, game)
+
+        # Stop reconciling member counts for the cancelled game
+        scheduler = context.bot_data.get('member_sync_scheduler')
+        if scheduler:
+            scheduler.untrack(game['id'])
+
+        # Drop its pending reminder and expiry timers
+        reminder_service = context.bot_data.get('reminder_service')
+        if reminder_service:
+            await reminder_service.cancel_game_reminders(context, game['id'])
+        expiry_service = context.bot_data.get('expiry_service')
+        if expiry_service:
+            expiry_service.cancel_game_expiry(game['id'])
         
         # Remove cancelled game from local list
         games.pop(current_index)
@@ -265,7 +282,7 @@ async def confirm_cancel_game(update: Update, context: ContextTypes.DEFAULT_TYPE
         return VIEW_HOSTED_GAMES
         
     except Exception as e:
-        print(f"Error cancelling game: {e}")
+        logger.error("Error cancelling game: %s", e)
         await query.edit_message_text("❌ Failed to cancel game. Please try again.")
         return VIEW_HOSTED_GAMES
 
@@ -275,20 +292,16 @@ async def _update_announcement_message(context, announcement_msg_id, game):
         
     announcement_channel = os.getenv("ANNOUNCEMENT_CHANNEL")
     if not announcement_channel:
-        print("Warning: ANNOUNCEMENT_CHANNEL not configured")
+        logger.warning("ANNOUNCEMENT_CHANNEL not configured")
         return
     
     try:
         cancelled_text = f"❌ CANCELLED: {game['sport']} Game at {game['venue']} on {game['time_display']}"
-        await context.bot.edit_message_text(
-            chat_id=announcement_channel,
-            message_id=announcement_msg_id,
-            text=cancelled_text,
-            reply_markup=None
-        )
-        print(f"✅ Updated announcement message {announcement_msg_id}")
+        # Sent immediately and supersedes any pending player count edit
+        if await get_announcement_editor(context).submit(announcement_msg_id, cancelled_text, immediate=True):
+            logger.info("✅ Updated announcement message %s", announcement_msg_id)
     except Exception as e:
-        print(f"Warning: Couldn't update announcement message: {e}")
+        logger.warning("Couldn't update announcement message: %s", e)
 
 async def back_to_list(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
@@ -314,6 +327,6 @@ async def back_to_main(update: Update, context: ContextTypes.DEFAULT_TYPE):
     )
     
     if not success:
-        print("Warning: Both edit and fallback message failed")
+        logger.warning("Both edit and fallback message failed")
     
     return ConversationHandler.END
\ No newline at end of file
@@ -1,12 +1,24 @@
 import os
+import asyncio
+import logging
 from telegram.ext import ContextTypes
 from telegram import Update, ChatMemberUpdated, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.constants import ChatMemberStatus
 from dotenv import load_dotenv
 from ..utils import GroupIdHelper, DateTimeHelper, ValidationHelper
+from ..services.membership import MembershipLedger
+from ..services.member_sync import MemberSyncScheduler
+from ..services.game_updates import GameUpdateQueue
+from ..services.announcement_editor import get_announcement_editor
+from ..services.rate_limiter import background_priority
+from ..services.startup import get_startup_state
+from ..services.metrics import CACHE_REQUESTS
+from ..utils.structured_logging import add_log_context
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 async def track_new_members(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
         if not update.message or not update.message.new_chat_members:
@@ -16,42 +28,28 @@ async def track_new_members(update: Update, context: ContextTypes.DEFAULT_TYPE):
         new_members = update.message.new_chat_members
         
         
-        print(f"New members in chat_id: {chat_id}")
+        logger.debug("New members in chat_id: %s", chat_id)
         
         # Filter out bots
         real_members = [member for member in new_members if not member.is_bot]
         if not real_members:
             return
             
-        # Get game data
         db = context.bot_data.get('db')
         if not db:
             return
-            
-        game_data = await get_game_by_group_id(db, chat_id)
-        if not game_data:
-            print(f"No game found for chat_id: {chat_id}")
-            return
-            
-        # Filter out host (already counted)
-        host_id = game_data.get('host')
-        new_non_host_members = [
-            member for member in real_members 
-            if str(member.id) != str(host_id)
-        ]
-        
-        if new_non_host_members:
-            # Update member count by the number of new members
-            await update_member_count(
-                context, 
-                game_data, 
-                len(new_non_host_members), 
-                True,  # is_join
-                new_non_host_members
-            )
+
+        # The game is looked up (and the host skipped) by the group's worker
+        await queue_member_change(
+            context, 
+            chat_id, 
+            real_members,
+            True,  # is_join
+            update.message.date
+        )
             
     except Exception as e:
-        print(f" Error in track_new_members: {e}")
+        logger.error(" Error in track_new_members: %s", e)
 
 async def track_left_members(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
@@ -61,7 +59,7 @@ async def track_left_members(update: Update, context: ContextTypes.DEFAULT_TYPE)
         chat_id = update.message.chat.id
         left_member = update.message.left_chat_member
         
-        print(f"Member left chat_id: {chat_id}")
+        logger.debug("Member left chat_id: %s", chat_id)
         
         # Skip bots
         if left_member.is_bot:
@@ -71,28 +69,16 @@ async def track_left_members(update: Update, context: ContextTypes.DEFAULT_TYPE)
         if not db:
             return
             
-        game_data = await get_game_by_group_id(db, chat_id)
-        if not game_data:
-            print(f"⚠️ No game found for chat_id: {chat_id}")
-            return
-            
-        # Skip if this is the host leaving (they should cancel the game instead)
-        host_id = game_data.get('host')
-        if str(left_member.id) == str(host_id):
-            print(f"⚠️ Host {left_member.first_name} left the game - this might need special handling")
-            return
-            
-        # Update member count
-        await update_member_count(
+        await queue_member_change(
             context, 
-            game_data, 
-            1, 
+            chat_id, 
+            [left_member],
             False,  # is_join
-            [left_member]
+            update.message.date
         )
         
     except Exception as e:
-        print(f"Error in track_left_members: {e}")
+        logger.error("Error in track_left_members: %s", e)
 
 async def track_chat_member_updates(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
@@ -105,57 +91,33 @@ async def track_chat_member_updates(update: Update, context: ContextTypes.DEFAUL
         old_status = chat_member_update.old_chat_member.status
         new_status = chat_member_update.new_chat_member.status
         
-        print(f" Chat member update in chat_id: {chat_id}")
-        print(f"Status change: {old_status} -> {new_status}")
+        logger.debug(" Chat member update in chat_id: %s", chat_id)
+        logger.debug("Status change: %s -> %s", old_status, new_status)
 
         if user.is_bot:
-            print(f"⏭Skipping bot user: {user.first_name}")
+            logger.debug("⏭Skipping bot user: %s", user.first_name)
+            invalidate_bot_member_offset(context, chat_id)
             return
             
         db = context.bot_data.get('db')
         if not db:
-            print("❌ No database connection available")
-            return
-            
-        game_data = await get_game_by_group_id(db, chat_id)
-        if not game_data:
-            print(f"⚠️ No game found for chat_id: {chat_id}")
+            logger.error("❌ No database connection available")
             return
             
-        host_id = game_data.get('host')
-        if str(user.id) == str(host_id):
-            print(f"⏭️ Skipping host user: {user.first_name}")
-            return
-            
-        is_removed = False
-        is_added = False
-        
-        if (old_status in [ChatMemberStatus.MEMBER, ChatMemberStatus.ADMINISTRATOR] and 
-            new_status in [ChatMemberStatus.BANNED, ChatMemberStatus.LEFT]):
-            is_removed = True
-            print(f"👋 User {user.first_name} was removed (status: {new_status})")
-            
-        elif (old_status in [ChatMemberStatus.KICKED, ChatMemberStatus.BANNED, ChatMemberStatus.LEFT] and 
-              new_status in [ChatMemberStatus.MEMBER, ChatMemberStatus.ADMINISTRATOR]):
-            is_added = True
-            print(f"👥 User {user.first_name} was added back (status: {new_status})")
-            
-        if is_removed or is_added:
-            print(f"🔄 Updating member count for {'addition' if is_added else 'removal'}")
-            await update_member_count(
-                context, 
-                game_data, 
-                1, 
-                is_added,  
-                [user]
-            )
-        else:
-            print(f"ℹ️ Status change doesn't affect member count: {old_status} -> {new_status}")
+        # Duplicate and out-of-order events are absorbed by the ledger
+        is_member = _is_member_status(chat_member_update.new_chat_member)
+        logger.info("%s %s is %s (status: %s)", '👥' if is_member else '👋', user.first_name, 'a member' if is_member else 'no longer a member', new_status)
+
+        await queue_member_change(
+            context, 
+            chat_id, 
+            [user],
+            is_member,
+            chat_member_update.date
+        )
             
     except Exception as e:
-        print(f"❌ Error in track_chat_member_updates: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Error in track_chat_member_updates: %s", e)
 
 async def get_game_by_group_id(db, group_id):
     try:
@@ -164,88 +126,186 @@ async def get_game_by_group_id(db, group_id):
         search_group_id = GroupIdHelper.get_search_group_id(group_id)
         GroupIdHelper.log_group_conversion(group_id, search_group_id, "search")
         
-        print(f"🔍 Searching for game with normalized group_id: {search_group_id}")
+        logger.debug("🔍 Searching for game with normalized group_id: %s", search_group_id)
         
         query = games_ref.where(filter=db.firestore.FieldFilter("group_id", "==", search_group_id))
         results = list(query.stream())
         
         if results:
             game_doc = results[0]
-            game_data = {"id": game_doc.id, **game_doc.to_dict()}
-            print(f"✅ Found game: {game_data['id']} for group_id: {search_group_id}")
+            game_data = db.with_pending_writes(game_doc.id, {"id": game_doc.id, **game_doc.to_dict()})
+            add_log_context(game_id=game_data['id'])
+            logger.debug("✅ Found game: %s for group_id: %s", game_data['id'], search_group_id)
             return game_data
         else:
-            print(f"❌ No game found for group_id: {search_group_id}")
+            logger.warning("⚠️ No game found for group_id: %s", search_group_id)
             return None
         
     except Exception as e:
-        print(f"❌ Error getting game by group ID: {e}")
+        logger.error("❌ Error getting game by group ID: %s", e)
         return None
 
-async def update_member_count(context: ContextTypes.DEFAULT_TYPE, game_data, count_change, is_join, users):
+def _is_member_status(chat_member):
+    if chat_member.status in [ChatMemberStatus.OWNER, ChatMemberStatus.ADMINISTRATOR, ChatMemberStatus.MEMBER]:
+        return True
+    if chat_member.status == ChatMemberStatus.RESTRICTED:
+        return bool(getattr(chat_member, 'is_member', False))
+    return False
+
+def get_membership_ledger(context: ContextTypes.DEFAULT_TYPE):
+    return context.bot_data.setdefault('membership_ledger', MembershipLedger())
+
+def get_member_sync_scheduler(context: ContextTypes.DEFAULT_TYPE):
+    if 'member_sync_scheduler' not in context.bot_data:
+        context.bot_data['member_sync_scheduler'] = MemberSyncScheduler(
+            calls_per_second=float(os.getenv("MEMBER_SYNC_CALLS_PER_SECOND", "3"))
+        )
+    return context.bot_data['member_sync_scheduler']
+
+def get_game_update_queue(context: ContextTypes.DEFAULT_TYPE):
+    if 'game_update_queue' not in context.bot_data:
+        context.bot_data['game_update_queue'] = GameUpdateQueue(_apply_member_events)
+    return context.bot_data['game_update_queue']
+
+async def update_member_count(context: ContextTypes.DEFAULT_TYPE, game_data, users, is_join, event_time=None):
+    await queue_member_change(context, game_data.get('group_id'), users, is_join, event_time, game_data)
+
+async def queue_member_change(context: ContextTypes.DEFAULT_TYPE, group_id, users, is_join, event_time=None, game_data=None):
     try:
         db = context.bot_data.get('db')
         if not db:
-            print("❌ No database connection available")
+            logger.error("❌ No database connection available")
+            return
+
+        # Applied by the group's own worker, batched with any other pending events
+        changed = await get_game_update_queue(context).submit(GroupIdHelper.get_search_group_id(group_id), {
+            "context": context,
+            "game_data": game_data,
+            "kind": "membership",
+            "user_ids": [user.id for user in users],
+            "is_join": is_join,
+            "event_time": event_time,
+        })
+
+        if not changed:
+            logger.debug("ℹ️ Membership already up to date for group %s", group_id)
             return
-            
-        game_id = game_data.get('id')
-        current_count = game_data.get('player_count', 1)
-        
-        # Calculate new count
-        new_count = current_count + count_change if is_join else max(1, current_count - count_change)
-        
-        print(f"🔄 Updating count for game {game_id}: {current_count} -> {new_count}")
-        
-        # Update Firestore
-        update_data = {"player_count": new_count}
-        db.update_game(game_id, update_data)
-        
-        # Update the game_data with new count for announcement update
-        game_data['player_count'] = new_count
-        
-        # Force update announcement message
-        announcement_msg_id = game_data.get("announcement_msg_id")
-        if announcement_msg_id:
-            print(f"🔄 Attempting to update announcement message ID: {announcement_msg_id}")
-            try:
-                success = await update_announcement_with_count(
-                    context, 
-                    game_data, 
-                    new_count, 
-                    announcement_msg_id
-                )
-                if success:
-                    print(f"✅ Updated announcement for game {game_id} to {new_count} players")
-                else:
-                    print(f"❌ Failed to update announcement for game {game_id}")
-            except Exception as e:
-                print(f"❌ Exception while updating announcement: {e}")
-                import traceback
-                traceback.print_exc()
-        else:
-            print(f"⚠️ No announcement_msg_id found for game {game_id}")
         
         user_names = [user.first_name for user in users]
         action = "joined" if is_join else "left"
-        print(f"👥 {', '.join(user_names)} {action}. New count: {new_count}")
+        logger.info("👥 %s %s", ', '.join(user_names), action)
         
     except Exception as e:
-        print(f"❌ Error in update_member_count: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Error in queue_member_change: %s", e)
+
+async def _apply_member_events(group_id, events):
+    # Runs on the group's worker only, so the ledger and stored count for
+    # its game can't change underneath it
+    context = events[-1]["context"]
+    db = context.bot_data.get('db')
+
+    # Handlers only know the chat, so the game is read once per batch; a
+    # batch of reconciliations brings its own
+    provided = [event["game_data"] for event in events if event.get("game_data")]
+    game_data = provided[-1] if len(provided) == len(events) else None
+    if game_data is None:
+        game_data = await get_game_by_group_id(db, group_id) or (provided[-1] if provided else None)
+    if not game_data:
+        return False
+
+    game_id = game_data.get('id')
+    add_log_context(game_id=game_id)
+    group_id = game_data.get('group_id')
+    host_id = str(game_data.get('host'))
+
+    ledger = get_membership_ledger(context)
+    ledger.load(group_id, game_data)
+    old_count = ledger.count(group_id)
+    old_members = set(ledger.members(group_id))
+
+    changed = False
+    recounted = False
+    for event in events:
+        if event["kind"] == "reconcile":
+            recounted = True
+            if ledger.reconcile(group_id, event["actual_count"]):
+                logger.warning("⚠️ Ledger drift for game %s, reconciled to Telegram count %s", game_id, event['actual_count'])
+            continue
+        for user_id in event["user_ids"]:
+            # The host is always counted, and should cancel rather than leave
+            if str(user_id) == host_id:
+                if not event["is_join"]:
+                    logger.warning("⚠️ Host of game %s left the group", game_id)
+                continue
+            changed = ledger.apply(group_id, user_id, event["is_join"], event["event_time"]) or changed
+
+    stored_count = game_data.get('player_count', 1)
+    new_count = ledger.count(group_id)
+    if recounted:
+        changed = changed or new_count != stored_count
+    if not changed:
+        return False
+
+    new_members = ledger.members(group_id)
+    joined = sorted(set(new_members) - old_members)
+    left = sorted(old_members - set(new_members))
+
+    # Event-driven changes are written as atomic deltas; a recount against
+    # Telegram's own number has to be written as an absolute value
+    if recounted:
+        update_data = {"player_count": new_count}
+    else:
+        update_data = {"player_count": db.firestore.Increment(new_count - old_count)}
+
+    if joined and left:
+        update_data["players_list"] = new_members
+    elif joined:
+        update_data["players_list"] = db.firestore.ArrayUnion(joined)
+    elif left:
+        update_data["players_list"] = db.firestore.ArrayRemove(left)
+
+    logger.info("🔄 Updating count for game %s: %s -> %s (%s events)", game_id, stored_count, new_count, len(events))
+    await _store_member_count(context, game_data, new_count, new_members, update_data)
+    get_member_sync_scheduler(context).note_activity(game_data, MemberSyncScheduler.now())
+    return True
+
+async def _store_member_count(context, game_data, new_count, players_list, update_data):
+    db = context.bot_data.get('db')
+    game_id = game_data.get('id')
+
+    db.update_game(game_id, update_data)
+    game_data['player_count'] = new_count
+    game_data['players_list'] = players_list
+
+    announcement_msg_id = game_data.get("announcement_msg_id")
+    if announcement_msg_id:
+        try:
+            success = await update_announcement_with_count(
+                context, 
+                game_data, 
+                new_count, 
+                announcement_msg_id
+            )
+            if success:
+                logger.debug("✅ Updated announcement for game %s to %s players", game_id, new_count)
+            else:
+                logger.error("❌ Failed to update announcement for game %s", game_id)
+        except Exception as e:
+            logger.error("❌ Exception while updating announcement: %s", e)
+    else:
+        logger.warning("⚠️ No announcement_msg_id found for game %s", game_id)
 
 async def update_announcement_with_count(context: ContextTypes.DEFAULT_TYPE, game_data, member_count, announcement_msg_id):
     try:
         ANNOUNCEMENT_CHANNEL = os.getenv("ANNOUNCEMENT_CHANNEL")
         
         if not ANNOUNCEMENT_CHANNEL:
-            print("❌ No announcement channel configured")
+            logger.error("❌ No announcement channel configured")
             return False
         
         is_valid, errors = ValidationHelper.validate_game_data(game_data)
         if not is_valid:
-            print(f"❌ Game data validation failed: {errors}")
+            logger.error("❌ Game data validation failed: %s", errors)
             return False
         
         announcement_text = (
@@ -261,114 +321,82 @@ async def update_announcement_with_count(context: ContextTypes.DEFAULT_TYPE, gam
  
         keyboard = [[InlineKeyboardButton("✋ Join Game", url=game_data['group_link'])]]
         
-        print(f"🔄 Editing message in channel {ANNOUNCEMENT_CHANNEL}, message ID: {announcement_msg_id}")
-        
-        try:
-            await context.bot.edit_message_text(
-                chat_id=ANNOUNCEMENT_CHANNEL,
-                message_id=int(announcement_msg_id),
-                text=announcement_text,
-                reply_markup=InlineKeyboardMarkup(keyboard),
-                parse_mode=None
-            )
-            print(f"✅ Successfully updated announcement message")
-            return True
-            
-        except Exception as edit_error:
-            print(f"❌ Telegram API error while editing message: {edit_error}")
-            
-            if "message not found" in str(edit_error).lower():
-                print("⚠️ Message not found - it may have been deleted")
-                
-            elif "message is not modified" in str(edit_error).lower():
-                print("ℹ️ Message content is identical, no update needed")
-                return True
-                
-            elif "bad request" in str(edit_error).lower():
-                print(f"⚠️ Bad request error - checking channel access and message ID format")
-
-                try:
-                    chat_info = await context.bot.get_chat(ANNOUNCEMENT_CHANNEL)
-                    print(f"✅ Channel accessible: {chat_info.title}")
-                except Exception as channel_error:
-                    print(f"❌ Cannot access channel: {channel_error}")
-                    
-            return False
+        # Edits are coalesced per message, so a burst of joins becomes one edit
+        editor = get_announcement_editor(context)
+        return await editor.submit(
+            announcement_msg_id,
+            announcement_text,
+            InlineKeyboardMarkup(keyboard)
+        )
         
     except Exception as e:
-        print(f"❌ Detailed error updating announcement: {str(e)}")
-        print(f"Channel: {ANNOUNCEMENT_CHANNEL}, Message ID: {announcement_msg_id}")
-        print(f"Game data keys: {list(game_data.keys())}")
-        import traceback
-        traceback.print_exc()
+        logger.error("❌ Error updating announcement %s: %s", announcement_msg_id, e)
         return False
 
 async def get_actual_member_count(context: ContextTypes.DEFAULT_TYPE, group_id):
+    # None when Telegram couldn't be asked, so callers never mistake a failed
+    # lookup for a real count
     try:
-    
         telegram_group_id = GroupIdHelper.to_telegram_format(group_id)
-        GroupIdHelper.log_group_conversion(group_id, telegram_group_id, "telegram_format")
-        
-        print(f"🔍 Getting member count for telegram group_id: {telegram_group_id}")
-        
-        try:
-            chat_info = await context.bot.get_chat(telegram_group_id)
-            print(f"✅ Chat accessible: {chat_info.title}")
-        except Exception as e:
-            print(f"❌ Cannot access chat {telegram_group_id}: {e}")
-            return 1
-        
-        # Get total member count
+
         total_count = await context.bot.get_chat_member_count(telegram_group_id)
-        print(f"📊 Total chat members: {total_count}")
-        
-        try:
-            admins = await context.bot.get_chat_administrators(telegram_group_id)
-            bot_count = sum(1 for admin in admins if admin.user.is_bot)
-            print(f"🤖 Bot administrators found: {bot_count}")
-            
-            actual_count = max(1, total_count - bot_count)
-            print(f"📊 Calculated member count: {actual_count}")
-            
-            return actual_count
-            
-        except Exception as admin_error:
-            print(f"⚠️ Could not get admin list: {admin_error}")
-            return max(1, total_count - 1)
+        bot_count = await get_bot_member_offset(context, telegram_group_id)
+
+        return max(1, total_count - bot_count)
             
     except Exception as e:
-        print(f"❌ Error getting member count for {group_id}: {e}")
+        logger.error("❌ Error getting member count for %s: %s", group_id, e)
+        return None
+
+async def get_bot_member_offset(context: ContextTypes.DEFAULT_TYPE, telegram_group_id):
+    # Bot admins rarely change, so the offset is cached per group and only
+    # dropped when the bot's own (or another bot's) membership changes
+    cache = context.bot_data.setdefault('bot_offset_cache', {})
+    if telegram_group_id in cache:
+        CACHE_REQUESTS.inc(cache="bot_offset", result="hit")
+        return cache[telegram_group_id]
+    CACHE_REQUESTS.inc(cache="bot_offset", result="miss")
+
+    try:
+        admins = await context.bot.get_chat_administrators(telegram_group_id)
+        bot_count = sum(1 for admin in admins if admin.user.is_bot)
+        cache[telegram_group_id] = bot_count
+        return bot_count
+    except Exception as admin_error:
+        logger.warning("⚠️ Could not get admin list: %s", admin_error)
         return 1
 
+def invalidate_bot_member_offset(context: ContextTypes.DEFAULT_TYPE, telegram_group_id):
+    context.bot_data.setdefault('bot_offset_cache', {}).pop(telegram_group_id, None)
+
 async def sync_member_count(context: ContextTypes.DEFAULT_TYPE, game_data):
     try:
         group_id = game_data.get('group_id')
         if not group_id:
-            print(f"⚠️ No group_id found for game {game_data.get('id')}")
-            return
+            logger.warning("⚠️ No group_id found for game %s", game_data.get('id'))
+            return False
             
-        print(f"🔄 Syncing member count for game {game_data.get('id')} with group_id: {group_id}")
-        
         actual_count = await get_actual_member_count(context, group_id)
-        stored_count = game_data.get('player_count', 1)
-        
-        if actual_count != stored_count:
-            db = context.bot_data.get('db')
-            if db:
-                db.update_game(game_data.get('id'), {"player_count": actual_count})
-                print(f"🔄 Synced member count for game {game_data.get('id')}: {stored_count} -> {actual_count}")
-                
-                # Update announcement if needed
-                announcement_msg_id = game_data.get("announcement_msg_id")
-                if announcement_msg_id:
-                    # Update game_data with new count
-                    game_data['player_count'] = actual_count
-                    await update_announcement_with_count(context, game_data, actual_count, announcement_msg_id)
-        else:
-            print(f"✅ Member count already in sync for game {game_data.get('id')}: {actual_count}")
+        if actual_count is None:
+            logger.warning("⚠️ Member count unknown for game %s, skipping reconciliation", game_data.get('id'))
+            return False
+        return await reconcile_member_count(context, game_data, actual_count)
                     
     except Exception as e:
-        print(f"❌ Error syncing member count: {e}")
+        logger.error("❌ Error syncing member count: %s", e)
+        return False
+
+async def reconcile_member_count(context: ContextTypes.DEFAULT_TYPE, game_data, actual_count):
+    # Corrects the ledger for members we never saw join, then stores the
+    # derived count if it differs from what is stored
+    if actual_count is None:
+        return False
+    return await get_game_update_queue(context).submit(GroupIdHelper.get_search_group_id(game_data.get('group_id')), {
+        "context": context,
+        "game_data": game_data,
+        "kind": "reconcile",
+        "actual_count": actual_count,
+    })
 
 async def initialize_member_counts(context: ContextTypes.DEFAULT_TYPE):
     try:
@@ -376,122 +404,81 @@ async def initialize_member_counts(context: ContextTypes.DEFAULT_TYPE):
         if not db:
             return
             
-        # Get all open games
-        games_ref = db.db.collection("game")
-        query = games_ref.where(filter=db.firestore.FieldFilter("status", "==", "open"))
-        results = query.stream()
-        
-        for game_doc in results:
-            game_data = game_doc.to_dict()
-            game_id = game_doc.id
-            group_id = game_data.get('group_id')
-            
-            print(f"🔄 Processing game {game_id} with group_id: {group_id}")
-            
-            if group_id:
-                try:
-                    # Get actual member count
-                    actual_count = await get_actual_member_count(context, group_id)
-                    
-                    # Update the game document
-                    db.update_game(game_id, {"player_count": actual_count})
-                    
-                    # Update the announcement message with the correct count
-                    announcement_msg_id = game_data.get("announcement_msg_id")
-                    if announcement_msg_id:
-                        # Add the updated count to game_data for the announcement update
-                        game_data['player_count'] = actual_count
-                        await update_announcement_with_count(
-                            context, 
-                            game_data, 
-                            actual_count, 
-                            announcement_msg_id
-                        )
-                        print(f"✅ Updated announcement for game {game_id} with count: {actual_count}")
-                    
-                    print(f"✅ Initialized member count for game {game_id}: {actual_count}")
-                except Exception as e:
-                    print(f"❌ Error processing game {game_id}: {e}")
-                    # Set to 1 if there's an error
-                    db.update_game(game_id, {"player_count": 1})
-                    print(f"⚠️ Set fallback member count for game {game_id}: 1")
-            else:
-                # If no group_id, set to 1 (host only)
-                db.update_game(game_id, {"player_count": 1})
-                print(f"✅ Set default member count for game {game_id}: 1 (host only)")
+        games = await db.get_all_open_games()
+        for game_data in games:
+            if not game_data.get('group_id'):
+                continue
+            try:
+                await sync_member_count(context, game_data)
+            except Exception as e:
+                logger.error("❌ Error processing game %s: %s", game_data.get('id'), e)
                 
     except Exception as e:
-        print(f"❌ Error initializing member counts: {e}")
+        logger.error("❌ Error initializing member counts: %s", e)
 
 async def track_all_chat_member_changes(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
-        member_update: ChatMemberUpdated = update.chat_member
+        member_update: ChatMemberUpdated = update.chat_member or update.my_chat_member
         old_status = member_update.old_chat_member.status
         new_status = member_update.new_chat_member.status
         user = member_update.new_chat_member.user
         chat = member_update.chat
 
+        if update.my_chat_member:
+            invalidate_bot_member_offset(context, chat.id)
+
         if old_status in [ChatMemberStatus.LEFT, ChatMemberStatus.KICKED] and new_status == ChatMemberStatus.MEMBER:
-            print(f"[JOIN] {user.full_name} (id: {user.id}) joined '{chat.title}' via status change.")
+            logger.info("[JOIN] %s (id: %s) joined '%s' via status change.", user.full_name, user.id, chat.title)
 
         elif old_status == ChatMemberStatus.MEMBER and new_status in [ChatMemberStatus.LEFT, ChatMemberStatus.KICKED]:
-            print(f"[LEAVE] {user.full_name} (id: {user.id}) left or was removed from '{chat.title}'.")
+            logger.info("[LEAVE] %s (id: %s) left or was removed from '%s'.", user.full_name, user.id, chat.title)
 
         else:
-            print(f"[INFO] {user.full_name} status changed from {old_status} to {new_status} in '{chat.title}'")
+            logger.debug("[INFO] %s status changed from %s to %s in '%s'", user.full_name, old_status, new_status, chat.title)
 
     except Exception as e:
-        print(f"[ERROR] Failed to process chat member change: {e}")
+        logger.error("[ERROR] Failed to process chat member change: %s", e)
 
 async def periodic_member_sync(context):
+    # Reconciliation only: counts are kept exact by the membership events.
+    # Each tick checks just the games that are due, within the call budget.
     try:
-        print("🔄 Running periodic member count sync...")
         db = context.bot_data.get('db')
         if not db:
             return
-            
-        # Get all open games
-        games_ref = db.db.collection("game")
-        query = games_ref.where(filter=db.firestore.FieldFilter("status", "==", "open"))
-        results = query.stream()
-        
-        synced_count = 0
-        for game_doc in results:
-            game_data = game_doc.to_dict()
-            game_id = game_doc.id
-            group_id = game_data.get('group_id')
-            
-            if group_id:
+
+        # The startup bootstrap seeds the scheduler from its own scan
+        if not get_startup_state(context).is_ready("bootstrap"):
+            return
+
+        scheduler = get_member_sync_scheduler(context)
+        now = MemberSyncScheduler.now()
+
+        if scheduler.needs_refresh(now):
+            games = await db.get_all_open_games()
+            scheduler.refresh(games, now)
+            logger.info("📋 Tracking %s open games for member reconciliation", len(scheduler))
+
+        due_games = scheduler.pop_due(now)
+        if not due_games:
+            return
+
+        semaphore = asyncio.Semaphore(int(os.getenv("MEMBER_SYNC_CONCURRENCY", "8")))
+
+        async def sync_one(game_data):
+            async with semaphore:
                 try:
-                    # Get actual member count from Telegram
-                    actual_count = await get_actual_member_count(context, group_id)
-                    stored_count = game_data.get('player_count', 1)
-                    
-                    # Only update if there's a difference
-                    if actual_count != stored_count:
-                        db.update_game(game_id, {"player_count": actual_count})
-                        
-                        # Update announcement
-                        announcement_msg_id = game_data.get("announcement_msg_id")
-                        if announcement_msg_id:
-                            game_data['player_count'] = actual_count
-                            await update_announcement_with_count(
-                                context, 
-                                game_data, 
-                                actual_count, 
-                                announcement_msg_id
-                            )
-                        
-                        print(f"🔄 Synced game {game_id}: {stored_count} -> {actual_count}")
-                        synced_count += 1
-                        
+                    with background_priority():
+                        return await sync_member_count(context, game_data)
                 except Exception as e:
-                    print(f"❌ Error syncing game {game_id}: {e}")
+                    logger.error("❌ Error syncing game %s: %s", game_data.get('id'), e)
+                    return False
+                finally:
+                    scheduler.reschedule(game_data.get('id'), MemberSyncScheduler.now())
+
+        results = await asyncio.gather(*(sync_one(game_data) for game_data in due_games))
                     
-        if synced_count > 0:
-            print(f"✅ Synced {synced_count} games")
-        else:
-            print("📋 All games already in sync")
+        logger.info("🔄 Reconciled %s due games, %s corrected", len(due_games), sum(results))
             
     except Exception as e:
-        print(f"❌ Error in periodic member sync: {e}")
\ No newline at end of file
+        logger.error("❌ Error in periodic member sync: %s", e)
@@ -1,8 +1,10 @@
 from telegram import Update
 from telegram.ext import ContextTypes
-from firebase_admin import firestore
 import datetime
 import logging
+from ..utils import lazy_import
+
+firestore = lazy_import("firebase_admin.firestore")
 
 async def load_user_preferences(user_id: str, db) -> dict:
     try:
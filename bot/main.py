@@ -1,4 +1,4 @@
-from telegram.ext import Application, CommandHandler, CallbackQueryHandler, MessageHandler, filters, ConversationHandler, ChatMemberHandler
+from telegram.ext import Application, ApplicationHandlerStop, CallbackContext, CommandHandler, TypeHandler, CallbackQueryHandler, MessageHandler, filters, ConversationHandler, ChatMemberHandler
 from .handlers.createagame import *
 from .handlers.hostedgames import *
 from warnings import filterwarnings
@@ -6,15 +6,34 @@ from telegram.warnings import PTBUserWarning
 from .services.database import GameDatabase
 from .services.telethon_service import telethon_service
 import asyncio
-from datetime import timedelta
+from datetime import time, timedelta
 from .services.reminder import ReminderService
-import traceback
+from .services.reminder_engine import ReminderEngine
+from .services.timer_store import TimerStore
+from .services.expiry import ExpiryService
+from .services.game_creation import GameCreationService
+from .services.membership import MembershipLedger
+from .services.member_sync import MemberSyncScheduler
+from .services.startup import StartupState, get_startup_state
+from .services.rate_limiter import PriorityRateLimiter, background_priority
+from .utils import DateTimeHelper
+from .utils.structured_logging import setup_logging, bind_log_context
+from .handlers.admin import firestore_costs, report_firestore_costs, profile, stats
+from .services.profiler import PROFILER
+from .services.loop_monitor import LoopLagMonitor
+from .services.update_recorder import UpdateRecorder
+import signal
+import logging
+from .services.tracing import TRACER, configure_tracing
+from .services.metrics import REGISTRY, MetricsServer, instrument_handlers, instrument_job, watch_job_lag
 from .handlers.membertracking import (
     track_new_members,
     track_left_members,
-    initialize_member_counts,
+    track_chat_member_updates,
     track_all_chat_member_changes,
-    periodic_member_sync
+    periodic_member_sync,
+    get_membership_ledger,
+    get_member_sync_scheduler
 )
 filterwarnings(action="ignore", message=r".*CallbackQueryHandler", category=PTBUserWarning)
 
@@ -24,6 +43,8 @@ from dotenv import load_dotenv
 import os
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     context.user_data.clear() 
@@ -83,13 +104,10 @@ async def cancel(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def error_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     error = context.error
-    error_traceback = "".join(traceback.format_tb(error.__traceback__)) if error else "No traceback"
-    
-    print(f"❌ Error: {type(error).__name__}: {error}")
-    print(f"📋 Traceback:\n{error_traceback}")
+    logger.error("❌ Error: %s: %s", type(error).__name__, error, exc_info=error)
 
     if update is None:
-        print("⚠️ Update is None - likely a background job error")
+        logger.warning("⚠️ Update is None - likely a background job error")
         return
     
     try:
@@ -102,46 +120,269 @@ async def error_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 "⚠️ An error occurred. Please try again or /start"
         )
     except Exception as e:
-        print(f"❌ Error in error handler: {e}")
+        logger.error("❌ Error in error handler: %s", e)
         
 async def cleanup_expired_games(context):
     try:
-        print("🧹 Running cleanup job...")
+        logger.info("🧹 Running cleanup job...")
         db = context.bot_data['db']
-        expired_count = await db.close_expired_games(context) 
+        with background_priority():
+            expired_count = await db.close_expired_games(context) 
         if expired_count > 0: 
-            print(f"✅ Cleanup completed: closed {expired_count} expired games")
+            logger.info("✅ Cleanup completed: closed %s expired games", expired_count)
         else: 
-            print("📋 Cleanup completed: no expired games found")
+            logger.info("📋 Cleanup completed: no expired games found")
     except Exception as e:
-        print(f"❌ Error in cleanup job: {e}") 
+        logger.error("❌ Error in cleanup job: %s", e) 
 
 async def send_reminder(context):
     try:
-        print("⏰ Running reminder check...")
+        logger.info("⏰ Running reminder check...")
         reminder_service = context.bot_data['reminder_service']
         await reminder_service.send_game_reminders(context)
-        print("✅ Reminder check completed")
+        logger.info("✅ Reminder check completed")
     except Exception as e:
-        print(f"❌ Error in reminder job: {e}")
+        logger.error("❌ Error in reminder job: %s", e)
 
-async def initialize_member_counts_job(context):
+async def bootstrap_job(context):
+    # One read of the open games feeds every consumer that needs it at startup
+    startup = get_startup_state(context)
     try:
-        print("🔄 Initializing member counts...")
-        await initialize_member_counts(context)
-        print("✅ Member count initialization completed")
+        db = context.bot_data['db']
+        games = await db.get_all_open_games()
+        logger.info("🚀 Bootstrapping from %s open games", len(games))
+
+        # Reminder and expiry timers come from the local store after the first run
+        engine = context.bot_data['reminder_engine']
+        if not engine.is_bootstrapped("reminders"):
+            await context.bot_data['reminder_service'].schedule_reminders_for_games(context, games)
+        if not engine.is_bootstrapped("expiry"):
+            context.bot_data['expiry_service'].schedule_for_games(games)
+
+        ledger = get_membership_ledger(context)
+        for game_data in games:
+            if game_data.get('group_id'):
+                ledger.load(game_data['group_id'], game_data)
+        get_member_sync_scheduler(context).refresh(games, MemberSyncScheduler.now())
+
+        startup.mark_ready("bootstrap")
     except Exception as e:
-        print(f"❌ Error in member count initialization: {e}")
+        startup.mark_failed("bootstrap", e)
+        context.job_queue.run_once(instrument_job(bootstrap_job), when=30)
+
+async def flush_buffered_writes(context):
+    db = context.bot_data['db']
+    if db.write_buffer.pending_count:
+        db.flush_writes()
+
+async def init_database(application):
+    # Firebase credential loading and the SQLite timer store block, so they
+    # run off the event loop while polling is already serving /start
+    db = await asyncio.to_thread(GameDatabase)
+    application.bot_data['db'] = db
+
+    # Timers are kept on disk so restarts don't rescan Firestore
+    timer_store = await asyncio.to_thread(TimerStore, os.getenv("TIMER_STORE_PATH", "bot_timers.sqlite3"))
+    engine = ReminderEngine(timer_store)
+    application.bot_data['reminder_engine'] = engine
+
+    reminder = ReminderService(
+        db,
+        engine,
+        send_concurrency=int(os.getenv("REMINDER_SEND_CONCURRENCY", "5")),
+        batch_window=float(os.getenv("REMINDER_BATCH_WINDOW", "30"))
+    )
+    application.bot_data['reminder_service'] = reminder 
+    application.bot_data['expiry_service'] = ExpiryService(db, engine)
+
+    application.bot_data['creation_service'] = GameCreationService(db)
+    application.bot_data['membership_ledger'] = MembershipLedger()
+    logger.info("✅ Database and reminder service initialized")
+
+    # Reminder timers fire from the engine's own task rather than the job queue
+    engine.restore(engine.now())
+    engine.start(CallbackContext(application))
+
+    schedule_jobs(application.job_queue)
+
+async def init_telethon():
+    await telethon_service.initialize()
+    if not telethon_service.initialized:
+        raise RuntimeError("Telethon client did not connect")
+    logger.info("✅ Telethon service initialized")
+
+async def warm_up(application):
+    # Components start concurrently; each one's readiness is tracked so
+    # handlers can degrade until their dependency is up
+    startup = get_startup_state(application)
+    await asyncio.gather(
+        startup.run("database", lambda: init_database(application), retry_delay=30),
+        startup.run("telethon", init_telethon),
+    )
+    logger.info("🚀 Startup: %s", startup.summary())
+
+def schedule_jobs(job_queue):
+    # Games close from their own expiry timers; this hourly sweep only
+    # catches games that were somehow missed (see close_expired_games)
+    job_queue.run_repeating(
+        instrument_job(cleanup_expired_games),
+        interval=timedelta(hours=1),
+        first=timedelta(hours=1)
+    )
+
+    # Write out buffered game field updates that haven't hit a size threshold
+    job_queue.run_repeating(
+        instrument_job(flush_buffered_writes),
+        interval=timedelta(seconds=float(os.getenv("WRITE_BUFFER_FLUSH_INTERVAL", "2"))),
+        first=5
+    )
+
+    # Single startup scan for reminders, expiry, member sync and caches
+    job_queue.run_once(instrument_job(bootstrap_job), when=0)
+
+    # Membership events keep counts exact; each tick reconciles only the
+    # games whose own check time is due, within the Bot API call budget.
+    # Ticks are skipped until the bootstrap has run.
+    job_queue.run_repeating(
+        instrument_job(periodic_member_sync),
+        interval=timedelta(seconds=10),
+        first=10
+    )
 
+    # Daily Firestore usage summary for the admins
+    job_queue.run_daily(
+        instrument_job(report_firestore_costs),
+        time=time(hour=int(os.getenv("FIRESTORE_REPORT_HOUR", "9")), tzinfo=DateTimeHelper.get_singapore_timezone())
+    )
 
-async def initialize_reminders_job(context):
+    logger.info("✅ Scheduled jobs configured")
+
+def collect_component_gauges(application):
+    # Queue depths and backlogs are read from their owners at scrape time
+    bot_data = application.bot_data
+    gauges = {
+        "rate_limiter": lambda: bot_data['rate_limiter'].queue_depth,
+        "write_buffer": lambda: bot_data['db'].write_buffer.pending_count,
+        "timers": lambda: len(bot_data['reminder_engine']),
+        "game_update_workers": lambda: bot_data['game_update_queue'].busy_count,
+        "member_sync_games": lambda: len(bot_data['member_sync_scheduler']),
+    }
+    backlog = REGISTRY.gauge("bot_component_backlog", "Items waiting in each background component", ["component"])
+
+    def collect():
+        for component, read in gauges.items():
+            try:
+                backlog.set(read(), component=component)
+            except KeyError:
+                pass
+
+    REGISTRY.add_collector(collect)
+
+async def start_services(application):
+    # Polling starts straight away; the slow services warm up behind it
+    get_startup_state(application)
+    application.bot_data['warm_up_task'] = asyncio.create_task(warm_up(application))
+    TRACER.start()
+
+    # Stalls longer than LOOP_LAG_THRESHOLD_MS are logged with the blocking
+    # stack; 0 turns the watchdog off
+    monitor = LoopLagMonitor(threshold=float(os.getenv("LOOP_LAG_THRESHOLD_MS", "250")) / 1000)
+    monitor.start()
+    application.bot_data['loop_monitor'] = monitor
+
+    # `kill -USR1 <pid>` writes the collected profiles without a restart
     try:
-        print("⏰ Initializing reminders...")
-        reminder_service = context.bot_data['reminder_service']
-        await reminder_service.schedule_all_existing_reminders(context)
-        print("✅ Reminder initialization completed")
-    except Exception as e:
-        print(f"❌ Error in reminder initialization: {e}")
+        asyncio.get_running_loop().add_signal_handler(signal.SIGUSR1, PROFILER.dump)
+    except (AttributeError, NotImplementedError):
+        pass
+
+    metrics_port = os.getenv("METRICS_PORT")
+    if metrics_port:
+        server = MetricsServer(REGISTRY, os.getenv("METRICS_HOST", "127.0.0.1"), int(metrics_port))
+        try:
+            await server.start()
+            application.bot_data['metrics_server'] = server
+        except OSError as e:
+            logger.warning("⚠️ Metrics endpoint not started: %s", e)
+
+async def stop_services(application):
+    warm_up_task = application.bot_data.get('warm_up_task')
+    if warm_up_task and not warm_up_task.done():
+        warm_up_task.cancel()
+
+    metrics_server = application.bot_data.get('metrics_server')
+    if metrics_server:
+        await metrics_server.stop()
+
+    monitor = application.bot_data.get('loop_monitor')
+    if monitor:
+        await monitor.stop()
+
+    # Apply any coalesced announcement edits before the bot goes away
+    editor = application.bot_data.get('announcement_editor')
+    if editor:
+        await editor.flush_all()
+
+    engine = application.bot_data.get('reminder_engine')
+    if engine is not None:
+        await engine.stop()
+
+    db = application.bot_data.get('db')
+    if db:
+        db.flush_writes()
+
+    await TRACER.stop()
+
+    recorder = application.bot_data.get('update_recorder')
+    if recorder:
+        recorder.close()
+
+def describe_update(update):
+    if update.callback_query:
+        return f"callback:{(update.callback_query.data or '').split(':')[0]}"
+    if update.message and update.message.text and update.message.text.startswith("/"):
+        return f"command:{update.message.text.split()[0].split('@')[0]}"
+    if update.chat_member:
+        return "chat_member"
+    if update.message:
+        return "message"
+    return "other"
+
+async def bind_update_log_context(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    # Every log record made while this update is handled carries its ids
+    bind_log_context(
+        update_id=update.update_id,
+        user_id=update.effective_user.id if update.effective_user else None,
+        chat_id=update.effective_chat.id if update.effective_chat else None,
+        handler=describe_update(update)
+    )
+
+# Private-chat entry points that don't touch the database
+NO_DATABASE_COMMANDS = ("/start", "/feedback", "/cancel")
+NO_DATABASE_CALLBACKS = ("start",)
+
+async def readiness_gate(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    # Runs before every other handler. While the database is still warming
+    # up, private-chat actions that need it get a short "try again" instead
+    # of an error. Group and membership updates pass through.
+    if get_startup_state(context).is_ready("database"):
+        return
+    if not update.effective_chat or update.effective_chat.type != "private":
+        return
+
+    wait_text = "⏳ The bot is still starting up. Please try again in a few seconds."
+    if update.callback_query:
+        if update.callback_query.data in NO_DATABASE_CALLBACKS:
+            return
+        await update.callback_query.answer(wait_text, show_alert=True)
+    elif update.message:
+        text = update.message.text or ""
+        if text.split("@")[0].split(" ")[0] in NO_DATABASE_COMMANDS:
+            return
+        await update.message.reply_text(wait_text)
+    else:
+        return
+    raise ApplicationHandlerStop
 
 async def feedback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
@@ -174,67 +415,27 @@ async def feedback(update: Update, context: ContextTypes.DEFAULT_TYPE):
             disable_web_page_preview=True
         )
 
-def main():
-    TOKEN = os.getenv("BOT_TOKEN")
-    if not TOKEN:
-        print("❌ BOT_TOKEN not found in environment variables")
-        return
-        
-    application = Application.builder().token(TOKEN).build()
-
-    # Initialize database and services
-    try:
-        db = GameDatabase()   
-        application.bot_data['db'] = db
-
-        reminder = ReminderService(db)
-        application.bot_data['reminder_service'] = reminder 
-        print("✅ Database and reminder service initialized")
-    except Exception as e:
-        print(f"❌ Error initializing services: {e}")
-        traceback.print_exc()
-        return
-
-    job_queue = application.job_queue
-    
-    # Run cleanup every hour
-    job_queue.run_repeating(
-        cleanup_expired_games,
-        interval=timedelta(hours=1),
-        first=10  # Start after 10 seconds
-    )
-
-    # Initialize reminders for existing games on startup
-    job_queue.run_once(
-        initialize_reminders_job,
-        when=20  # Run 20 seconds after startup
-    )
-
-    job_queue.run_once(
-        initialize_member_counts_job,
-        when=30  # Run 30 seconds after startup
+def build_application(token, request=None, update_processor=None):
+    # All Bot API calls go through one limiter so background edits, reminders
+    # and syncs can't crowd out replies to users or trigger flood bans
+    rate_limiter = PriorityRateLimiter(
+        overall_rate=float(os.getenv("BOT_API_RATE", "30")),
+        group_rate=float(os.getenv("BOT_API_GROUP_RATE_PER_MIN", "17")) / 60
     )
-
-    job_queue.run_repeating(
-        periodic_member_sync,
-        interval=timedelta(seconds=30),
-        first=60  # Start after 1 minute
-    )
-
-    print("✅ Scheduled jobs configured")
-
-    async def init_telethon():
-        try:
-            await telethon_service.initialize()
-            print("✅ Telethon service initialized")
-        except Exception as e:
-            print(f"❌ Error initializing Telethon: {e}")
-    
-    # Run initialization
-    try:
-        asyncio.get_event_loop().run_until_complete(init_telethon())
-    except Exception as e:
-        print(f"❌ Error during initialization: {e}")
+    builder = (Application.builder()
+               .token(token)
+               .rate_limiter(rate_limiter)
+               .post_init(start_services)
+               .post_stop(stop_services))
+    # The load test passes a fake Bot API and its own update processor
+    if request is not None:
+        builder = builder.request(request).get_updates_request(request)
+    if update_processor is not None:
+        builder = builder.concurrent_updates(update_processor)
+    application = builder.build()
+    application.bot_data['rate_limiter'] = rate_limiter
+
+    application.bot_data['startup_state'] = StartupState()
 
     host_conv = ConversationHandler (
         entry_points=[CallbackQueryHandler(host_game, pattern="^host_game$")],
@@ -318,16 +519,21 @@ def main():
         allow_reentry = True, 
     )
 
+    application.add_handler(TypeHandler(Update, bind_update_log_context), group=-2)
+    application.add_handler(TypeHandler(Update, readiness_gate), group=-1)
     application.add_handler(CommandHandler('start', start))
     application.add_handler(CallbackQueryHandler(start, pattern="^start$"))
 
     application.add_handler(CommandHandler('feedback', feedback))
+    application.add_handler(CommandHandler('firestore_costs', firestore_costs))
+    application.add_handler(CommandHandler('profile', profile))
+    application.add_handler(CommandHandler('stats', stats))
 
     application.add_handler(host_conv)
     application.add_handler(join_conv)
 
     application.add_handler(ChatMemberHandler(
-        track_all_chat_member_changes, 
+        track_chat_member_updates, 
         ChatMemberHandler.CHAT_MEMBER
     ))
 
@@ -348,14 +554,42 @@ def main():
     ))
     application.add_error_handler(error_handler)
 
-    print("Bot is starting...") 
+    # Latency and error metrics for every handler and job
+    instrument_handlers(application)
+    watch_job_lag(application.job_queue)
+    collect_component_gauges(application)
+    return application
+
+def main():
+    setup_logging()
+    configure_tracing()
+
+    TOKEN = os.getenv("BOT_TOKEN")
+    if not TOKEN:
+        logger.error("❌ BOT_TOKEN not found in environment variables")
+        return
+
+    application = build_application(TOKEN)
+
+    # Opt-in: scrubbed updates are written for benchmarks/replay.py
+    record_dir = os.getenv("RECORD_UPDATES_DIR")
+    if record_dir:
+        recorder = UpdateRecorder.in_directory(record_dir, os.getenv("RECORD_UPDATES_SALT"))
+        recorder.start()
+        application.bot_data['update_recorder'] = recorder
+        application.add_handler(TypeHandler(Update, recorder.record), group=-3)
+        logger.info("🎙 Recording updates to %s", recorder.path)
+
+    logger.info("Bot is starting...") 
     try:
         application.run_polling(
             poll_interval=1,
-            drop_pending_updates=True
+            drop_pending_updates=True,
+            # chat_member updates are only delivered when requested explicitly
+            allowed_updates=Update.ALL_TYPES
         )   
     except Exception as e:
-        print(f"❌ Error running bot: {e}")
+        logger.error("❌ Error running bot: %s", e)
 
 if __name__ == "__main__":
     main()
@@ -1,13 +1,31 @@
-from .database import GameDatabase
-from .reminder import ReminderService
-from .telethon_service import telethon_service
-from .venue import VenueNormalizer, VenueAutocomplete, VenueSearchEngine
+import importlib
+
+# Re-exports resolve on first access so importing one service doesn't pull
+# in Firebase, Telethon and spaCy through the package
+_EXPORTS = {
+    'GameDatabase': '.database',
+    'ReminderService': '.reminder',
+    'telethon_service': '.telethon_service',
+    'VenueNormalizer': '.venue',
+    'VenueAutocomplete': '.venue',
+    'VenueSearchEngine': '.venue'
+}
 
 __all__ = [
     'GameDatabase',
     'ReminderService',
     'telethon_service',
     'VenueNormalizer',
-    'VenueAutocomplete', 
+    'VenueAutocomplete',
     'VenueSearchEngine'
-]
\ No newline at end of file
+]
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
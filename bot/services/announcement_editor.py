@@ -0,0 +1,150 @@
+import os
+import asyncio
+import hashlib
+import logging
+from telegram.error import RetryAfter, BadRequest
+from .rate_limiter import background_priority
+
+logger = logging.getLogger(__name__)
+
+
+class AnnouncementEditor:
+    # Holds the desired text of each announcement message and applies it
+    # with at most one edit per window. Bursts of member count changes
+    # collapse into a single edit, and unchanged content is never re-sent.
+    # Edits to one message never overlap, and a message's state is dropped
+    # once its final (immediate) edit has gone out.
+
+    def __init__(self, bot, channel, window=5.0):
+        self.bot = bot
+        self.channel = channel
+        self.window = window
+
+        self._desired = {}
+        self._sent_hashes = {}
+        self._pending = {}
+        self._locks = {}
+        self._final = set()
+        self.stats = {"submitted": 0, "edits": 0, "skipped": 0, "retries": 0, "failures": 0}
+
+    @property
+    def pending_count(self):
+        return len(self._pending)
+
+    async def submit(self, message_id, text, reply_markup=None, immediate=False):
+        message_id = int(message_id)
+        self._desired[message_id] = (text, reply_markup)
+        self.stats["submitted"] += 1
+
+        if immediate:
+            # Final states (cancelled/expired) replace any pending count edit;
+            # one already being sent finishes first
+            self._final.add(message_id)
+            task = self._pending.pop(message_id, None)
+            if task:
+                task.cancel()
+            return await self._flush(message_id)
+
+        if message_id not in self._pending:
+            self._pending[message_id] = asyncio.create_task(self._flush_later(message_id))
+        return True
+
+    async def flush_all(self):
+        # Timers can fire while an earlier edit is awaited, so take them one
+        # at a time; anything still in _pending hasn't started its edit. A
+        # flood-limited edit puts itself back, so each message gets one try.
+        attempted = set()
+        while self._pending.keys() - attempted:
+            message_id = min(self._pending.keys() - attempted)
+            attempted.add(message_id)
+            self._pending.pop(message_id).cancel()
+            await self._flush(message_id)
+
+    async def _flush_later(self, message_id, delay=None):
+        try:
+            await asyncio.sleep(self.window if delay is None else delay)
+        except asyncio.CancelledError:
+            return
+        self._pending.pop(message_id, None)
+        await self._flush(message_id)
+
+    async def _flush(self, message_id):
+        lock = self._locks.setdefault(message_id, asyncio.Lock())
+        async with lock:
+            result = await self._edit(message_id)
+
+        if message_id in self._final and message_id not in self._pending and message_id not in self._desired:
+            self._forget(message_id)
+        return result
+
+    def _forget(self, message_id):
+        self._final.discard(message_id)
+        self._sent_hashes.pop(message_id, None)
+        lock = self._locks.get(message_id)
+        if lock is not None and not lock.locked():
+            del self._locks[message_id]
+
+    async def _edit(self, message_id):
+        desired = self._desired.pop(message_id, None)
+        if desired is None:
+            return True
+
+        text, reply_markup = desired
+        content_hash = self._content_hash(text, reply_markup)
+        if self._sent_hashes.get(message_id) == content_hash:
+            self.stats["skipped"] += 1
+            return True
+
+        try:
+            with background_priority():
+                await self.bot.edit_message_text(
+                    chat_id=self.channel,
+                    message_id=message_id,
+                    text=text,
+                    reply_markup=reply_markup
+                )
+            self._sent_hashes[message_id] = content_hash
+            self.stats["edits"] += 1
+            return True
+
+        except RetryAfter as e:
+            # The rate limiter has already retried, so hand the text back and
+            # let the next flush send whatever is newest by then, rather than
+            # waiting here and re-sending text a later submit may replace
+            self.stats["retries"] += 1
+            retry_after = e.retry_after.total_seconds() if hasattr(e.retry_after, "total_seconds") else e.retry_after
+            logger.warning("⏳ Flood limit on announcement %s, retrying in %ss", message_id, retry_after)
+            self._desired.setdefault(message_id, desired)
+            if message_id not in self._pending:
+                self._pending[message_id] = asyncio.create_task(self._flush_later(message_id, retry_after))
+            return True
+
+        except BadRequest as e:
+            if "message is not modified" in str(e).lower():
+                self._sent_hashes[message_id] = content_hash
+                self.stats["skipped"] += 1
+                return True
+            logger.error("❌ Couldn't edit announcement %s: %s", message_id, e)
+
+        except Exception as e:
+            logger.error("❌ Couldn't edit announcement %s: %s", message_id, e)
+
+        self.stats["failures"] += 1
+        return False
+
+    @staticmethod
+    def _content_hash(text, reply_markup):
+        markup = reply_markup.to_json() if reply_markup is not None else ""
+        return hashlib.sha1(f"{text}\x00{markup}".encode("utf-8")).hexdigest()
+
+
+def get_announcement_editor(context):
+    editor = context.bot_data.get('announcement_editor')
+    if editor is None:
+        editor = AnnouncementEditor(
+            context.bot,
+            os.getenv("ANNOUNCEMENT_CHANNEL"),
+            window=float(os.getenv("ANNOUNCEMENT_EDIT_WINDOW", "5"))
+        )
+        context.bot_data['announcement_editor'] = editor
+    return editor
@@ -1,22 +1,45 @@
 import os 
+import logging
 from dotenv import load_dotenv
-import firebase_admin
-from firebase_admin import credentials, firestore
-from ..utils import is_game_expired
+from datetime import timedelta
+from ..utils import is_game_expired, DateTimeHelper, lazy_import
 from telegram.ext import ContextTypes
+from .announcement_editor import get_announcement_editor
+from .write_buffer import WriteBehindBuffer
+from .metrics import DB_CALL_SECONDS, DB_CALL_ERRORS, instrument_methods
+from .firestore_costs import CountingClient, FIRESTORE_COSTS
 
 
 load_dotenv() 
 
+logger = logging.getLogger(__name__)
+
+# The Firebase SDK is imported when the database is first created
+firebase_admin = lazy_import("firebase_admin")
+credentials = lazy_import("firebase_admin.credentials")
+firestore = lazy_import("firebase_admin.firestore")
+
 FIREBASE_CREDENTIALS = os.getenv("FIREBASE_CREDENTIALS")
 
+# Fields rewritten many times in quick succession go through the write-behind buffer
+BUFFERED_GAME_FIELDS = {"player_count", "players_list", "reminder_24h_sent", "reminder_2h_sent", "announcement_msg_id"}
+
 class GameDatabase:
-    def __init__(self):
+    def __init__(self, cost_ledger=None):
         if not firebase_admin._apps:
             cred = credentials.Certificate(FIREBASE_CREDENTIALS)
             firebase_admin.initialize_app(cred)
-        self.db = firestore.client()
+        # Every document read and write is counted against its caller
+        self.cost_ledger = cost_ledger or FIRESTORE_COSTS
+        self.db = CountingClient(firestore.client(), self.cost_ledger)
         self.firestore = firestore  
+        self._last_full_sweep = None
+        self.write_buffer = WriteBehindBuffer(
+            self.db,
+            firestore,
+            max_pending=int(os.getenv("WRITE_BUFFER_MAX_PENDING", "50")),
+            flush_interval=float(os.getenv("WRITE_BUFFER_FLUSH_INTERVAL", "2"))
+        )
     
     def save_game(self, game_data):
         game_data["created_at"] = firestore.SERVER_TIMESTAMP 
@@ -26,88 +49,182 @@ class GameDatabase:
     
     def update_game(self, game_id, update_data):
         try:
-            game_ref = self.db.collection("game").document(game_id)
-            game_ref.update(update_data)
-            print(f"✅ Updated game {game_id}")
+            buffered = {field: value for field, value in update_data.items() if field in BUFFERED_GAME_FIELDS}
+            direct = {field: value for field, value in update_data.items() if field not in BUFFERED_GAME_FIELDS}
+
+            if direct:
+                game_ref = self.db.collection("game").document(game_id)
+                game_ref.update(direct)
+                logger.debug("✅ Updated game %s", game_id)
+            if buffered:
+                self.write_buffer.stage("game", game_id, buffered)
         except Exception as e:
-            print(f"❌ Error updating game {game_id}: {e}")
+            logger.error("❌ Error updating game %s: %s", game_id, e)
 
-    async def get_hosted_games(self, context, host_id):
-        # Clean up expired games 
-        await self.close_expired_games(context)
+    def update_games(self, updates):
+        # Writes several game updates in one batch commit
+        try:
+            batch = self.db.batch()
+            for game_id, update_data in updates.items():
+                batch.update(self.db.collection("game").document(game_id), update_data)
+            batch.commit()
+            logger.debug("✅ Updated %s games in one batch", len(updates))
+        except Exception as e:
+            logger.error("❌ Error updating %s games in batch: %s", len(updates), e)
+            for game_id, update_data in updates.items():
+                self.update_game(game_id, update_data)
+
+    def with_pending_writes(self, game_id, game_data):
+        return self.write_buffer.overlay("game", game_id, game_data)
 
+    def flush_writes(self):
+        try:
+            return self.write_buffer.flush()
+        except Exception as e:
+            logger.error("❌ Error flushing buffered writes: %s", e)
+            return 0
+
+    # Creation records are keyed by the draft's idempotency key. Errors are
+    # raised: carrying on without the record would repeat finished steps.
+    def get_creation_record(self, key):
+        try:
+            record_doc = self.db.collection("game_creation").document(key).get()
+            return record_doc.to_dict() if record_doc.exists else None
+        except Exception as e:
+            logger.error("❌ Error getting creation record %s: %s", key, e)
+            raise
+
+    def update_creation_record(self, key, update_data):
+        try:
+            record_ref = self.db.collection("game_creation").document(key)
+            record_ref.set({**update_data, "updated_at": firestore.SERVER_TIMESTAMP}, merge=True)
+        except Exception as e:
+            logger.error("❌ Error updating creation record %s: %s", key, e)
+            raise
+
+    async def get_hosted_games(self, context, host_id):
         games_ref = self.db.collection("game")
         # Use new filter syntax
         query = (games_ref
                 .where(filter=firestore.FieldFilter("host", "==", host_id))
                 .where(filter=firestore.FieldFilter("status", "==", "open")))
         results = query.stream()
-        return [{"id": game.id, **game.to_dict()} for game in results] 
+        games = [self.with_pending_writes(game.id, {"id": game.id, **game.to_dict()}) for game in results]
+        # Expiry timers close games at their end time; hide any not yet closed
+        return [game for game in games if not self.check_game_expired(game)]
 
     async def get_all_open_games(self):
         try:
             games_ref = self.db.collection("game")
             query = games_ref.where(filter=firestore.FieldFilter("status", "==", "open"))
             results = query.stream()
-            return [{"id": game.id, **game.to_dict()} for game in results]
+            return [self.with_pending_writes(game.id, {"id": game.id, **game.to_dict()}) for game in results]
+        except Exception as e:
+            logger.error("❌ Error getting all open games: %s", e)
+            return []
+
+    async def expire_games(self, context, game_ids):
+        # Called by expiry timers, so only the due games are read
+        try:
+            games_ref = self.db.collection("game")
+            game_docs = [doc for doc in self.db.get_all([games_ref.document(game_id) for game_id in game_ids]) if doc.exists]
+            return await self._close_expired_docs(context, game_docs)
         except Exception as e:
-            print(f"❌ Error getting all open games: {e}")
+            logger.error("❌ Error expiring %s games: %s", len(game_ids), e)
             return []
     
     async def close_expired_games(self, context: ContextTypes.DEFAULT_TYPE): 
+        # Safety sweep for games whose expiry timer was missed. Usually only
+        # games that ended within the lookback window are read; about once a
+        # day every open game is, which also catches games without end_at
+        # and games missed for longer than the lookback.
         try: 
+            now = DateTimeHelper.get_current_singapore_time()
+            lookback = timedelta(hours=float(os.getenv("EXPIRY_SWEEP_LOOKBACK_HOURS", "48")))
+            full_sweep_every = timedelta(hours=float(os.getenv("EXPIRY_FULL_SWEEP_HOURS", "24")))
+
             games_ref = self.db.collection("game")
-            # Use new filter syntax
-            query = games_ref.where(filter=firestore.FieldFilter("status", "==", "open"))
-            results = query.stream()
+            if self._last_full_sweep is None or now - self._last_full_sweep >= full_sweep_every:
+                query = games_ref.where(filter=firestore.FieldFilter("status", "==", "open"))
+                game_docs = list(query.stream())
+                self._backfill_end_at(game_docs)
+                self._last_full_sweep = now
+            else:
+                query = (games_ref
+                        .where(filter=firestore.FieldFilter("end_at", ">=", now - lookback))
+                        .where(filter=firestore.FieldFilter("end_at", "<=", now)))
+                game_docs = list(query.stream())
 
-            expired_count = 0
-            processed_count = 0
+            closed_games = await self._close_expired_docs(context, game_docs)
+            if game_docs:
+                logger.info("📊 Processed %s games, closed %s expired games", len(game_docs), len(closed_games))
             
-            for game_doc in results:
-                processed_count += 1
-                game_data = game_doc.to_dict()
-                game_id = game_doc.id
-                
-                # Validate game data before checking expiration
-                if not self._validate_game_data(game_data, game_id):
-                    continue
-                
-                if self.check_game_expired(game_data):
-                    try:
-                        game_doc.reference.update({
-                            "status": "closed",
-                            "closed_at": firestore.SERVER_TIMESTAMP,
-                            "closure_reason": "expired"
-                        })
-
-                        # Update announcement if exists
-                        announcement_msg_id = game_data.get("announcement_msg_id")
-                        if announcement_msg_id and context:
-                            await self._update_expired_announcement(context, game_data, announcement_msg_id)
-
-                        expired_count += 1
-                        print(f"🔒 Closed expired game: {game_data.get('sport', 'Unknown')} on {game_data.get('date', 'Unknown')}")
-                    
-                    except Exception as e:
-                        print(f"❌ Error closing game {game_id}: {e}")
-                        continue
-            
-            if processed_count > 0:
-                print(f"📊 Processed {processed_count} games, closed {expired_count} expired games")
-            
-            return expired_count
+            return len(closed_games)
             
         except Exception as e:
-            print(f"❌ Error in close_expired_games: {e}")
+            logger.error("❌ Error in close_expired_games: %s", e)
             return 0
 
+    def _backfill_end_at(self, game_docs):
+        # Games created before end_at existed get it once, so the hourly
+        # range query finds them from then on
+        backfilled = 0
+        for game_doc in game_docs:
+            game_data = game_doc.to_dict()
+            if game_data.get("end_at") or not self._validate_game_data(game_data, game_doc.id):
+                continue
+            end_at = DateTimeHelper.parse_game_datetime(game_data["date"], game_data["end_time_24"])
+            if end_at is None:
+                continue
+            try:
+                game_doc.reference.update({"end_at": end_at})
+                backfilled += 1
+            except Exception as e:
+                logger.warning("⚠️ Couldn't backfill end_at for game %s: %s", game_doc.id, e)
+        if backfilled:
+            logger.info("🗓 Backfilled end_at for %s games", backfilled)
+
+    async def _close_expired_docs(self, context, game_docs):
+        closed_games = []
+        for game_doc in game_docs:
+            game_id = game_doc.id
+            game_data = self.with_pending_writes(game_id, game_doc.to_dict())
+
+            if game_data.get("status") != "open":
+                continue
+            
+            # Validate game data before checking expiration
+            if not self._validate_game_data(game_data, game_id):
+                continue
+            
+            if self.check_game_expired(game_data):
+                try:
+                    game_doc.reference.update({
+                        "status": "closed",
+                        "closed_at": firestore.SERVER_TIMESTAMP,
+                        "closure_reason": "expired"
+                    })
+
+                    # Update announcement if exists
+                    announcement_msg_id = game_data.get("announcement_msg_id")
+                    if announcement_msg_id and context:
+                        await self._update_expired_announcement(context, game_data, announcement_msg_id)
+
+                    closed_games.append({"id": game_id, **game_data})
+                    logger.info("🔒 Closed expired game: %s on %s", game_data.get('sport', 'Unknown'), game_data.get('date', 'Unknown'))
+                
+                except Exception as e:
+                    logger.error("❌ Error closing game %s: %s", game_id, e)
+                    continue
+
+        return closed_games
+
     def _validate_game_data(self, game_data, game_id):
         required_fields = ['date', 'end_time_24']
         
         for field in required_fields:
             if not game_data.get(field):
-                print(f"⚠️ Game {game_id} missing required field for expiration check: {field}")
+                logger.warning("⚠️ Game %s missing required field for expiration check: %s", game_id, field)
                 return False
         
         return True
@@ -116,19 +233,16 @@ class GameDatabase:
         try:
             ANNOUNCEMENT_CHANNEL = os.getenv("ANNOUNCEMENT_CHANNEL")
             if not ANNOUNCEMENT_CHANNEL:
-                print("⚠️ No announcement channel configured")
+                logger.warning("⚠️ No announcement channel configured")
                 return
                 
-            await context.bot.edit_message_text(
-                chat_id=ANNOUNCEMENT_CHANNEL,
-                message_id=announcement_msg_id,
-                text=f"❌ EXPIRED: {game_data.get('sport', 'Unknown')} Game at {game_data.get('venue', 'Unknown')} on {game_data.get('time_display', 'Unknown')}",
-                reply_markup=None  # Remove join button
-            )
-            print(f"✅ Updated expired announcement for message {announcement_msg_id}")
+            # Reply markup is dropped to remove the join button
+            expired_text = f"❌ EXPIRED: {game_data.get('sport', 'Unknown')} Game at {game_data.get('venue', 'Unknown')} on {game_data.get('time_display', 'Unknown')}"
+            if await get_announcement_editor(context).submit(announcement_msg_id, expired_text, immediate=True):
+                logger.info("✅ Updated expired announcement for message %s", announcement_msg_id)
             
         except Exception as e:
-            print(f"⚠️ Couldn't update announcement {announcement_msg_id}: {e}")
+            logger.warning("⚠️ Couldn't update announcement %s: %s", announcement_msg_id, e)
 
     def check_game_expired(self, game_data):
         try:
@@ -137,13 +251,13 @@ class GameDatabase:
             
             # Validate required fields
             if not date_str or not end_time_24:
-                print(f"⚠️ Missing expiration data: date={date_str}, end_time={end_time_24}")
+                logger.warning("⚠️ Missing expiration data: date=%s, end_time=%s", date_str, end_time_24)
                 return False
             
             return is_game_expired(date_str, end_time_24)
         
         except Exception as e:
-            print(f"❌ Error checking game expiration: {e}")
+            logger.error("❌ Error checking game expiration: %s", e)
             return False
 
     # To update status 
@@ -154,7 +268,7 @@ class GameDatabase:
             game_doc = game_ref.get()
             
             if game_doc.exists:
-                game_data = game_doc.to_dict()
+                game_data = self.with_pending_writes(game_id, game_doc.to_dict())
                 announcement_msg_id = game_data.get("announcement_msg_id")
                 
                 # Update the game status to cancelled
@@ -163,13 +277,16 @@ class GameDatabase:
                     "cancelled_at": firestore.SERVER_TIMESTAMP
                 })
                 
-                print(f"✅ Cancelled game {game_id}")
+                logger.info("✅ Cancelled game %s", game_id)
                 return announcement_msg_id 
             else:
-                print(f"⚠️ Game {game_id} not found")
+                logger.warning("⚠️ Game %s not found", game_id)
                 return None
             
         except Exception as e:
-            print(f"❌ Error cancelling game {game_id}: {e}")
+            logger.error("❌ Error cancelling game %s: %s", game_id, e)
             return None
-    
\ No newline at end of file
+
+
+# Every public data-layer method reports its latency and failures
+instrument_methods(GameDatabase, DB_CALL_SECONDS, DB_CALL_ERRORS)
@@ -0,0 +1,52 @@
+import logging
+from ..utils import DateTimeHelper
+
+logger = logging.getLogger(__name__)
+
+EXPIRY_KIND = "expiry"
+
+
+class ExpiryService:
+    # Closes each game at its end time from a timer in the reminder engine,
+    # so expired games leave discovery and member sync within seconds
+
+    def __init__(self, db, engine):
+        self.db = db
+        self.engine = engine
+        engine.register(EXPIRY_KIND, self._expire_due)
+
+    def schedule_game_expiry(self, game_data, game_id):
+        game_end = DateTimeHelper.parse_game_datetime(game_data.get('date'), game_data.get('end_time_24'))
+        if game_end is None:
+            logger.warning("⚠️ Could not schedule expiry for game %s", game_id)
+            return False
+
+        self.engine.schedule(game_id, EXPIRY_KIND, game_end.timestamp())
+        return True
+
+    def cancel_game_expiry(self, game_id):
+        self.engine.cancel(game_id, EXPIRY_KIND)
+
+    async def schedule_all_existing(self, context):
+        if self.engine.is_bootstrapped(EXPIRY_KIND):
+            logger.info("📋 Expiry timers restored from local store, skipping Firestore scan")
+            return
+
+        self.schedule_for_games(await self.db.get_all_open_games())
+
+    def schedule_for_games(self, games):
+        # Games that have already ended get a timer that fires straight away
+        scheduled = sum(1 for game_data in games if self.schedule_game_expiry(game_data, game_data['id']))
+        self.engine.mark_bootstrapped(EXPIRY_KIND)
+        logger.info("✅ Scheduled expiry for %s existing games", scheduled)
+
+    async def _expire_due(self, context, entries):
+        closed_games = await self.db.expire_games(context, [game_id for game_id, _ in entries])
+
+        scheduler = context.bot_data.get('member_sync_scheduler')
+        ledger = context.bot_data.get('membership_ledger')
+        for game_data in closed_games:
+            if scheduler:
+                scheduler.untrack(game_data['id'])
+            if ledger and game_data.get('group_id'):
+                ledger.forget(game_data['group_id'])
@@ -0,0 +1,286 @@
+import time
+from collections import OrderedDict, deque
+from ..utils.structured_logging import current_log_context
+from .metrics import REGISTRY
+from .tracing import TRACER
+
+OPERATIONS = ("reads", "writes", "deletes")
+
+FIRESTORE_DOCUMENTS = REGISTRY.counter(
+    "bot_firestore_documents_total", "Firestore documents read, written and deleted", ["op", "source"]
+)
+
+
+def _empty():
+    return dict.fromkeys(OPERATIONS, 0)
+
+
+class FirestoreCostLedger:
+    # Counts billed document operations and attributes them to the handler,
+    # job or timer that caused them (taken from the log context). Keeps
+    # totals since start, hourly buckets for a rolling window and the most
+    # recent updates individually.
+
+    def __init__(self, window_hours=24, recent_updates=500, clock=time.time):
+        self.window_hours = window_hours
+        self.clock = clock
+        self.started_at = clock()
+        self.totals = {}
+        self._hours = deque()
+        self._minutes = deque()
+        self._updates = OrderedDict()
+        self._recent_updates = recent_updates
+
+    @staticmethod
+    def current_source():
+        context = current_log_context()
+        return context.get("handler") or "unattributed", context.get("update_id")
+
+    def record(self, op, count=1):
+        if count <= 0:
+            return
+        source, update_id = self.current_source()
+
+        self.totals.setdefault(source, _empty())[op] += count
+        self._hour_bucket()[1].setdefault(source, _empty())[op] += count
+        self._minute_bucket()[1][op] += count
+        FIRESTORE_DOCUMENTS.inc(count, op=op, source=source)
+
+        if update_id is not None:
+            entry = self._updates.get(update_id)
+            if entry is None:
+                entry = self._updates[update_id] = {"source": source, **_empty()}
+                if len(self._updates) > self._recent_updates:
+                    self._updates.popitem(last=False)
+            entry[op] += count
+
+    def _hour_bucket(self):
+        hour = int(self.clock() // 3600)
+        if not self._hours or self._hours[-1][0] != hour:
+            self._hours.append((hour, {}))
+        while self._hours and self._hours[0][0] <= hour - self.window_hours:
+            self._hours.popleft()
+        return self._hours[-1]
+
+    def _minute_bucket(self):
+        minute = int(self.clock() // 60)
+        if not self._minutes or self._minutes[-1][0] != minute:
+            self._minutes.append((minute, _empty()))
+        while self._minutes and self._minutes[0][0] <= minute - 60:
+            self._minutes.popleft()
+        return self._minutes[-1]
+
+    def recent(self, minutes=60):
+        # Totals over the last `minutes` (up to an hour), across all sources
+        since = int(self.clock() // 60) - min(minutes, 60)
+        totals = _empty()
+        for minute, counts in self._minutes:
+            if minute > since:
+                for op in OPERATIONS:
+                    totals[op] += counts[op]
+        return totals
+
+    def rolling(self):
+        self._hour_bucket()
+        totals = {}
+        for _, sources in self._hours:
+            for source, counts in sources.items():
+                merged = totals.setdefault(source, _empty())
+                for op in OPERATIONS:
+                    merged[op] += counts[op]
+        return totals
+
+    def update_cost(self, update_id):
+        return self._updates.get(update_id)
+
+    @staticmethod
+    def top(totals, limit=10, op="reads"):
+        return sorted(totals.items(), key=lambda item: (item[1][op], sum(item[1].values())), reverse=True)[:limit]
+
+    def top_updates(self, limit=5, op="reads"):
+        return sorted(self._updates.items(), key=lambda item: item[1][op], reverse=True)[:limit]
+
+    def report(self, limit=10):
+        rolling = self.rolling()
+        lines = [f"📊 Firestore usage, last {self.window_hours}h"]
+        grand = _empty()
+        for counts in rolling.values():
+            for op in OPERATIONS:
+                grand[op] += counts[op]
+        lines.append(f"Total: {grand['reads']} reads, {grand['writes']} writes, {grand['deletes']} deletes")
+
+        if rolling:
+            lines.append("")
+            lines.append("Top sources by reads:")
+            for source, counts in self.top(rolling, limit):
+                lines.append(f"• {source}: {counts['reads']} reads, {counts['writes']} writes, {counts['deletes']} deletes")
+
+        top_updates = [(update_id, entry) for update_id, entry in self.top_updates() if entry["reads"]]
+        if top_updates:
+            lines.append("")
+            lines.append("Most expensive recent updates:")
+            for update_id, entry in top_updates:
+                lines.append(f"• update {update_id} ({entry['source']}): {entry['reads']} reads")
+        return "\n".join(lines)
+
+
+FIRESTORE_COSTS = FirestoreCostLedger()
+
+
+def _unwrap(value):
+    return value._target if isinstance(value, _Counted) else value
+
+
+class _Counted:
+    # Base for the proxies; anything not overridden is passed through
+
+    def __init__(self, target, ledger):
+        self._target = target
+        self._ledger = ledger
+
+    def __getattr__(self, name):
+        return getattr(self._target, name)
+
+    def __eq__(self, other):
+        return self._target == _unwrap(other)
+
+    def __hash__(self):
+        return hash(self._target)
+
+    def _path(self):
+        path = getattr(self._target, "path", None)
+        if path is None:
+            # Queries keep their collection as the parent
+            parent = getattr(self._target, "_parent", self._target)
+            path = getattr(parent, "id", "")
+        return str(path)
+
+    def _call(self, name, op, func, *args, **kwargs):
+        if TRACER.enabled:
+            with TRACER.span(f"firestore.{name}", root=False, path=self._path()):
+                result = func(*args, **kwargs)
+        else:
+            result = func(*args, **kwargs)
+        self._ledger.record(op)
+        return result
+
+    def _stream(self, name, snapshots):
+        # Reads are counted as the caller consumes them; the span covers the
+        # whole iteration and is recorded once it ends
+        started = time.time_ns()
+        count = 0
+        try:
+            for snapshot in snapshots:
+                self._ledger.record("reads")
+                count += 1
+                yield CountingSnapshot(snapshot, self._ledger)
+        finally:
+            if TRACER.enabled:
+                TRACER.record(f"firestore.{name}", started, time.time_ns(), path=self._path(), documents=count)
+
+
+class CountingSnapshot(_Counted):
+    @property
+    def reference(self):
+        return CountingDocument(self._target.reference, self._ledger)
+
+
+class CountingDocument(_Counted):
+
+    def get(self, *args, **kwargs):
+        return self._call("get", "reads", self._target.get, *args, **kwargs)
+
+    def set(self, *args, **kwargs):
+        return self._call("set", "writes", self._target.set, *args, **kwargs)
+
+    def create(self, *args, **kwargs):
+        return self._call("create", "writes", self._target.create, *args, **kwargs)
+
+    def update(self, *args, **kwargs):
+        return self._call("update", "writes", self._target.update, *args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        return self._call("delete", "deletes", self._target.delete, *args, **kwargs)
+
+    def collection(self, *args, **kwargs):
+        return CountingQuery(self._target.collection(*args, **kwargs), self._ledger)
+
+
+class CountingQuery(_Counted):
+    # Wraps collection references and queries; every refinement returns
+    # another counting query and results are counted as they are read
+    REFINEMENTS = {
+        "where", "order_by", "limit", "limit_to_last", "offset", "select",
+        "start_at", "start_after", "end_at", "end_before"
+    }
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if name in self.REFINEMENTS:
+            return lambda *args, **kwargs: CountingQuery(attr(*args, **kwargs), self._ledger)
+        return attr
+
+    def document(self, *args, **kwargs):
+        return CountingDocument(self._target.document(*args, **kwargs), self._ledger)
+
+    def add(self, *args, **kwargs):
+        return self._call("add", "writes", self._target.add, *args, **kwargs)
+
+    def stream(self, *args, **kwargs):
+        return self._stream("stream", self._target.stream(*args, **kwargs))
+
+    def get(self, *args, **kwargs):
+        started = time.time_ns()
+        snapshots = self._target.get(*args, **kwargs)
+        if TRACER.enabled:
+            TRACER.record("firestore.query", started, time.time_ns(), path=self._path(), documents=len(snapshots))
+        # Queries that match nothing are still billed one read
+        self._ledger.record("reads", max(1, len(snapshots)))
+        return [CountingSnapshot(snapshot, self._ledger) for snapshot in snapshots]
+
+
+class CountingBatch(_Counted):
+
+    def __init__(self, target, ledger):
+        super().__init__(target, ledger)
+        self._pending = _empty()
+
+    def set(self, reference, *args, **kwargs):
+        self._pending["writes"] += 1
+        return self._target.set(_unwrap(reference), *args, **kwargs)
+
+    def create(self, reference, *args, **kwargs):
+        self._pending["writes"] += 1
+        return self._target.create(_unwrap(reference), *args, **kwargs)
+
+    def update(self, reference, *args, **kwargs):
+        self._pending["writes"] += 1
+        return self._target.update(_unwrap(reference), *args, **kwargs)
+
+    def delete(self, reference, *args, **kwargs):
+        self._pending["deletes"] += 1
+        return self._target.delete(_unwrap(reference), *args, **kwargs)
+
+    def commit(self, *args, **kwargs):
+        pending, self._pending = self._pending, _empty()
+        with TRACER.span("firestore.batch_commit", root=False, writes=pending["writes"], deletes=pending["deletes"]):
+            result = self._target.commit(*args, **kwargs)
+        for op, count in pending.items():
+            self._ledger.record(op, count)
+        return result
+
+
+class CountingClient(_Counted):
+    # Drop-in stand-in for the Firestore client used by GameDatabase
+
+    def collection(self, *args, **kwargs):
+        return CountingQuery(self._target.collection(*args, **kwargs), self._ledger)
+
+    def document(self, *args, **kwargs):
+        return CountingDocument(self._target.document(*args, **kwargs), self._ledger)
+
+    def batch(self, *args, **kwargs):
+        return CountingBatch(self._target.batch(*args, **kwargs), self._ledger)
+
+    def get_all(self, references, *args, **kwargs):
+        return self._stream("get_all", self._target.get_all([_unwrap(reference) for reference in references], *args, **kwargs))
@@ -0,0 +1,46 @@
+import asyncio
+import logging
+import uuid
+
+logger = logging.getLogger(__name__)
+
+
+class GameCreationService:
+    # Persists each creation step under the draft's idempotency key so that a
+    # repeated confirm resumes (or returns) the existing creation instead of
+    # creating a second group and announcement.
+
+    def __init__(self, db):
+        self.db = db
+        self._in_flight = {}
+
+    @staticmethod
+    def new_key():
+        return uuid.uuid4().hex
+
+    @property
+    def in_flight_count(self):
+        return len(self._in_flight)
+
+    def is_in_flight(self, key):
+        return key in self._in_flight
+
+    async def run(self, key, operation):
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(operation())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            logger.info("🔁 Creation %s already in progress, attaching to it", key)
+
+        # Shield so a cancelled duplicate confirm doesn't cancel the original creation
+        return await asyncio.shield(task)
+
+    def load(self, key):
+        return self.db.get_creation_record(key) or {}
+
+    def record(self, key, record, **fields):
+        record.update(fields)
+        self.db.update_creation_record(key, fields)
+        return record
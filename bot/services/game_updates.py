@@ -0,0 +1,48 @@
+import asyncio
+import contextvars
+
+
+class GameUpdateQueue:
+    # One worker per game applies that game's updates in arrival order.
+    # Events that queue up while a write is in flight are handed to the
+    # next apply call together, so a join burst becomes a single write.
+    # Different games never wait on each other.
+
+    def __init__(self, apply_batch):
+        self.apply_batch = apply_batch
+        self._pending = {}
+        self._workers = {}
+        self.stats = {"events": 0, "batches": 0}
+
+    @property
+    def busy_count(self):
+        return len(self._workers)
+
+    async def submit(self, game_id, event):
+        future = asyncio.get_running_loop().create_future()
+        self._pending.setdefault(game_id, []).append((event, future))
+        self.stats["events"] += 1
+
+        if game_id not in self._workers:
+            # The worker serves many updates, so it starts from a clean context
+            # rather than inheriting the first submitter's log fields
+            self._workers[game_id] = asyncio.create_task(self._run(game_id), context=contextvars.Context())
+        return await future
+
+    async def _run(self, game_id):
+        try:
+            while self._pending.get(game_id):
+                batch = self._pending.pop(game_id)
+                self.stats["batches"] += 1
+                try:
+                    result = await self.apply_batch(game_id, [event for event, _ in batch])
+                except Exception as e:
+                    for _, future in batch:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+                for _, future in batch:
+                    if not future.done():
+                        future.set_result(result)
+        finally:
+            self._workers.pop(game_id, None)
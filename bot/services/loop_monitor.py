@@ -0,0 +1,129 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from .metrics import EVENT_LOOP_LAG_SECONDS, SLOW_CALLBACKS
+
+logger = logging.getLogger(__name__)
+
+# Frames from these files are skipped when naming the blocking code
+_INFRASTRUCTURE = tuple(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), name)
+    for name in ("metrics.py", "profiler.py", "tracing.py", "firestore_costs.py", "loop_monitor.py")
+)
+_BOT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class LoopLagMonitor:
+    # Sleeps for a fixed interval and measures how late it wakes up. The
+    # overshoot is how long ready callbacks were kept waiting by whatever
+    # held the loop.
+    #
+    # A watchdog thread checks the heartbeat. Once the loop has been stuck
+    # for `threshold`, it snapshots the loop thread's stack, which is still
+    # inside the blocking call. The report is logged when the loop wakes up
+    # and the full stall is known, or straight away if it stays stuck.
+
+    def __init__(self, interval=0.1, threshold=0.25, stuck_after=10.0, stack_depth=12):
+        self.interval = interval
+        self.threshold = threshold
+        self.stuck_after = stuck_after
+        self.stack_depth = stack_depth
+        self.last_lag = 0.0
+        self.slow_callbacks = 0
+        self._task = None
+        self._beat = None
+        self._capture = None
+        self._reported_stuck = False
+        self._loop_thread_id = None
+        self._watchdog = None
+        self._stop = threading.Event()
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._loop_thread_id = threading.get_ident()
+            self._beat = time.monotonic()
+            self._task = asyncio.create_task(self._run())
+        if self.threshold and (self._watchdog is None or not self._watchdog.is_alive()):
+            self._stop.clear()
+            self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+            self._watchdog.start()
+
+    async def stop(self):
+        self._stop.set()
+        self._watchdog = None
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            beat = self._beat = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self.last_lag = max(0.0, loop.time() - started - self.interval)
+            EVENT_LOOP_LAG_SECONDS.observe(self.last_lag)
+
+            capture, self._capture = self._capture, None
+            self._reported_stuck = False
+            if self.threshold and self.last_lag >= self.threshold:
+                # A capture taken against an older heartbeat belongs to a stall
+                # that was already reported
+                self._report(self.last_lag, capture[1] if capture and capture[0] == beat else None)
+
+    def _watch(self):
+        while not self._stop.wait(self.threshold / 2):
+            beat = self._beat
+            stalled = time.monotonic() - beat - self.interval
+            if stalled < self.threshold:
+                continue
+            if self._capture is None or self._capture[0] != beat:
+                self._capture = (beat, self.capture())
+            if stalled >= self.stuck_after and not self._reported_stuck and self._capture[1]:
+                self._reported_stuck = True
+                handler, location, stack = self._capture[1]
+                logger.error(
+                    "🧱 Event loop stuck for %.1fs in %s (%s)\n%s", stalled, handler, location, stack
+                )
+
+    def capture(self):
+        # Runs on the watchdog thread while the loop thread is blocked
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return None
+        handler = None
+        location = None
+        walker = frame
+        while walker is not None:
+            code = walker.f_code
+            if code.co_filename in _INFRASTRUCTURE:
+                # The metrics wrapper holds the handler name as a closure variable
+                source = walker.f_locals.get("source") if code.co_name == "wrapper" else None
+                handler = source or handler
+            elif location is None and code.co_filename.startswith(_BOT_ROOT):
+                module = os.path.splitext(os.path.relpath(code.co_filename, _BOT_ROOT))[0].replace(os.sep, ".")
+                location = f"{module}.{code.co_name}:{walker.f_lineno}"
+            walker = walker.f_back
+        stack = "".join(traceback.format_stack(frame, limit=self.stack_depth))
+        return handler or "unknown", location or "outside bot code", stack
+
+    def _report(self, lag, capture):
+        self.slow_callbacks += 1
+        if capture is None:
+            # Too short for the watchdog to catch it mid-stall
+            SLOW_CALLBACKS.inc(handler="unknown")
+            logger.warning("🐢 Slow callback: event loop blocked for %.0fms", lag * 1000)
+            return
+        handler, location, stack = capture
+        SLOW_CALLBACKS.inc(handler=handler)
+        logger.warning(
+            "🐢 Slow callback: event loop blocked for %.0fms in %s (%s)\n%s", lag * 1000, handler, location, stack
+        )
@@ -0,0 +1,128 @@
+import heapq
+import itertools
+import time
+from ..utils import DateTimeHelper
+
+
+class MemberSyncScheduler:
+    # Gives every open game its own next reconciliation time and hands out
+    # due games within a global Bot API call budget.
+
+    STARTING_SOON_INTERVAL = 120
+    ACTIVE_INTERVAL = 180
+    TODAY_INTERVAL = 600
+    SOON_INTERVAL = 1800
+    QUIET_INTERVAL = 7200
+
+    ACTIVITY_WINDOW = 600
+
+    def __init__(self, calls_per_second=3.0, calls_per_game=1, refresh_interval=1800, burst_seconds=10):
+        self.calls_per_second = calls_per_second
+        self.calls_per_game = calls_per_game
+        self.refresh_interval = refresh_interval
+        self.capacity = max(calls_per_game, calls_per_second * burst_seconds)
+
+        self._heap = []
+        self._due = {}
+        self._games = {}
+        self._activity = {}
+        self._seq = itertools.count()
+        self._tokens = self.capacity
+        self._tokens_at = None
+        self._last_refresh = None
+
+    def __len__(self):
+        return len(self._games)
+
+    def needs_refresh(self, now):
+        return self._last_refresh is None or now - self._last_refresh >= self.refresh_interval
+
+    def refresh(self, games, now):
+        # Replace the tracked set with a fresh listing of open games,
+        # keeping existing check times for games we already know
+        open_ids = set()
+        for game_data in games:
+            if not game_data.get('group_id'):
+                continue
+            open_ids.add(game_data['id'])
+            if game_data['id'] in self._games:
+                self._games[game_data['id']] = game_data
+            else:
+                self.track(game_data, now, due=now)
+
+        for game_id in list(self._games):
+            if game_id not in open_ids:
+                self.untrack(game_id)
+
+        self._last_refresh = now
+
+    def track(self, game_data, now, due=None):
+        game_id = game_data['id']
+        self._games[game_id] = game_data
+        if due is None:
+            due = now + self.next_interval(game_id)
+        self._schedule(game_id, due)
+
+    def untrack(self, game_id):
+        self._games.pop(game_id, None)
+        self._due.pop(game_id, None)
+        self._activity.pop(game_id, None)
+
+    def note_activity(self, game_data, now):
+        # Recent joins/leaves pull the next check forward
+        game_id = game_data['id']
+        self._activity[game_id] = now
+        self._games[game_id] = game_data
+        due = now + self.ACTIVE_INTERVAL
+        if self._due.get(game_id) is None or due < self._due[game_id]:
+            self._schedule(game_id, due)
+
+    def reschedule(self, game_id, now):
+        if game_id in self._games:
+            self._schedule(game_id, now + self.next_interval(game_id, now))
+
+    def next_interval(self, game_id, now=None):
+        game_data = self._games.get(game_id, {})
+        last_activity = self._activity.get(game_id)
+        if now is not None and last_activity is not None and now - last_activity < self.ACTIVITY_WINDOW:
+            return self.ACTIVE_INTERVAL
+
+        start = DateTimeHelper.parse_game_datetime(game_data.get('date'), game_data.get('start_time_24'))
+        if start is None:
+            return self.SOON_INTERVAL
+
+        seconds_to_start = (start - DateTimeHelper.get_current_singapore_time()).total_seconds()
+        if seconds_to_start < 3 * 3600:
+            return self.STARTING_SOON_INTERVAL
+        if seconds_to_start < 24 * 3600:
+            return self.TODAY_INTERVAL
+        if seconds_to_start < 72 * 3600:
+            return self.SOON_INTERVAL
+        return self.QUIET_INTERVAL
+
+    def pop_due(self, now):
+        self._refill(now)
+
+        due_games = []
+        while self._heap and self._heap[0][0] <= now and self._tokens >= self.calls_per_game:
+            due, _, game_id = heapq.heappop(self._heap)
+            # Skip entries superseded by a later reschedule or untrack
+            if self._due.get(game_id) != due:
+                continue
+            del self._due[game_id]
+            self._tokens -= self.calls_per_game
+            due_games.append(self._games[game_id])
+        return due_games
+
+    def _refill(self, now):
+        if self._tokens_at is not None:
+            self._tokens = min(self.capacity, self._tokens + (now - self._tokens_at) * self.calls_per_second)
+        self._tokens_at = now
+
+    def _schedule(self, game_id, due):
+        self._due[game_id] = due
+        heapq.heappush(self._heap, (due, next(self._seq), game_id))
+
+    @staticmethod
+    def now():
+        return time.monotonic()
@@ -0,0 +1,120 @@
+from datetime import datetime, timezone
+
+
+class MembershipLedger:
+    # Tracks who is in each game group, keyed by (group_id, user_id).
+    # The host is always counted and never stored. Members who joined before
+    # the ledger existed are kept as an "untracked" count seeded from the
+    # stored player_count, so legacy games stay correct. When Telegram counts
+    # fewer members than we know by name, the difference is kept as "excess":
+    # some of those names have left without us seeing it. Members the last
+    # reconciliation added to untracked may just be joins still in flight,
+    # so those joins are counted once ("unseen_joins").
+
+    def __init__(self):
+        self._games = {}
+
+    @property
+    def loaded_count(self):
+        return len(self._games)
+
+    def is_loaded(self, group_id):
+        return str(group_id) in self._games
+
+    def load(self, group_id, game_data):
+        group_id = str(group_id)
+        if group_id in self._games:
+            return
+
+        players = [int(user_id) for user_id in game_data.get('players_list', []) or []]
+        stored_count = game_data.get('player_count', 1) or 1
+
+        self._games[group_id] = {
+            'members': {user_id: (True, None) for user_id in players},
+            'untracked': max(0, stored_count - 1 - len(players)),
+            'excess': max(0, 1 + len(players) - stored_count),
+            'unseen_joins': 0,
+            'last_event_at': None
+        }
+
+    def forget(self, group_id):
+        self._games.pop(str(group_id), None)
+
+    def apply(self, group_id, user_id, is_member, event_time=None):
+        # Returns True if the event changed the membership
+        game = self._games.setdefault(
+            str(group_id), {'members': {}, 'untracked': 0, 'excess': 0, 'unseen_joins': 0, 'last_event_at': None}
+        )
+        user_id = int(user_id)
+        event_time = event_time if isinstance(event_time, datetime) else None
+
+        previous = game['members'].get(user_id)
+        if previous:
+            was_member, last_time = previous
+            # Out-of-order delivery: an older event never overrides a newer one
+            if event_time and last_time and event_time < last_time:
+                return False
+            # Duplicate delivery (e.g. service message and chat_member update)
+            if was_member == is_member:
+                if event_time:
+                    game['members'][user_id] = (was_member, max(event_time, last_time or event_time))
+                return False
+        elif not is_member:
+            game['members'][user_id] = (False, event_time)
+            # A leave from someone we never saw join must be an untracked member
+            if game['untracked'] > 0:
+                game['untracked'] -= 1
+                game['unseen_joins'] = min(game['unseen_joins'], game['untracked'])
+                self._touch(game, event_time)
+                return True
+            return False
+
+        if previous and not is_member and game['excess'] > 0:
+            # Most likely one of the leaves reconciliation already counted
+            game['excess'] -= 1
+        elif not previous and is_member and game['unseen_joins'] > 0:
+            game['unseen_joins'] -= 1
+            game['untracked'] -= 1
+        game['members'][user_id] = (is_member, event_time)
+        self._touch(game, event_time)
+        return True
+
+    def _touch(self, game, event_time):
+        game['last_event_at'] = event_time or datetime.now(timezone.utc)
+
+    def count(self, group_id):
+        game = self._games.get(str(group_id))
+        if not game:
+            return 1
+        present = sum(1 for is_member, _ in game['members'].values() if is_member)
+        return max(1, 1 + game['untracked'] + present - game['excess'])
+
+    def members(self, group_id):
+        game = self._games.get(str(group_id))
+        if not game:
+            return []
+        return sorted(user_id for user_id, (is_member, _) in game['members'].items() if is_member)
+
+    def last_event_at(self, group_id):
+        game = self._games.get(str(group_id))
+        return game['last_event_at'] if game else None
+
+    def reconcile(self, group_id, actual_count):
+        # Telegram's count is authoritative for members we have never seen;
+        # returns True if the derived count changed
+        game = self._games.get(str(group_id))
+        if not game:
+            return False
+        present = sum(1 for is_member, _ in game['members'].values() if is_member)
+        # Fewer members than we know by name means missed (or not yet
+        # delivered) leaves; we can't tell whose, so the names stay and the
+        # count is clamped to Telegram's
+        untracked = max(0, actual_count - 1 - present)
+        excess = max(0, 1 + present - actual_count)
+        # Joins in flight at the previous reconciliation have arrived by now
+        game['unseen_joins'] = max(0, untracked - game['untracked'])
+        if (untracked, excess) == (game['untracked'], game['excess']):
+            return False
+        game['untracked'] = untracked
+        game['excess'] = excess
+        return True
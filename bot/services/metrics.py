@@ -0,0 +1,414 @@
+import asyncio
+import bisect
+import functools
+import inspect
+import logging
+import random
+import time
+from collections import deque
+from contextlib import contextmanager
+from ..utils.structured_logging import log_context
+from .tracing import TRACER
+from .profiler import PROFILER
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _label_key(labelnames, labels):
+    return tuple(str(labels.get(name, "")) for name in labelnames)
+
+
+def _format_labels(labelnames, key, extra=None):
+    pairs = list(zip(labelnames, key)) + list(extra or [])
+    if not pairs:
+        return ""
+    escaped = (
+        f'{name}="' + str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for name, value in pairs
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+class Counter:
+    type = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(self.labelnames, labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(_label_key(self.labelnames, labels), 0)
+
+    def totals_by(self, label):
+        # Sums values across every other label
+        index = self.labelnames.index(label)
+        totals = {}
+        for key, value in self._values.items():
+            totals[key[index]] = totals.get(key[index], 0) + value
+        return totals
+
+    def samples(self):
+        for key, value in self._values.items():
+            yield self.name, _format_labels(self.labelnames, key), value
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def set(self, value, **labels):
+        self._values[_label_key(self.labelnames, labels)] = value
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+def weighted_quantiles(samples, quantiles):
+    # samples are (value, weight) pairs
+    samples = sorted(samples)
+    total = sum(weight for _, weight in samples)
+    results = []
+    for q in quantiles:
+        if not samples:
+            results.append(None)
+            continue
+        target = q * total
+        seen = 0.0
+        for value, weight in samples:
+            seen += weight
+            if seen >= target:
+                break
+        results.append(value)
+    return results
+
+
+class RecentSamples:
+    # Raw observations grouped by minute, for percentiles over the last few
+    # minutes. Each minute keeps at most `per_minute` samples per label set
+    # (reservoir sampling) and each kept sample is weighted by how many it
+    # stands for, so memory stays bounded under load.
+
+    def __init__(self, minutes=60, per_minute=500, clock=time.time):
+        self.minutes = minutes
+        self.per_minute = per_minute
+        self.clock = clock
+        self._minutes = deque()
+
+    def observe(self, value, key=()):
+        minute = int(self.clock() // 60)
+        if not self._minutes or self._minutes[-1][0] != minute:
+            self._minutes.append((minute, {}))
+            while self._minutes[0][0] <= minute - self.minutes:
+                self._minutes.popleft()
+
+        entry = self._minutes[-1][1].setdefault(key, [0, []])
+        entry[0] += 1
+        if len(entry[1]) < self.per_minute:
+            entry[1].append(value)
+        else:
+            slot = random.randrange(entry[0])
+            if slot < self.per_minute:
+                entry[1][slot] = value
+
+    def by_key(self, minutes):
+        since = int(self.clock() // 60) - minutes
+        samples = {}
+        for minute, keys in self._minutes:
+            if minute <= since:
+                continue
+            for key, (seen, values) in keys.items():
+                weight = seen / len(values)
+                samples.setdefault(key, []).extend((value, weight) for value in values)
+        return samples
+
+
+class Histogram:
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, recent_minutes=0):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [per-bucket counts..., +Inf count, sum]
+        self._values = {}
+        self.recent = RecentSamples(recent_minutes) if recent_minutes else None
+
+    def observe(self, value, **labels):
+        key = _label_key(self.labelnames, labels)
+        state = self._values.get(key)
+        if state is None:
+            state = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        state[bisect.bisect_left(self.buckets, value)] += 1
+        state[-1] += value
+        if self.recent is not None:
+            self.recent.observe(value, key)
+
+    def recent_quantiles(self, quantiles, minutes):
+        # Returns ({label value(s): (count, [quantile values])}, overall) for
+        # observations in the last `minutes`; needs recent_minutes set
+        by_key = self.recent.by_key(minutes) if self.recent is not None else {}
+        per_key = {}
+        everything = []
+        for key, samples in by_key.items():
+            label = key[0] if len(key) == 1 else key
+            per_key[label] = (round(sum(weight for _, weight in samples)), weighted_quantiles(samples, quantiles))
+            everything.extend(samples)
+        overall = (round(sum(weight for _, weight in everything)), weighted_quantiles(everything, quantiles))
+        return per_key, overall
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels):
+        state = self._values.get(_label_key(self.labelnames, labels))
+        return sum(state[:-1]) if state else 0
+
+    def sum(self, **labels):
+        state = self._values.get(_label_key(self.labelnames, labels))
+        return state[-1] if state else 0.0
+
+    def samples(self):
+        for key, state in self._values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                yield f"{self.name}_bucket", _format_labels(self.labelnames, key, [("le", bound)]), cumulative
+            cumulative += state[len(self.buckets)]
+            yield f"{self.name}_bucket", _format_labels(self.labelnames, key, [("le", "+Inf")]), cumulative
+            yield f"{self.name}_count", _format_labels(self.labelnames, key), cumulative
+            yield f"{self.name}_sum", _format_labels(self.labelnames, key), state[-1]
+
+
+class MetricsRegistry:
+    # In-process counters, gauges and histograms rendered in the Prometheus
+    # text format. Updates are plain dict operations on the event loop.
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+
+    def _register(self, metric):
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, recent_minutes=0):
+        return self._register(Histogram(name, documentation, labelnames, buckets, recent_minutes))
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def add_collector(self, collect):
+        # Called before each render, for gauges read from other components
+        self._collectors.append(collect)
+
+    def render(self):
+        for collect in self._collectors:
+            try:
+                collect()
+            except Exception as e:
+                logger.warning("⚠️ Metrics collector failed: %s", e)
+
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {value}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+HANDLER_SECONDS = REGISTRY.histogram(
+    "bot_handler_seconds", "Time spent in each PTB handler callback", ["handler"], recent_minutes=60
+)
+HANDLER_ERRORS = REGISTRY.counter("bot_handler_errors_total", "Handler callbacks that raised", ["handler"])
+DB_CALL_SECONDS = REGISTRY.histogram("bot_db_call_seconds", "Time spent in each GameDatabase method", ["method"])
+DB_CALL_ERRORS = REGISTRY.counter("bot_db_call_errors_total", "GameDatabase methods that raised", ["method"])
+TELEGRAM_API_SECONDS = REGISTRY.histogram("bot_telegram_api_seconds", "Bot API request latency", ["endpoint"])
+TELEGRAM_API_QUEUE_SECONDS = REGISTRY.histogram(
+    "bot_telegram_api_queue_seconds", "Time Bot API requests waited in the rate limiter", ["priority"]
+)
+TELETHON_CALL_SECONDS = REGISTRY.histogram(
+    "bot_telethon_call_seconds", "Time spent in each Telethon service call", ["method"]
+)
+TELEGRAM_RETRY_AFTER = REGISTRY.counter("bot_telegram_retry_after_total", "Bot API calls rejected with 429", ["endpoint"])
+JOB_SECONDS = REGISTRY.histogram("bot_job_seconds", "JobQueue job run time", ["job"])
+JOB_LAG_SECONDS = REGISTRY.histogram("bot_job_lag_seconds", "Delay between a job's scheduled and actual start", ["job"])
+JOB_ERRORS = REGISTRY.counter("bot_job_errors_total", "JobQueue jobs that raised", ["job"])
+TIMER_LAG_SECONDS = REGISTRY.histogram("bot_timer_lag_seconds", "Delay between a timer's due time and its firing", ["kind"])
+EVENT_LOOP_LAG_SECONDS = REGISTRY.histogram(
+    "bot_event_loop_lag_seconds", "How late the event loop ran a timer callback",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0), recent_minutes=60
+)
+SLOW_CALLBACKS = REGISTRY.counter(
+    "bot_slow_callbacks_total", "Times the event loop was blocked past the lag threshold", ["handler"]
+)
+CACHE_REQUESTS = REGISTRY.counter("bot_cache_requests_total", "In-memory cache lookups", ["cache", "result"])
+
+
+def timed(histogram, errors=None, **labels):
+    # Decorator for sync and async callables
+    def decorate(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                except Exception:
+                    if errors is not None:
+                        errors.inc(**labels)
+                    raise
+                finally:
+                    histogram.observe(time.perf_counter() - started, **labels)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                if errors is not None:
+                    errors.inc(**labels)
+                raise
+            finally:
+                histogram.observe(time.perf_counter() - started, **labels)
+        return wrapper
+    return decorate
+
+
+def instrument_methods(cls, histogram, errors=None, label="method"):
+    # Times every public method defined on the class
+    for name, member in list(vars(cls).items()):
+        if name.startswith("_") or not inspect.isfunction(member):
+            continue
+        setattr(cls, name, timed(histogram, errors, **{label: name})(member))
+    return cls
+
+
+def instrument_handlers(application):
+    # Wraps the callback of every registered handler, including the ones
+    # nested in conversation states, with latency and error metrics
+    from telegram.ext import ConversationHandler
+
+    def wrap(handler):
+        if isinstance(handler, ConversationHandler):
+            for nested in handler.entry_points + handler.fallbacks:
+                wrap(nested)
+            for state_handlers in handler.states.values():
+                for nested in state_handlers:
+                    wrap(nested)
+            return
+        callback = getattr(handler, "callback", None)
+        if callback is None or getattr(callback, "_metrics_wrapped", False):
+            return
+        handler.callback = _attributed(callback, timed(HANDLER_SECONDS, HANDLER_ERRORS, handler=callback.__name__)(callback))
+
+    for group_handlers in application.handlers.values():
+        for handler in group_handlers:
+            wrap(handler)
+
+
+def instrument_job(callback):
+    return _attributed(callback, timed(JOB_SECONDS, JOB_ERRORS, job=callback.__name__)(callback), prefix="job:")
+
+
+def _attributed(callback, timed_callback, prefix=""):
+    # Logs, Firestore costs, trace spans and profiler samples inside the
+    # callback are attributed to it
+    source = f"{prefix}{callback.__name__}"
+
+    @functools.wraps(callback)
+    async def wrapper(*args, **kwargs):
+        with log_context(handler=source), TRACER.span(source):
+            if PROFILER.enabled:
+                return await PROFILER.run(source, timed_callback, *args, **kwargs)
+            return await timed_callback(*args, **kwargs)
+
+    wrapper._metrics_wrapped = True
+    return wrapper
+
+
+def watch_job_lag(job_queue):
+    # APScheduler reports each submission with the run time it was due at
+    from apscheduler.events import EVENT_JOB_SUBMITTED
+    from datetime import datetime, timezone
+
+    def on_submitted(event):
+        if not event.scheduled_run_times:
+            return
+        job = job_queue.scheduler.get_job(event.job_id)
+        name = job.name if job else event.job_id
+        lag = (datetime.now(timezone.utc) - event.scheduled_run_times[-1]).total_seconds()
+        JOB_LAG_SECONDS.observe(max(lag, 0.0), job=name)
+
+    job_queue.scheduler.add_listener(on_submitted, EVENT_JOB_SUBMITTED)
+
+
+class MetricsServer:
+    # Minimal HTTP server for Prometheus scrapes on the bot's own event loop
+
+    def __init__(self, registry=REGISTRY, host="127.0.0.1", port=9102):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._server = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info("📈 Metrics available at http://%s:%s/metrics", self.host, self.port)
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader, writer):
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+            # Headers are read and ignored
+            while (await asyncio.wait_for(reader.readline(), timeout=5)) not in (b"\r\n", b"\n", b""):
+                pass
+
+            parts = request_line.decode("latin-1").split()
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] == "/metrics":
+                status, body = "200 OK", self.registry.render().encode()
+                content_type = "text/plain; version=0.0.4; charset=utf-8"
+            else:
+                status, body, content_type = "404 Not Found", b"not found\n", "text/plain"
+
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
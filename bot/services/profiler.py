@@ -0,0 +1,179 @@
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from ..utils.structured_logging import current_log_context
+
+logger = logging.getLogger(__name__)
+
+
+class UpdateProfiler:
+    # Statistical profiler for live handler calls. Chosen calls run inside
+    # _profiled(); a background thread samples the event loop thread's stack
+    # every few milliseconds and keeps the samples that pass through a
+    # profiled call, keyed by handler. A suspended coroutine isn't on the
+    # stack, so samples show time spent on the loop, not time awaiting I/O.
+    # cProfile isn't used because it profiles the whole thread, so
+    # interleaved handlers would be mixed together.
+    #
+    # Output is the folded-stack format read by flamegraph.pl, speedscope
+    # and inferno.
+
+    def __init__(self, sample_rate=0.0, users=None, handlers=None, interval=0.005, output_dir="profiles"):
+        self.sample_rate = sample_rate
+        self.users = set(users or ())
+        self.handlers = set(handlers or ())
+        self.interval = interval
+        self.output_dir = output_dir
+        self.stacks = {}
+        self.calls = Counter()
+        self._active = 0
+        self._loop_thread_id = None
+        self._thread = None
+        self._stop = threading.Event()
+        # The sampler thread adds to `stacks` while the loop reads it
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.sample_rate > 0 or bool(self.users) or bool(self.handlers)
+
+    def configure(self, sample_rate=None, users=None, handlers=None):
+        if sample_rate is not None:
+            self.sample_rate = sample_rate
+        if users is not None:
+            self.users = set(users)
+        if handlers is not None:
+            self.handlers = set(handlers)
+        if not self.enabled:
+            self._stop_sampler()
+
+    def should_profile(self, source):
+        if source in self.handlers:
+            return True
+        if self.users and current_log_context().get("user_id") in self.users:
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def run(self, source, func, *args, **kwargs):
+        if not self.should_profile(source):
+            return await func(*args, **kwargs)
+        return await self._profiled(source, func, args, kwargs)
+
+    async def _profiled(self, source, func, args, kwargs):
+        # The sampler identifies profiled calls by this frame and reads
+        # `source` from its locals
+        self.calls[source] += 1
+        self._active += 1
+        self._start_sampler()
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            self._active -= 1
+
+    def _start_sampler(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._loop_thread_id = threading.get_ident()
+        # Each thread gets its own stop event, so one that is still finishing
+        # a sample can't be revived alongside its replacement
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._sample_loop, args=(self._stop,), name="update-profiler", daemon=True
+        )
+        self._thread.start()
+
+    def _stop_sampler(self):
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
+        self._thread = None
+
+    def _sample_loop(self, stop):
+        while not stop.wait(self.interval):
+            if self._active:
+                frame = sys._current_frames().get(self._loop_thread_id)
+                if frame is not None:
+                    self._record(frame)
+
+    def _record(self, frame):
+        stack = []
+        while frame is not None:
+            if frame.f_code is UpdateProfiler._profiled.__code__:
+                source = frame.f_locals.get("source", "unknown")
+                key = (source, ";".join(reversed(stack)))
+                with self._lock:
+                    self.stacks[key] = self.stacks.get(key, 0) + 1
+                return
+            code = frame.f_code
+            module = os.path.splitext(os.path.basename(code.co_filename))[0]
+            stack.append(f"{module}:{code.co_name}")
+            frame = frame.f_back
+
+    def summary(self):
+        with self._lock:
+            stacks = dict(self.stacks)
+        return self._summarize(stacks, self.calls)
+
+    def _summarize(self, stacks, calls):
+        samples = Counter()
+        for (source, _), count in stacks.items():
+            samples[source] += count
+        return {
+            source: {"calls": calls[source], "samples": samples[source], "ms": round(samples[source] * self.interval * 1000)}
+            for source in sorted(set(samples) | set(calls), key=lambda name: -samples[name])
+        }
+
+    def dump(self, reset=True):
+        # One folded file per handler plus a combined one with the handler
+        # as the root frame
+        os.makedirs(self.output_dir, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        with self._lock:
+            stacks, calls = dict(self.stacks), self.calls
+            if reset:
+                self.stacks = {}
+                self.calls = Counter()
+        by_source = {}
+        for (source, stack), count in stacks.items():
+            by_source.setdefault(source, []).append(f"{stack} {count}")
+
+        paths = []
+        combined = []
+        for source, lines in by_source.items():
+            safe_name = "".join(char if char.isalnum() or char in "-_" else "_" for char in source)
+            path = os.path.join(self.output_dir, f"{stamp}-{safe_name}.folded")
+            with open(path, "w") as f:
+                f.write("\n".join(lines) + "\n")
+            paths.append(path)
+            combined.extend(f"{source};{line}" for line in lines)
+
+        if combined:
+            path = os.path.join(self.output_dir, f"{stamp}-all.folded")
+            with open(path, "w") as f:
+                f.write("\n".join(combined) + "\n")
+            paths.append(path)
+
+        summary = self._summarize(stacks, calls)
+        logger.info("🔬 Wrote %s profile files to %s", len(paths), self.output_dir)
+        return paths, summary
+
+
+def _ids(value):
+    return {int(item) for item in (value or "").split(",") if item.strip().lstrip("-").isdigit()}
+
+
+def _names(value):
+    return {item.strip() for item in (value or "").split(",") if item.strip()}
+
+
+PROFILER = UpdateProfiler(
+    sample_rate=float(os.getenv("PROFILE_SAMPLE_RATE", "0")),
+    users=_ids(os.getenv("PROFILE_USERS")),
+    handlers=_names(os.getenv("PROFILE_HANDLERS")),
+    interval=float(os.getenv("PROFILE_INTERVAL_MS", "5")) / 1000,
+    output_dir=os.getenv("PROFILE_DIR", "profiles")
+)
@@ -0,0 +1,251 @@
+import asyncio
+import logging
+import contextvars
+import itertools
+import time
+from contextlib import contextmanager
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+from .metrics import TELEGRAM_API_SECONDS, TELEGRAM_API_QUEUE_SECONDS, TELEGRAM_RETRY_AFTER
+from .tracing import TRACER
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = 0
+BACKGROUND = 1
+
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+# Endpoints that count against Telegram's per-chat message limits
+PER_CHAT_PREFIXES = ("send", "edit", "copy", "forward", "pin")
+
+_request_priority = contextvars.ContextVar("request_priority", default=INTERACTIVE)
+
+
+@contextmanager
+def background_priority():
+    # Bot API calls made inside this block (and tasks started from it)
+    # queue behind user-facing replies
+    token = _request_priority.set(BACKGROUND)
+    try:
+        yield
+    finally:
+        _request_priority.reset(token)
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def available(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return self.tokens
+
+    def wait_time(self, now, reserve=0):
+        missing = 1 + reserve - self.available(now)
+        return max(0.0, missing / self.rate)
+
+    def consume(self):
+        self.tokens -= 1
+
+    def block_until(self, now, until):
+        # Drains the bucket so that the next token becomes available at `until`
+        self.available(now)
+        self.tokens = min(self.tokens, 1 - max(0.0, until - now) * self.rate)
+
+
+class PriorityRateLimiter(BaseRateLimiter):
+    # Global and per-chat token buckets with two priority classes.
+    # Background traffic (announcement edits, reminders, syncs) never uses
+    # the last few global tokens, so interactive replies always find room.
+    # Replies to someone tapping through menus in a private chat get their
+    # own, looser bucket so quick taps aren't queued behind the 1/s pace.
+
+    def __init__(self, overall_rate=30, group_rate=17 / 60, group_burst=3,
+                 private_rate=1.0, private_burst=3, private_interactive_rate=5.0,
+                 private_interactive_burst=10, interactive_reserve=3, max_retries=2):
+        self.group_rate = group_rate
+        self.group_burst = group_burst
+        self.private_rate = private_rate
+        self.private_burst = private_burst
+        self.private_interactive_rate = private_interactive_rate
+        self.private_interactive_burst = private_interactive_burst
+        self.interactive_reserve = interactive_reserve
+        self.max_retries = max_retries
+
+        self._global = TokenBucket(overall_rate, overall_rate)
+        self._chats = {}
+        self._waiters = []
+        self._seq = itertools.count()
+        self._wakeup = None
+        self._dispatcher = None
+
+        self.stats = {
+            "requests": 0,
+            "retry_after": 0,
+            "queue_delay": {name: {"count": 0, "total": 0.0, "max": 0.0} for name in PRIORITY_NAMES.values()},
+        }
+
+    @property
+    def queue_depth(self):
+        return len(self._waiters)
+
+    async def initialize(self):
+        self._wakeup = asyncio.Event()
+
+    async def shutdown(self):
+        if self._dispatcher:
+            self._dispatcher.cancel()
+            self._dispatcher = None
+        for _, _, _, future in self._waiters:
+            if not future.done():
+                future.cancel()
+        self._waiters.clear()
+
+    async def process_request(self, callback, args, kwargs, endpoint, data, rate_limit_args):
+        priority = self._priority(rate_limit_args)
+        chat_key = self._chat_key(endpoint, data)
+
+        with TRACER.span(f"telegram.{endpoint}", root=False, priority=PRIORITY_NAMES.get(priority, "background")) as span:
+            return await self._process(callback, args, kwargs, endpoint, priority, chat_key, span)
+
+    async def _process(self, callback, args, kwargs, endpoint, priority, chat_key, span):
+        for attempt in range(self.max_retries + 1):
+            queued_at = time.monotonic()
+            await self._acquire(priority, chat_key)
+            delay = time.monotonic() - queued_at
+            self._record_delay(priority, delay)
+            self.stats["requests"] += 1
+            if span:
+                span.set_attribute("queue_wait_ms", round(delay * 1000, 1))
+                span.set_attribute("attempts", attempt + 1)
+
+            started = time.perf_counter()
+            try:
+                return await callback(*args, **kwargs)
+            except RetryAfter as e:
+                self.stats["retry_after"] += 1
+                TELEGRAM_RETRY_AFTER.inc(endpoint=endpoint)
+                if attempt == self.max_retries:
+                    raise
+                retry_after = e.retry_after.total_seconds() if hasattr(e.retry_after, "total_seconds") else e.retry_after
+                logger.warning("⏳ Flood limit on %s (%s), pausing %ss", endpoint, chat_key or 'global', retry_after)
+                bucket = self._chat_bucket(chat_key, priority) if chat_key is not None else self._global
+                now = time.monotonic()
+                bucket.block_until(now, now + retry_after)
+            finally:
+                TELEGRAM_API_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint)
+
+    def _priority(self, rate_limit_args):
+        if isinstance(rate_limit_args, dict) and "priority" in rate_limit_args:
+            return rate_limit_args["priority"]
+        return _request_priority.get()
+
+    @staticmethod
+    def _chat_key(endpoint, data):
+        if not endpoint.startswith(PER_CHAT_PREFIXES):
+            return None
+        return data.get("chat_id")
+
+    def _chat_bucket(self, chat_key, priority):
+        # Channels are addressed by @username, groups by negative ids
+        try:
+            is_group = int(chat_key) < 0
+        except (TypeError, ValueError):
+            is_group = True
+        key = chat_key if is_group else (chat_key, priority == INTERACTIVE)
+
+        bucket = self._chats.get(key)
+        if bucket is None:
+            if is_group:
+                bucket = TokenBucket(self.group_rate, self.group_burst)
+            elif priority == INTERACTIVE:
+                bucket = TokenBucket(self.private_interactive_rate, self.private_interactive_burst)
+            else:
+                bucket = TokenBucket(self.private_rate, self.private_burst)
+            self._chats[key] = bucket
+        return bucket
+
+    def _wait_time(self, priority, chat_key, now):
+        reserve = self.interactive_reserve if priority != INTERACTIVE else 0
+        wait = self._global.wait_time(now, reserve)
+        if chat_key is not None:
+            wait = max(wait, self._chat_bucket(chat_key, priority).wait_time(now))
+        return wait
+
+    def _consume(self, priority, chat_key):
+        self._global.consume()
+        if chat_key is not None:
+            self._chat_bucket(chat_key, priority).consume()
+
+    async def _acquire(self, priority, chat_key):
+        now = time.monotonic()
+        if not self._waiters and self._wait_time(priority, chat_key, now) == 0:
+            self._consume(priority, chat_key)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append((priority, next(self._seq), chat_key, future))
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        self._wakeup.set()
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        await future
+
+    async def _dispatch(self):
+        while self._waiters:
+            self._wakeup.clear()
+            now = time.monotonic()
+            self._waiters = [waiter for waiter in self._waiters if not waiter[3].done()]
+
+            # Grant the highest-priority waiter whose chat has capacity;
+            # a throttled chat doesn't hold up requests for other chats
+            min_wait = None
+            for waiter in sorted(self._waiters, key=lambda w: (w[0], w[1])):
+                priority, _, chat_key, future = waiter
+                wait = self._wait_time(priority, chat_key, now)
+                if wait == 0:
+                    self._consume(priority, chat_key)
+                    self._waiters.remove(waiter)
+                    future.set_result(None)
+                    break
+                min_wait = wait if min_wait is None else min(min_wait, wait)
+            else:
+                if min_wait is None:
+                    continue
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=min_wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            # Let the granted request run before granting the next one
+            await asyncio.sleep(0)
+
+    def _record_delay(self, priority, delay):
+        stats = self.stats["queue_delay"][PRIORITY_NAMES.get(priority, "background")]
+        stats["count"] += 1
+        stats["total"] += delay
+        stats["max"] = max(stats["max"], delay)
+        TELEGRAM_API_QUEUE_SECONDS.observe(delay, priority=PRIORITY_NAMES.get(priority, "background"))
+
+    def snapshot(self):
+        queue_delay = {
+            name: {
+                "count": stats["count"],
+                "avg": stats["total"] / stats["count"] if stats["count"] else 0.0,
+                "max": stats["max"],
+            }
+            for name, stats in self.stats["queue_delay"].items()
+        }
+        return {
+            "requests": self.stats["requests"],
+            "retry_after": self.stats["retry_after"],
+            "queue_depth": self.queue_depth,
+            "queue_delay": queue_delay,
+        }
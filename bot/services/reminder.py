@@ -1,18 +1,33 @@
+import asyncio
+import logging
 from datetime import timedelta
 from telegram.ext import ContextTypes
-from firebase_admin import firestore
 from ..utils import DateTimeHelper, GroupIdHelper, ValidationHelper
+from .rate_limiter import background_priority
+
+logger = logging.getLogger(__name__)
+
+REMINDER_PERIODS = ['24h', '2h']
 
 class ReminderService: 
-    def __init__(self, db):
+    def __init__(self, db, engine=None, send_concurrency=5, batch_window=30):
         self.db = db 
         self.sg_tz = DateTimeHelper.get_singapore_timezone()
+        self.send_concurrency = send_concurrency
+
+        # Without an engine, reminders fall back to one JobQueue job each
+        self.engine = engine
+        if engine is not None:
+            for period in REMINDER_PERIODS:
+                engine.register(f"reminder_{period}", self._make_engine_handler(period), batch_window)
 
-    async def schedule_game_reminders(self, context: ContextTypes.DEFAULT_TYPE, game_data, game_id): 
+    async def schedule_game_reminders(self, context: ContextTypes.DEFAULT_TYPE, game_data, game_id, catch_up=False): 
+        # catch_up sends reminders that came due while the bot was down;
+        # a newly created game only gets the reminders still ahead of it
         try:
             game_datetime = self._get_game_start_datetime(game_data)
             if not game_datetime:
-                print(f"❌ Could not parse game datetime for game {game_id}")
+                logger.error("❌ Could not parse game datetime for game %s", game_id)
                 return
 
             now = DateTimeHelper.get_current_singapore_time()
@@ -26,14 +41,35 @@ class ReminderService:
             # Schedule reminders
             for period, reminder_time in reminder_times.items():
                 await self._schedule_single_reminder(
-                    context, game_id, game_data, period, reminder_time, now
+                    context, game_id, game_data, period, reminder_time, now, catch_up
                 )
                 
         except Exception as e:
-            print(f"❌ Error scheduling reminders for game {game_id}: {e}")
+            logger.error("❌ Error scheduling reminders for game %s: %s", game_id, e)
 
-    async def _schedule_single_reminder(self, context, game_id, game_data, period, reminder_time, now):
-        if reminder_time > now:
+    async def _schedule_single_reminder(self, context, game_id, game_data, period, reminder_time, now, catch_up=False):
+        if self.engine is not None and (catch_up or reminder_time > now):
+            # A reminder is still worth sending until the next one is due
+            game_datetime = self._get_game_start_datetime(game_data)
+            deadline = game_datetime - timedelta(hours=2) if period == '24h' else game_datetime
+
+            if game_data.get(f'reminder_{period}_sent', False):
+                return
+            if deadline <= now:
+                logger.warning("⚠️ %s reminder time has passed for game %s", period, game_id)
+                return
+
+            self.engine.schedule(
+                game_id,
+                f"reminder_{period}",
+                reminder_time.timestamp(),
+                {'deadline': deadline.timestamp()}
+            )
+            if reminder_time > now:
+                logger.info("✅ Scheduled %s reminder for game %s at %s", period, game_id, reminder_time)
+            else:
+                logger.info("🔁 Catching up missed %s reminder for game %s", period, game_id)
+        elif reminder_time > now:
             job_name = f"reminder_{period}_{game_id}"
             callback_method = getattr(self, f"send_{period}_reminder_job")
             
@@ -46,9 +82,9 @@ class ReminderService:
                 data={'game_id': game_id, 'game_data': game_data},
                 name=job_name
             )
-            print(f"✅ Scheduled {period} reminder for game {game_id} at {reminder_time}")
+            logger.info("✅ Scheduled %s reminder for game %s at %s", period, game_id, reminder_time)
         else:
-            print(f"⚠️ {period} reminder time has passed for game {game_id}")
+            logger.warning("⚠️ %s reminder time has passed for game %s", period, game_id)
 
     def _remove_existing_jobs(self, context, job_name):
         current_jobs = context.job_queue.get_jobs_by_name(job_name)
@@ -61,11 +97,42 @@ class ReminderService:
     async def send_2h_reminder_job(self, context: ContextTypes.DEFAULT_TYPE):
         await self._send_reminder_job(context, '2h', self.send_2h_reminder)
 
+    def _make_engine_handler(self, period):
+        async def handle_due_reminders(context, entries):
+            return await self._send_due_reminders(context, period, [game_id for game_id, _ in entries])
+        return handle_due_reminders
+
+    async def _send_due_reminders(self, context, period, game_ids):
+        # Reminders that fall due together share one read, send concurrently
+        # through the rate limiter and mark themselves sent in one commit.
+        # Returns the games whose reminder couldn't be delivered.
+        games = self._get_current_games(game_ids)
+        due = [(game_id, game_data) for game_id, game_data in games.items()
+               if self._should_send_reminder(game_data, game_id, period)]
+        if not due:
+            return []
+
+        semaphore = asyncio.Semaphore(self.send_concurrency)
+
+        async def deliver(game_id, game_data):
+            async with semaphore:
+                return await self._deliver_reminder(
+                    context, game_data, game_id, self._reminder_config(game_data, period)
+                )
+
+        results = await asyncio.gather(*(deliver(game_id, game_data) for game_id, game_data in due))
+        sent = [game_id for (game_id, _), delivered in zip(due, results) if delivered]
+
+        if sent:
+            self.db.update_games({game_id: {f'reminder_{period}_sent': True} for game_id in sent})
+        logger.info("📨 Sent %s/%s due %s reminders", len(sent), len(due), period)
+        return [game_id for (game_id, _), delivered in zip(due, results) if not delivered]
+
     async def _send_reminder_job(self, context, period, reminder_method):
+        await self._send_reminder(context, context.job.data['game_id'], period, reminder_method)
+
+    async def _send_reminder(self, context, game_id, period, reminder_method):
         try:
-            job_data = context.job.data
-            game_id = job_data['game_id']
-            
             # Get fresh game data
             current_game_data = self._get_current_game_data(game_id)
             if not current_game_data:
@@ -78,7 +145,7 @@ class ReminderService:
             await reminder_method(context, current_game_data, game_id)
             
         except Exception as e:
-            print(f"❌ Error in {period} reminder job: {e}")
+            logger.error("❌ Error in %s reminder job: %s", period, e)
 
     def _get_current_game_data(self, game_id):
         try:
@@ -86,47 +153,66 @@ class ReminderService:
             game_doc = game_ref.get()
             
             if not game_doc.exists:
-                print(f"⚠️ Game {game_id} no longer exists")
+                logger.warning("⚠️ Game %s no longer exists", game_id)
                 return None
                 
-            return game_doc.to_dict()
+            # Reminder flags may still be waiting in the write buffer
+            return self.db.with_pending_writes(game_id, game_doc.to_dict())
         except Exception as e:
-            print(f"❌ Error fetching game data for {game_id}: {e}")
+            logger.error("❌ Error fetching game data for %s: %s", game_id, e)
             return None
 
+    def _get_current_games(self, game_ids):
+        # Read errors propagate so the engine retries the whole batch
+        games_ref = self.db.db.collection("game")
+        game_docs = self.db.db.get_all([games_ref.document(game_id) for game_id in game_ids])
+
+        games = {}
+        for game_doc in game_docs:
+            if not game_doc.exists:
+                logger.warning("⚠️ Game %s no longer exists", game_doc.id)
+                continue
+            games[game_doc.id] = self.db.with_pending_writes(game_doc.id, game_doc.to_dict())
+        return games
+
     def _should_send_reminder(self, game_data, game_id, period):
         if game_data.get('status') != 'open':
-            print(f"⚠️ Game {game_id} is no longer open")
+            logger.warning("⚠️ Game %s is no longer open", game_id)
             return False
             
         reminder_field = f'reminder_{period}_sent'
         if game_data.get(reminder_field, False):
-            print(f"⚠️ {period} reminder already sent for game {game_id}")
+            logger.warning("⚠️ %s reminder already sent for game %s", period, game_id)
             return False
             
         return True
 
     async def schedule_all_existing_reminders(self, context: ContextTypes.DEFAULT_TYPE):
+        if self.engine is not None and self.engine.is_bootstrapped("reminders"):
+            logger.info("📋 Reminder schedule restored from local store, skipping Firestore scan")
+            return
+
         try:
             games_ref = self.db.db.collection("game")
             query = games_ref.where("status", "==", "open")
-            results = query.stream()
-
-            scheduled_count = 0
-            
-            for game_doc in results:
-                game_data = game_doc.to_dict()
-                game_id = game_doc.id
-                
-                # Only schedule if reminders haven't been sent yet
-                if self._needs_reminder_scheduling(game_data):
-                    await self.schedule_game_reminders(context, game_data, game_id)
-                    scheduled_count += 1
-            
-            self._log_scheduling_result(scheduled_count)
+            games = [{"id": game_doc.id, **game_doc.to_dict()} for game_doc in query.stream()]
+            await self.schedule_reminders_for_games(context, games)
                 
         except Exception as e:
-            print(f"❌ Error scheduling existing reminders: {e}")
+            logger.error("❌ Error scheduling existing reminders: %s", e)
+
+    async def schedule_reminders_for_games(self, context: ContextTypes.DEFAULT_TYPE, games):
+        scheduled_count = 0
+        
+        for game_data in games:
+            # Only schedule if reminders haven't been sent yet
+            if self._needs_reminder_scheduling(game_data):
+                await self.schedule_game_reminders(context, game_data, game_data['id'], catch_up=True)
+                scheduled_count += 1
+        
+        self._log_scheduling_result(scheduled_count)
+        if self.engine is not None:
+            self.engine.mark_bootstrapped("reminders")
 
     def _needs_reminder_scheduling(self, game_data):
         return (not game_data.get('reminder_24h_sent', False) or 
@@ -134,16 +220,21 @@ class ReminderService:
 
     def _log_scheduling_result(self, scheduled_count):
         if scheduled_count > 0:
-            print(f"✅ Scheduled reminders for {scheduled_count} existing games")
+            logger.info("✅ Scheduled reminders for %s existing games", scheduled_count)
         else:
-            print("📋 No existing games need reminder scheduling")
+            logger.info("📋 No existing games need reminder scheduling")
 
     async def cancel_game_reminders(self, context: ContextTypes.DEFAULT_TYPE, game_id):
         try:
-            reminder_periods = ['24h', '2h']
+            if self.engine is not None:
+                cancelled = sum(self.engine.cancel(game_id, f"reminder_{period}") for period in REMINDER_PERIODS)
+                if cancelled:
+                    logger.info("✅ Cancelled reminders for game %s", game_id)
+                return
+
             jobs_cancelled = False
             
-            for period in reminder_periods:
+            for period in REMINDER_PERIODS:
                 job_name = f"reminder_{period}_{game_id}"
                 jobs = context.job_queue.get_jobs_by_name(job_name)
                 if jobs:
@@ -152,10 +243,10 @@ class ReminderService:
                     jobs_cancelled = True
                 
             if jobs_cancelled:
-                print(f"✅ Cancelled reminders for game {game_id}")
+                logger.info("✅ Cancelled reminders for game %s", game_id)
             
         except Exception as e:
-            print(f"❌ Error cancelling reminders for game {game_id}: {e}")
+            logger.error("❌ Error cancelling reminders for game %s: %s", game_id, e)
 
     def _get_game_start_datetime(self, game_data):
         return DateTimeHelper.parse_game_datetime(
@@ -164,35 +255,42 @@ class ReminderService:
         )
 
     async def _send_reminder_message(self, context, game_data, game_id, reminder_config):
+        if not await self._deliver_reminder(context, game_data, game_id, reminder_config):
+            return False
+
+        # Mark reminder as sent
+        self.db.update_game(game_id, {reminder_config['db_field']: True})
+        return True
+
+    async def _deliver_reminder(self, context, game_data, game_id, reminder_config):
         try:
             chat_id = self._get_validated_chat_id(game_data)
             if not chat_id:
                 return False
 
-            # Send reminder text
-            await context.bot.send_message(
-                chat_id=chat_id,  
-                text=reminder_config['text'],
-                parse_mode='Markdown'
-            )
+            with background_priority():
+                # Send reminder text
+                await context.bot.send_message(
+                    chat_id=chat_id,  
+                    text=reminder_config['text'],
+                    parse_mode='Markdown'
+                )
 
-            # Send poll if configured
-            if reminder_config.get('send_poll', False):
-                await self._send_attendance_poll(context, chat_id, game_data)
+                # Send poll if configured
+                if reminder_config.get('send_poll', False):
+                    await self._send_attendance_poll(context, chat_id, game_data)
 
-            # Mark reminder as sent
-            self.db.update_game(game_id, {reminder_config['db_field']: True})
-            print(f"✅ Sent {reminder_config['period']} reminder for game {game_id} to group {chat_id}")
+            logger.info("✅ Sent %s reminder for game %s to group %s", reminder_config['period'], game_id, chat_id)
             return True
         
         except Exception as e:
-            print(f"🚨 Unexpected error sending {reminder_config['period']} reminder: {e}")
+            logger.error("🚨 Unexpected error sending %s reminder: %s", reminder_config['period'], e)
             return False
 
     def _get_validated_chat_id(self, game_data):
         group_id = game_data.get('group_id')
         if not group_id:
-            print("❌ No group_id in game data")
+            logger.error("❌ No group_id in game data")
             return None
 
         try:
@@ -200,7 +298,7 @@ class ReminderService:
             chat_id = str(telegram_id)
             return chat_id
         except (ValueError, TypeError) as e:
-            print(f"❌ Invalid group_id format: {group_id} - {e}")
+            logger.error("❌ Invalid group_id format: %s - %s", group_id, e)
             return None
 
     async def _send_attendance_poll(self, context, chat_id, game_data):
@@ -223,9 +321,9 @@ class ReminderService:
                 message_id=poll_message.message_id,
                 disable_notification=True
             )
-            print(f"✅ Poll pinned in group {chat_id}")
+            logger.info("✅ Poll pinned in group %s", chat_id)
         except Exception as pin_error:
-            print(f"⚠️ Could not pin poll: {pin_error}")
+            logger.warning("⚠️ Could not pin poll: %s", pin_error)
 
     def _create_reminder_text(self, game_data, reminder_type):
         common_info = (
@@ -250,23 +348,19 @@ class ReminderService:
         
         return header + common_info + footer
 
-    async def send_24h_reminder(self, context: ContextTypes.DEFAULT_TYPE, game_data, game_id):
-        reminder_config = {
-            'text': self._create_reminder_text(game_data, '24h'),
-            'send_poll': True,
-            'db_field': 'reminder_24h_sent',
-            'period': '24h'
+    def _reminder_config(self, game_data, period):
+        return {
+            'text': self._create_reminder_text(game_data, period),
+            'send_poll': period == '24h',
+            'db_field': f'reminder_{period}_sent',
+            'period': period
         }
-        await self._send_reminder_message(context, game_data, game_id, reminder_config)
+
+    async def send_24h_reminder(self, context: ContextTypes.DEFAULT_TYPE, game_data, game_id):
+        await self._send_reminder_message(context, game_data, game_id, self._reminder_config(game_data, '24h'))
 
     async def send_2h_reminder(self, context: ContextTypes.DEFAULT_TYPE, game_data, game_id):
-        reminder_config = {
-            'text': self._create_reminder_text(game_data, '2h'),
-            'send_poll': False,
-            'db_field': 'reminder_2h_sent',
-            'period': '2h'
-        }
-        await self._send_reminder_message(context, game_data, game_id, reminder_config)
+        await self._send_reminder_message(context, game_data, game_id, self._reminder_config(game_data, '2h'))
 
     async def send_game_reminders(self, context: ContextTypes.DEFAULT_TYPE):
         await self.schedule_all_existing_reminders(context)
\ No newline at end of file
@@ -0,0 +1,240 @@
+import asyncio
+import logging
+import heapq
+import itertools
+import time
+from .metrics import TIMER_LAG_SECONDS
+from ..utils.structured_logging import log_context
+
+logger = logging.getLogger(__name__)
+
+
+class ReminderEngine:
+    # One task sleeps until the earliest timer and fires everything that is
+    # due in a single pass. Timers are (due, game_id, kind) entries in a heap;
+    # cancelling or rescheduling only replaces the entry in the index and
+    # stale heap entries are skipped when they surface.
+    # With a store, every timer is also kept on disk and restored on start.
+
+    MAX_SLEEP = 60
+    RETRY_DELAY = 30
+    MAX_RETRY_DELAY = 900
+
+    def __init__(self, store=None):
+        self.store = store
+        self.bootstrapped = set()
+        self._heap = []
+        self._timers = {}
+        self._by_game = {}
+        self._handlers = {}
+        self._batch_windows = {}
+        self._seq = itertools.count()
+        self._wakeup = None
+        self._task = None
+        self._context = None
+
+    def __len__(self):
+        return len(self._timers)
+
+    def register(self, kind, handler, batch_window=0):
+        # handler(context, entries) receives every due entry of that kind,
+        # each as (game_id, payload), and may return the game ids it couldn't
+        # finish. Those, or the whole batch if the handler raises, are retried
+        # with backoff. Timers of the kind due within batch_window seconds of
+        # a firing timer are pulled into its batch.
+        self._handlers[kind] = handler
+        self._batch_windows[kind] = batch_window
+
+    def schedule(self, game_id, kind, due, payload=None, persist=True):
+        if self.store and persist:
+            self.store.save(game_id, kind, due, payload)
+
+        key = (game_id, kind)
+        seq = next(self._seq)
+        self._timers[key] = (due, seq, payload)
+        self._by_game.setdefault(game_id, set()).add(kind)
+        heapq.heappush(self._heap, (due, seq, game_id, kind))
+        if len(self._heap) > 2 * len(self._timers) + 64:
+            self._compact()
+
+        if self._heap[0][1] == seq and self._wakeup:
+            self._wakeup.set()
+
+    def cancel(self, game_id, kind=None):
+        kinds = [kind] if kind else list(self._by_game.get(game_id, ()))
+        cancelled = 0
+        for k in kinds:
+            if self._forget(game_id, k):
+                cancelled += 1
+                if self.store:
+                    self.store.delete(game_id, k)
+        return cancelled
+
+    def restore(self, now):
+        # Rebuilds the schedule from the local store. Timers that came due
+        # while the bot was down fire on the first pass unless their
+        # deadline has passed too.
+        if not self.store:
+            return 0
+
+        overdue = 0
+        for game_id, kind, due, payload in self.store.load_all():
+            self.schedule(game_id, kind, due, payload, persist=False)
+            if due <= now:
+                overdue += 1
+
+        self.bootstrapped = self.store.bootstrapped_names()
+        logger.info("⏰ Restored %s timers from local store (%s missed during downtime)", len(self), overdue)
+        return len(self)
+
+    def is_bootstrapped(self, name):
+        return name in self.bootstrapped
+
+    def mark_bootstrapped(self, name):
+        # Records that timers of this name were loaded from Firestore once,
+        # so later restarts can trust the store alone
+        if self.store:
+            self.store.mark_bootstrapped(name)
+        self.bootstrapped.add(name)
+
+    def kind_counts(self):
+        counts = {}
+        for _, kind in self._timers:
+            counts[kind] = counts.get(kind, 0) + 1
+        return counts
+
+    def due_time(self, game_id, kind):
+        timer = self._timers.get((game_id, kind))
+        return timer[0] if timer else None
+
+    def next_due(self):
+        self._drop_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now):
+        due = {}
+        max_window = max(self._batch_windows.values(), default=0)
+        not_yet = []
+        while self._heap and self._heap[0][0] <= now + max_window:
+            entry = heapq.heappop(self._heap)
+            due_at, seq, game_id, kind = entry
+            timer = self._timers.get((game_id, kind))
+            if timer is None or timer[1] != seq:
+                continue
+            if due_at > now + self._batch_windows.get(kind, 0):
+                not_yet.append(entry)
+                continue
+            self._forget(game_id, kind)
+            TIMER_LAG_SECONDS.observe(max(0.0, now - due_at), kind=kind)
+            due.setdefault(kind, []).append((game_id, timer[2]))
+
+        for entry in not_yet:
+            heapq.heappush(self._heap, entry)
+        return due
+
+    def start(self, context):
+        self._context = context
+        self._wakeup = asyncio.Event()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            logger.info("⏰ Reminder engine started with %s timers", len(self))
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            next_due = self.next_due()
+            if next_due is None:
+                timeout = self.MAX_SLEEP
+            else:
+                timeout = min(self.MAX_SLEEP, max(0.0, next_due - self.now()))
+
+            if timeout > 0:
+                try:
+                    # Woken early when an earlier timer is scheduled
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+                    continue
+                except asyncio.TimeoutError:
+                    pass
+
+            await self.fire_due(self.now())
+
+    async def fire_due(self, now):
+        for kind, entries in self.pop_due(now).items():
+            # Catch-up policy: a timer whose payload carries a deadline is
+            # dropped once that deadline has passed
+            live = [(game_id, payload) for game_id, payload in entries
+                    if not (payload and payload.get('deadline') and payload['deadline'] < now)]
+            if len(live) < len(entries):
+                logger.warning("⚠️ Dropped %s %s timers past their deadline", len(entries) - len(live), kind)
+
+            handler = self._handlers.get(kind)
+            if handler is None:
+                logger.warning("⚠️ No handler registered for %s timers", kind)
+            elif live:
+                try:
+                    with log_context(handler=f"timer:{kind}"):
+                        unfinished = set(await handler(self._context, live) or ())
+                except Exception as e:
+                    logger.error("❌ Error handling %s %s timers: %s", len(live), kind, e)
+                    unfinished = {game_id for game_id, _ in live}
+                self._retry(kind, [(game_id, payload) for game_id, payload in live if game_id in unfinished], now)
+
+            if self.store:
+                # Keep any timer the handler scheduled again
+                self.store.delete_many(
+                    (game_id, kind) for game_id, _ in entries if (game_id, kind) not in self._timers
+                )
+
+    def _retry(self, kind, entries, now):
+        retried = given_up = 0
+        for game_id, payload in entries:
+            if (game_id, kind) in self._timers:
+                # The handler already scheduled it again
+                continue
+            payload = payload or {}
+            attempts = payload.get('attempts', 0)
+            due = now + min(self.RETRY_DELAY * 2 ** attempts, self.MAX_RETRY_DELAY)
+            if payload.get('deadline') and due >= payload['deadline']:
+                given_up += 1
+                continue
+            self.schedule(game_id, kind, due, {**payload, 'attempts': attempts + 1})
+            retried += 1
+
+        if given_up:
+            logger.warning("⚠️ Gave up on %s %s timers at their deadline", given_up, kind)
+        if retried:
+            logger.info("🔁 Retrying %s %s timers", retried, kind)
+
+    def _forget(self, game_id, kind):
+        found = self._timers.pop((game_id, kind), None) is not None
+        kinds = self._by_game.get(game_id)
+        if kinds is not None:
+            kinds.discard(kind)
+            if not kinds:
+                del self._by_game[game_id]
+        return found
+
+    def _compact(self):
+        self._heap = [(due, seq, game_id, kind) for (game_id, kind), (due, seq, _) in self._timers.items()]
+        heapq.heapify(self._heap)
+
+    def _drop_stale(self):
+        while self._heap:
+            _, seq, game_id, kind = self._heap[0]
+            timer = self._timers.get((game_id, kind))
+            if timer is not None and timer[1] == seq:
+                return
+            heapq.heappop(self._heap)
+
+    @staticmethod
+    def now():
+        return time.time()
@@ -0,0 +1,82 @@
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class StartupState:
+    # Tracks which startup components are ready so handlers and jobs can
+    # hold off or degrade while their dependencies are still warming up
+
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self._ready = {}
+        self._failed = {}
+        self._events = {}
+
+    def _event(self, name):
+        if name not in self._events:
+            self._events[name] = asyncio.Event()
+        return self._events[name]
+
+    def mark_ready(self, name):
+        elapsed = time.monotonic() - self.started_at
+        self._ready[name] = elapsed
+        self._failed.pop(name, None)
+        self._event(name).set()
+        logger.info("🟢 %s ready after %.2fs", name, elapsed)
+
+    def mark_failed(self, name, error):
+        self._failed[name] = str(error)
+        logger.error("🔴 %s failed to start: %s", name, error)
+
+    def is_ready(self, name):
+        return name in self._ready
+
+    def has_failed(self, name):
+        return name in self._failed
+
+    async def run(self, name, init, retry_delay=None):
+        # Runs one component's init and records the outcome; with a retry
+        # delay the init is repeated until it succeeds
+        self._event(name)
+        while True:
+            try:
+                await init()
+                self.mark_ready(name)
+                return True
+            except Exception as e:
+                self.mark_failed(name, e)
+                if retry_delay is None:
+                    return False
+            await asyncio.sleep(retry_delay)
+
+    def summary(self):
+        parts = [
+            f"{name} {info['seconds']:.2f}s" if info["ready"] else f"{name} {'failed' if info['error'] else 'pending'}"
+            for name, info in self.snapshot().items()
+        ]
+        return ", ".join(parts)
+
+    async def wait_ready(self, name, timeout=None):
+        try:
+            await asyncio.wait_for(self._event(name).wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def snapshot(self):
+        names = set(self._ready) | set(self._failed) | set(self._events)
+        return {
+            name: {
+                "ready": name in self._ready,
+                "seconds": self._ready.get(name),
+                "error": self._failed.get(name),
+            }
+            for name in sorted(names)
+        }
+
+
+def get_startup_state(context):
+    return context.bot_data.setdefault('startup_state', StartupState())
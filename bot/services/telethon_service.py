@@ -7,6 +7,8 @@ from telethon.tl.functions.messages import EditChatDefaultBannedRightsRequest
 from dotenv import load_dotenv
 import logging
 from ..utils.constants import SPORT_EMOJIS
+from .metrics import TELETHON_CALL_SECONDS, instrument_methods
+from .tracing import TRACER
 
 load_dotenv()
 
@@ -37,6 +39,14 @@ class TelethonService:
             logging.error(f"Failed to initialize Telethon client: {e}")
             return False
     
+    async def _traced(self, name, awaitable):
+        # One span per MTProto call so slow steps of group creation show up in traces
+        with TRACER.span(f"mtproto.{name}", root=False):
+            return await awaitable
+
+    async def _request(self, request):
+        return await self._traced(type(request).__name__, self.client(request))
+
     async def create_game_group(self, game_data, host_user):
 
         if not self.client:
@@ -62,7 +72,7 @@ class TelethonService:
                 f"Welcome to the game! Use this group to coordinate and discuss."
             )
             
-            result = await self.client(CreateChannelRequest(
+            result = await self._request(CreateChannelRequest(
                 title=group_name,
                 about = description,
                 megagroup = True
@@ -72,8 +82,8 @@ class TelethonService:
             group_id = group_entity.id
 
             # Add bot to group
-            bot_entity = await self.client.get_entity(self.bot_username)
-            await self.client(InviteToChannelRequest(
+            bot_entity = await self._traced("get_entity", self.client.get_entity(self.bot_username))
+            await self._request(InviteToChannelRequest(
                 channel=group_entity,
                 users=[bot_entity]
             ))
@@ -93,14 +103,14 @@ class TelethonService:
         )
         
             # Make bot an admin
-            await self.client(EditAdminRequest(
+            await self._request(EditAdminRequest(
                 channel=group_entity,
                 user_id=bot_entity,
                 admin_rights=admin_rights,
                 rank="Bot"  
             ))
 
-            await self.client(EditChatDefaultBannedRightsRequest(
+            await self._request(EditChatDefaultBannedRightsRequest(
                 peer=group_entity,
                 banned_rights=ChatBannedRights(
                     until_date=None,
@@ -121,8 +131,8 @@ class TelethonService:
 
 
             #Making host the admin 
-            host_entity = await self.client.get_entity(host_user.id)
-            await self.client(EditAdminRequest(
+            host_entity = await self._traced("get_entity", self.client.get_entity(host_user.id))
+            await self._request(EditAdminRequest(
                 channel=group_entity,
                 user_id=host_entity,
                 admin_rights=ChatAdminRights(
@@ -142,7 +152,7 @@ class TelethonService:
 
             
             # Generate invite link
-            invite = await self.client(ExportChatInviteRequest(group_entity))
+            invite = await self._request(ExportChatInviteRequest(group_entity))
             invite_link = invite.link
 
             welcome_message = (
@@ -163,15 +173,15 @@ class TelethonService:
     )
 
 
-            await self.client.send_message(
+            await self._traced("send_message", self.client.send_message(
                 entity=group_entity,
                 message=welcome_message,
                 parse_mode="markdown"
-            )
+            ))
 
 
             #Creator leaves the group after setup
-            await self.client(LeaveChannelRequest(group_entity))
+            await self._request(LeaveChannelRequest(group_entity))
 
             return {
                 "group_link": invite_link,
@@ -190,4 +200,6 @@ class TelethonService:
         if self.client:
             await self.client.disconnect()
 
+instrument_methods(TelethonService, TELETHON_CALL_SECONDS)
+
 telethon_service = TelethonService()
\ No newline at end of file
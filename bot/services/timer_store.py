@@ -0,0 +1,54 @@
+import json
+import sqlite3
+
+
+class TimerStore:
+    # Local SQLite copy of every pending timer so a restart can rebuild the
+    # schedule without reading Firestore
+
+    def __init__(self, path):
+        self.path = path
+        # Opened off the event loop at startup, then only used from the loop
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS timers ("
+            "game_id TEXT NOT NULL, kind TEXT NOT NULL, due REAL NOT NULL, payload TEXT, "
+            "PRIMARY KEY (game_id, kind))"
+        )
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self.conn.commit()
+
+    def save(self, game_id, kind, due, payload=None):
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO timers (game_id, kind, due, payload) VALUES (?, ?, ?, ?)",
+                (game_id, kind, due, json.dumps(payload) if payload is not None else None)
+            )
+
+    def delete(self, game_id, kind):
+        with self.conn:
+            self.conn.execute("DELETE FROM timers WHERE game_id = ? AND kind = ?", (game_id, kind))
+
+    def delete_many(self, keys):
+        with self.conn:
+            self.conn.executemany("DELETE FROM timers WHERE game_id = ? AND kind = ?", list(keys))
+
+    def load_all(self):
+        rows = self.conn.execute("SELECT game_id, kind, due, payload FROM timers")
+        return [
+            (game_id, kind, due, json.loads(payload) if payload is not None else None)
+            for game_id, kind, due, payload in rows
+        ]
+
+    def bootstrapped_names(self):
+        rows = self.conn.execute("SELECT key FROM meta WHERE key LIKE 'bootstrapped:%'")
+        return {key.split(":", 1)[1] for key, in rows}
+
+    def mark_bootstrapped(self, name):
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, '1')", (f"bootstrapped:{name}",))
+
+    def close(self):
+        self.conn.close()
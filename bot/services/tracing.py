@@ -0,0 +1,227 @@
+import asyncio
+import contextvars
+import json
+import logging
+import os
+import random
+import time
+import urllib.request
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+# Marks a trace that lost the sampling draw so its children are skipped too
+_UNSAMPLED = object()
+
+
+class Span:
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, name, trace_id, parent_id, attributes):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = attributes
+        self.error = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    @property
+    def duration(self):
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e9
+
+    def to_otlp(self):
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in self.attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def otlp_payload(spans, service_name):
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service_name}}]},
+            "scopeSpans": [{"scope": {"name": "bot.tracing"}, "spans": [span.to_otlp() for span in spans]}],
+        }]
+    }
+
+
+class FileSpanExporter:
+    # One OTLP/JSON document per line, readable by benchmarks/trace_report.py
+    # or replayable into a collector
+
+    def __init__(self, path):
+        self.path = path
+
+    def export(self, payload):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(payload) + "\n")
+
+
+class OtlpHttpSpanExporter:
+    # Posts OTLP/JSON to a collector's /v1/traces endpoint
+
+    def __init__(self, endpoint, timeout=5):
+        self.endpoint = endpoint
+        self.timeout = timeout
+
+    def export(self, payload):
+        request = urllib.request.Request(
+            self.endpoint,
+            data=json.dumps(payload).encode(),
+            headers={"Content-Type": "application/json"},
+            method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            pass
+
+
+class Tracer:
+    # Nested spans tracked through a contextvar, so they follow awaits and
+    # tasks created inside a span. Finished spans are buffered and exported
+    # from a worker thread. With no exporter every span is a no-op.
+
+    def __init__(self, exporter=None, sample_rate=1.0, service_name="bookliaobot", max_buffer=5000):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.service_name = service_name
+        self.max_buffer = max_buffer
+        self._finished = []
+        self._flush_task = None
+        self.dropped = 0
+
+    @property
+    def enabled(self):
+        return self.exporter is not None
+
+    def current_span(self):
+        span = _current_span.get()
+        return None if span is _UNSAMPLED else span
+
+    def _open(self, name, attributes, root):
+        parent = _current_span.get()
+        if parent is _UNSAMPLED:
+            return None
+        if parent is None:
+            # Instrumented calls only join an existing trace; handlers and
+            # explicit pipeline spans start new ones
+            if not root:
+                return None
+            if random.random() >= self.sample_rate:
+                return _UNSAMPLED
+            return Span(name, f"{random.getrandbits(128):032x}", None, attributes)
+        return Span(name, parent.trace_id, parent.span_id, attributes)
+
+    @contextmanager
+    def span(self, name, root=True, **attributes):
+        if not self.enabled:
+            yield None
+            return
+
+        span = self._open(name, attributes, root)
+        if span is None:
+            yield None
+            return
+
+        token = _current_span.set(span)
+        try:
+            yield None if span is _UNSAMPLED else span
+        except BaseException as e:
+            if span is not _UNSAMPLED:
+                span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current_span.reset(token)
+            if span is not _UNSAMPLED:
+                self._finish(span)
+
+    def record(self, name, start_ns, end_ns, error=None, **attributes):
+        # Adds an already-timed child span, for work that can't be wrapped
+        # in a with-block (e.g. a generator consumed by the caller)
+        if not self.enabled:
+            return
+        span = self._open(name, attributes, root=False)
+        if span is None or span is _UNSAMPLED:
+            return
+        span.start_ns = start_ns
+        span.error = error
+        self._finish(span, end_ns)
+
+    def _finish(self, span, end_ns=None):
+        span.end_ns = end_ns or time.time_ns()
+        if len(self._finished) >= self.max_buffer:
+            self.dropped += 1
+            return
+        self._finished.append(span)
+
+    def start(self, interval=5.0):
+        if self.enabled and (self._flush_task is None or self._flush_task.done()):
+            self._flush_task = asyncio.create_task(self._flush_loop(interval))
+
+    async def stop(self):
+        if self._flush_task:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        await self.flush()
+
+    async def _flush_loop(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            await self.flush()
+
+    async def flush(self):
+        if not self._finished or not self.enabled:
+            return 0
+        spans, self._finished = self._finished, []
+        try:
+            await asyncio.to_thread(self.exporter.export, otlp_payload(spans, self.service_name))
+        except Exception as e:
+            logger.warning("⚠️ Couldn't export %s spans: %s", len(spans), e)
+        return len(spans)
+
+
+TRACER = Tracer()
+
+
+def configure_tracing(tracer=TRACER):
+    # TRACE_EXPORT is "file:<path>" or an OTLP/HTTP endpoint such as
+    # http://localhost:4318/v1/traces; unset leaves tracing off
+    target = os.getenv("TRACE_EXPORT")
+    if not target:
+        return tracer
+    if target.startswith("file:"):
+        tracer.exporter = FileSpanExporter(target[len("file:"):])
+    else:
+        tracer.exporter = OtlpHttpSpanExporter(target)
+    tracer.sample_rate = float(os.getenv("TRACE_SAMPLE_RATE", "1.0"))
+    logger.info("🧭 Tracing enabled, exporting to %s", target)
+    return tracer
@@ -0,0 +1,178 @@
+import gzip
+import hashlib
+import hmac
+import json
+import logging
+import os
+import queue
+import re
+import secrets
+import threading
+import time
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Dropped outright wherever they appear
+_PRIVATE_KEYS = {
+    "last_name", "phone_number", "email", "vcard", "bio", "contact", "location",
+    "venue", "caption", "caption_entities", "photo", "small_photo", "big_photo",
+}
+_EMAIL = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+_PHONE = re.compile(r"\+?\d[\d\s-]{6,}\d")
+_MENTION = re.compile(r"@\w{4,}")
+_CHAT_TYPES = {"private", "group", "supergroup", "channel"}
+
+
+class UpdateScrubber:
+    # Strips personal data from an Update's JSON while keeping its shape, so
+    # a replay still walks the same handlers. User ids are swapped for keyed
+    # hashes: the same person keeps the same id across the stream, and their
+    # private chat keeps matching their user id. Bots and group chats keep
+    # their ids because the handlers look them up.
+
+    def __init__(self, salt=None):
+        self._key = (salt or secrets.token_hex(16)).encode()
+        self._pseudonyms = {}
+
+    def pseudonym(self, user_id):
+        if user_id not in self._pseudonyms:
+            digest = hmac.new(self._key, str(user_id).encode(), hashlib.sha256).digest()
+            self._pseudonyms[user_id] = int.from_bytes(digest[:6], "big") + 1
+        return self._pseudonyms[user_id]
+
+    def scrub(self, data):
+        return self._scrub(data, keep_text=self._is_private_user_message(data))
+
+    def _scrub(self, value, keep_text=False):
+        if isinstance(value, list):
+            return [self._scrub(item, keep_text) for item in value]
+        if not isinstance(value, dict):
+            return value
+
+        if "is_bot" in value:
+            return self._user(value)
+        if value.get("type") in _CHAT_TYPES and "id" in value:
+            return self._chat(value)
+
+        scrubbed = {}
+        for key, item in value.items():
+            if key in _PRIVATE_KEYS:
+                continue
+            if key == "chat_instance":
+                scrubbed[key] = str(self.pseudonym(item))
+            elif key in ("message", "edited_message", "reply_to_message", "pinned_message"):
+                scrubbed[key] = self._scrub(item, keep_text=self._is_private_user_message(item))
+            else:
+                scrubbed[key] = self._scrub(item, keep_text)
+
+        if "text" in scrubbed:
+            scrubbed["text"], entities = self._text(scrubbed["text"], scrubbed.get("entities"), keep_text)
+            scrubbed.pop("entities", None)
+            if entities:
+                scrubbed["entities"] = entities
+        return scrubbed
+
+    def _user(self, user):
+        if user.get("is_bot"):
+            return {key: item for key, item in user.items() if key not in _PRIVATE_KEYS}
+        user_id = self.pseudonym(user["id"])
+        scrubbed = {"id": user_id, "is_bot": False, "first_name": f"User {user_id}", "username": f"user{user_id}"}
+        if "language_code" in user:
+            scrubbed["language_code"] = user["language_code"]
+        return scrubbed
+
+    def _chat(self, chat):
+        if chat["type"] != "private":
+            scrubbed = {key: item for key, item in chat.items() if key not in _PRIVATE_KEYS}
+            if "title" in scrubbed:
+                scrubbed["title"] = f"Chat {chat['id']}"
+            return scrubbed
+        chat_id = self.pseudonym(chat["id"])
+        return {"id": chat_id, "type": "private", "first_name": f"User {chat_id}", "username": f"user{chat_id}"}
+
+    @staticmethod
+    def _is_private_user_message(message):
+        # What people type to the bot drives the conversations (dates, times,
+        # venues), so it is kept; group chatter and the bot's own messages,
+        # which list player names, are not
+        if not isinstance(message, dict):
+            return False
+        chat = message.get("chat") or {}
+        sender = message.get("from") or {}
+        return chat.get("type") == "private" and not sender.get("is_bot", True)
+
+    @staticmethod
+    def _text(text, entities, keep_text):
+        if keep_text:
+            # Offsets would no longer line up after redaction
+            redacted = _MENTION.sub("@user", _PHONE.sub("[phone]", _EMAIL.sub("[email]", text)))
+            return redacted, entities if redacted == text else None
+        if text.startswith("/"):
+            command = text.split()[0]
+            return command, [{"type": "bot_command", "offset": 0, "length": len(command)}]
+        return "[redacted]", None
+
+
+class UpdateRecorder:
+    # Appends scrubbed updates with their arrival time to a gzipped JSON
+    # lines file. Serialising and compressing run on a writer thread so
+    # recording adds no disk I/O to the event loop.
+
+    def __init__(self, path, salt=None):
+        self.path = path
+        self.scrubber = UpdateScrubber(salt)
+        self.recorded = 0
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+
+    @classmethod
+    def in_directory(cls, directory, salt=None):
+        os.makedirs(directory, exist_ok=True)
+        name = f"updates-{datetime.now().strftime('%Y%m%d-%H%M%S')}.jsonl.gz"
+        return cls(os.path.join(directory, name), salt)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._write, name="update-recorder", daemon=True)
+            self._thread.start()
+
+    def close(self, timeout=5.0):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout)
+            self._thread = None
+
+    async def record(self, update, context):
+        try:
+            self._queue.put({"t": round(time.time(), 3), "update": self.scrubber.scrub(update.to_dict())})
+            self.recorded += 1
+        except Exception as e:
+            logger.warning("⚠️ Couldn't record update %s: %s", update.update_id, e)
+
+    def _write(self):
+        with gzip.open(self.path, "at", encoding="utf-8") as f:
+            while True:
+                entry = self._queue.get()
+                if entry is None:
+                    return
+                f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+                # Flushing once the queue is drained keeps the file readable
+                # up to the last update if the bot is killed
+                if self._queue.empty():
+                    f.flush()
+
+
+def read_recording(path):
+    # Yields (timestamp, update dict) pairs. A file cut off mid-write, e.g.
+    # by a crash, is read up to the last complete line.
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        try:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    return
+                yield entry["t"], entry["update"]
+        except EOFError:
+            return
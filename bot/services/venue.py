@@ -1,9 +1,12 @@
 import re
 from typing import Dict, List, Optional
 from rapidfuzz import fuzz, process
-import spacy 
+from ..utils import lazy_import
 from collections import defaultdict
 
+# spaCy and its model take most of a cold start; load them on first use
+spacy = lazy_import("spacy")
+
 class VenueNormalizer:
     def __init__(self):
         self.nlp = spacy.load("en_core_web_sm")
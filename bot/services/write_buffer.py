@@ -0,0 +1,153 @@
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer:
+    # Collects field updates per document and writes them later in batched
+    # commits. Repeated updates to the same field collapse into one write,
+    # and Increment/ArrayUnion/ArrayRemove values are merged rather than
+    # overwritten so no delta is lost.
+
+    MAX_BATCH_WRITES = 500
+
+    def __init__(self, client, firestore, max_pending=50, flush_interval=2.0):
+        self.client = client
+        self.firestore = firestore
+        self.max_pending = max_pending
+        self.flush_interval = flush_interval
+
+        self._pending = {}
+        self._oldest = None
+        self.stats = {"staged": 0, "merged": 0, "flushes": 0, "writes": 0, "failures": 0}
+
+    @property
+    def pending_count(self):
+        return len(self._pending)
+
+    def stage(self, collection, doc_id, fields):
+        key = (collection, doc_id)
+        pending = self._pending.get(key)
+        self.stats["staged"] += 1
+
+        if pending is None:
+            self._pending[key] = dict(fields)
+        else:
+            for field, value in fields.items():
+                if field not in pending:
+                    pending[field] = value
+                    continue
+                merged = self._merge(pending[field], value)
+                if merged is None:
+                    # Two transforms that can't be combined: write what we
+                    # have first so they're applied in order
+                    self.flush_document(collection, doc_id)
+                    pending = self._pending.setdefault(key, {})
+                    pending[field] = value
+                    continue
+                pending[field] = merged
+                self.stats["merged"] += 1
+
+        if self._oldest is None:
+            self._oldest = time.monotonic()
+        if self.is_due():
+            self.flush()
+
+    def is_due(self, now=None):
+        if not self._pending:
+            return False
+        now = now if now is not None else time.monotonic()
+        return len(self._pending) >= self.max_pending or now - self._oldest >= self.flush_interval
+
+    def overlay(self, collection, doc_id, data):
+        # Applies pending writes on top of data read from Firestore so
+        # callers see their own writes before they are flushed
+        pending = self._pending.get((collection, doc_id))
+        if not pending or data is None:
+            return data
+
+        data = dict(data)
+        for field, value in pending.items():
+            data[field] = self._apply(data.get(field), value)
+        return data
+
+    def flush_document(self, collection, doc_id):
+        fields = self._pending.pop((collection, doc_id), None)
+        if fields:
+            self._write_one(collection, doc_id, fields)
+        if not self._pending:
+            self._oldest = None
+
+    def flush(self):
+        if not self._pending:
+            return 0
+
+        pending, self._pending = self._pending, {}
+        self._oldest = None
+        self.stats["flushes"] += 1
+
+        items = list(pending.items())
+        written = 0
+        for start in range(0, len(items), self.MAX_BATCH_WRITES):
+            chunk = items[start:start + self.MAX_BATCH_WRITES]
+            try:
+                batch = self.client.batch()
+                for (collection, doc_id), fields in chunk:
+                    batch.update(self.client.collection(collection).document(doc_id), fields)
+                batch.commit()
+                written += len(chunk)
+                self.stats["writes"] += len(chunk)
+            except Exception as e:
+                # One missing document fails the whole batch; retry the
+                # chunk one document at a time
+                logger.warning("⚠️ Batched write of %s documents failed, retrying individually: %s", len(chunk), e)
+                for (collection, doc_id), fields in chunk:
+                    if self._write_one(collection, doc_id, fields):
+                        written += 1
+
+        logger.debug("💾 Flushed %s buffered document updates", written)
+        return written
+
+    def _write_one(self, collection, doc_id, fields):
+        try:
+            self.client.collection(collection).document(doc_id).update(fields)
+            self.stats["writes"] += 1
+            return True
+        except Exception as e:
+            self.stats["failures"] += 1
+            logger.error("❌ Error writing buffered update for %s/%s: %s", collection, doc_id, e)
+            return False
+
+    def _merge(self, current, value):
+        Increment = self.firestore.Increment
+        ArrayUnion = self.firestore.ArrayUnion
+        ArrayRemove = self.firestore.ArrayRemove
+
+        if isinstance(value, Increment):
+            if isinstance(current, Increment):
+                return Increment(current.value + value.value)
+            if isinstance(current, (int, float)) and not isinstance(current, bool):
+                return current + value.value
+            return None
+
+        if isinstance(value, (ArrayUnion, ArrayRemove)):
+            if isinstance(current, list):
+                return self._apply(current, value)
+            if type(current) is type(value):
+                values = list(current.values)
+                values += [item for item in value.values if item not in values]
+                return type(value)(values)
+            return None
+
+        return value
+
+    def _apply(self, current, value):
+        if isinstance(value, self.firestore.Increment):
+            return (current or 0) + value.value
+        if isinstance(value, self.firestore.ArrayUnion):
+            current = list(current or [])
+            return current + [item for item in value.values if item not in current]
+        if isinstance(value, self.firestore.ArrayRemove):
+            return [item for item in (current or []) if item not in value.values]
+        return value
@@ -1,6 +1,7 @@
 from .datetime_helper import DateTimeHelper, is_game_expired
 from .groupid_helper import GroupIdHelper
 from .validation_helper import ValidationHelper, validate_date_format, parse_time_input, convert_to_24_hour
+from .lazy_import import LazyModule, lazy_import
 
 __all__ = [
     'DateTimeHelper',
@@ -9,5 +10,7 @@ __all__ = [
     'validate_date_format',
     'parse_time_input',
     'convert_to_24_hour',
-    'is_game_expired'
+    'is_game_expired',
+    'LazyModule',
+    'lazy_import'
 ]
\ No newline at end of file
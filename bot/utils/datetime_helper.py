@@ -1,6 +1,9 @@
+import logging
 import pytz
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
 
 class DateTimeHelper:
     
@@ -22,7 +25,7 @@ class DateTimeHelper:
             sg_tz = DateTimeHelper.get_singapore_timezone()
             return sg_tz.localize(game_datetime)
         except Exception as e:
-            print(f"Error parsing game datetime: {e}")
+            logger.error("Error parsing game datetime: %s", e)
             return None
     
     @staticmethod
@@ -35,7 +38,7 @@ class DateTimeHelper:
             now = DateTimeHelper.get_current_singapore_time()
             return now > game_end
         except Exception as e:
-            print(f"Error checking if game expired: {e}")
+            logger.error("Error checking if game expired: %s", e)
             return False
     
     @staticmethod
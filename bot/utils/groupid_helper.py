@@ -1,3 +1,7 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
 class GroupIdHelper:
 
     @staticmethod
@@ -54,7 +58,7 @@ class GroupIdHelper:
                 # Fallback
                 return int(stored_group_id)
         except (ValueError, TypeError):
-            print(f"Warning: Could not convert group ID {stored_group_id}")
+            logger.warning("Could not convert group ID %s", stored_group_id)
             return stored_group_id
     
     @staticmethod
@@ -63,4 +67,4 @@ class GroupIdHelper:
     
     @staticmethod
     def log_group_conversion(original_id, converted_id, operation="conversion"):
-        print(f"🔄 Group ID {operation}: {original_id} -> {converted_id}")
\ No newline at end of file
+        logger.debug("🔄 Group ID %s: %s -> %s", operation, original_id, converted_id)
\ No newline at end of file
@@ -0,0 +1,21 @@
+import importlib
+
+
+class LazyModule:
+    # Stands in for a module and imports it on first attribute access, so
+    # heavy dependencies only load in processes that actually use them.
+    # The module is looked up in sys.modules on every access, which keeps
+    # it cheap once loaded and lets tests swap the module out.
+
+    def __init__(self, name):
+        self._name = name
+
+    def __getattr__(self, attr):
+        return getattr(importlib.import_module(self._name), attr)
+
+    def __repr__(self):
+        return f"<lazy module '{self._name}'>"
+
+
+def lazy_import(name):
+    return LazyModule(name)
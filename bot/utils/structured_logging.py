@@ -0,0 +1,168 @@
+import atexit
+import contextvars
+import json
+import logging
+import os
+import queue
+import sys
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener
+
+# Fields describing the update being handled, attached to every record
+# logged while it is in progress
+CONTEXT_FIELDS = ("update_id", "user_id", "chat_id", "game_id", "handler")
+
+_log_context = contextvars.ContextVar("log_context", default={})
+
+
+@contextmanager
+def log_context(**fields):
+    token = _log_context.set({**_log_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _log_context.reset(token)
+
+
+def bind_log_context(**fields):
+    # Replaces the context for the rest of the current task, used once per update
+    _log_context.set({name: value for name, value in fields.items() if value is not None})
+
+
+def add_log_context(**fields):
+    # Adds fields for the rest of the current task, e.g. once the game is known
+    _log_context.set({**_log_context.get(), **fields})
+
+
+def current_log_context():
+    return _log_context.get()
+
+
+class ContextFilter(logging.Filter):
+    # Runs in the caller's task before the record is queued, so the context
+    # seen here is the handler's own; it is copied onto the record
+    def filter(self, record):
+        for name, value in _log_context.get().items():
+            if not hasattr(record, name):
+                setattr(record, name, value)
+        return True
+
+
+class DebugSampler(logging.Filter):
+    # Lets through one in every `every` debug records per call site so
+    # per-event debug lines stay affordable when enabled
+    def __init__(self, every=1):
+        super().__init__()
+        self.every = max(1, int(every))
+        self._counts = {}
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG or self.every == 1:
+            return True
+        key = (record.pathname, record.lineno)
+        count = self._counts.get(key, 0)
+        self._counts[key] = count + 1
+        if count % self.every:
+            return False
+        record.sampled = self.every
+        return True
+
+
+class DeferredQueueHandler(QueueHandler):
+    # The stock QueueHandler formats the whole record before queueing it.
+    # Records only cross threads in this process, so only the message is
+    # rendered here, while its arguments can't change underneath it; the
+    # rest of the formatting is left to the listener thread.
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for name in CONTEXT_FIELDS + ("sampled",):
+            value = getattr(record, name, None)
+            if value is not None:
+                entry[name] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def format(self, record):
+        line = super().format(record)
+        fields = " ".join(
+            f"{name}={getattr(record, name)}" for name in CONTEXT_FIELDS if getattr(record, name, None) is not None
+        )
+        return f"{line} [{fields}]" if fields else line
+
+
+def parse_module_levels(spec):
+    # "bot.handlers.membertracking=DEBUG,telegram=WARNING"
+    levels = {}
+    for item in (spec or "").split(","):
+        if "=" not in item:
+            continue
+        name, level = item.split("=", 1)
+        levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+_listener = None
+
+
+def setup_logging(level=None, module_levels=None, fmt=None, debug_sample_every=None, stream=None):
+    # Records go onto an in-memory queue; a listener thread formats them
+    # and does the I/O so the event loop never blocks on stdout
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    level = level or os.getenv("LOG_LEVEL", "INFO")
+    # httpx logs every Bot API request at INFO
+    module_levels = module_levels if module_levels is not None else parse_module_levels(
+        os.getenv("LOG_LEVELS", "httpx=WARNING,apscheduler=WARNING")
+    )
+    fmt = fmt or os.getenv("LOG_FORMAT", "json")
+    debug_sample_every = debug_sample_every or int(os.getenv("LOG_DEBUG_SAMPLE_EVERY", "10"))
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(DebugSampler(debug_sample_every))
+    queue_handler.addFilter(ContextFilter())
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(queue_handler)
+    root.setLevel(level.upper())
+    for name, module_level in module_levels.items():
+        logging.getLogger(name).setLevel(module_level)
+
+    _listener = QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+    return _listener
+
+
+def stop_logging():
+    # Drains the queue so records logged during shutdown are written
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
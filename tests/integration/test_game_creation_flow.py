@@ -289,6 +289,7 @@ class TestGameCreationFlow:
             })
             
             # Mock database save
+            mock_context.bot_data['db'].get_creation_record.return_value = None
             mock_context.bot_data['db'].save_game.return_value = "test_game_id"
             mock_context.bot_data['db'].update_game = MagicMock()
 
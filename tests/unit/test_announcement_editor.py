@@ -0,0 +1,139 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, Mock
+import sys
+import os
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from telegram.error import RetryAfter, BadRequest
+from bot.services.announcement_editor import AnnouncementEditor
+
+class TestAnnouncementEditor:
+
+    @pytest.fixture
+    def mock_bot(self):
+        bot = Mock()
+        bot.edit_message_text = AsyncMock()
+        return bot
+
+    @pytest.fixture
+    def editor(self, mock_bot):
+        return AnnouncementEditor(mock_bot, "@channel", window=0.05)
+
+    @pytest.mark.asyncio
+    async def test_burst_is_coalesced_into_one_edit(self, editor, mock_bot):
+        for count in range(1, 16):
+            await editor.submit(987, f"👥 Players: {count}")
+
+        assert editor.pending_count == 1
+        await asyncio.sleep(0.1)
+
+        mock_bot.edit_message_text.assert_called_once()
+        assert mock_bot.edit_message_text.call_args[1]["text"] == "👥 Players: 15"
+        assert editor.pending_count == 0
+
+    @pytest.mark.asyncio
+    async def test_unchanged_content_is_skipped(self, editor, mock_bot):
+        await editor.submit(987, "👥 Players: 3")
+        await asyncio.sleep(0.1)
+        await editor.submit(987, "👥 Players: 3")
+        await asyncio.sleep(0.1)
+
+        mock_bot.edit_message_text.assert_called_once()
+        assert editor.stats["skipped"] == 1
+
+    @pytest.mark.asyncio
+    async def test_immediate_edit_supersedes_pending_edit(self, editor, mock_bot):
+        await editor.submit(987, "👥 Players: 4")
+        await editor.submit(987, "❌ CANCELLED", immediate=True)
+        await asyncio.sleep(0.1)
+
+        mock_bot.edit_message_text.assert_called_once()
+        assert mock_bot.edit_message_text.call_args[1]["text"] == "❌ CANCELLED"
+
+    @pytest.mark.asyncio
+    async def test_retries_after_flood_limit(self, editor, mock_bot):
+        mock_bot.edit_message_text.side_effect = [RetryAfter(0), None]
+
+        assert await editor.submit(987, "👥 Players: 5", immediate=True)
+        await asyncio.sleep(0.01)
+        assert mock_bot.edit_message_text.call_count == 2
+        assert editor.stats["retries"] == 1
+
+    @pytest.mark.asyncio
+    async def test_submit_during_flood_wait_is_not_overwritten_by_retry(self, editor, mock_bot):
+        mock_bot.edit_message_text.side_effect = [RetryAfter(0.1), None, None]
+
+        await editor.submit(987, "👥 Players: 5", immediate=True)
+        await asyncio.sleep(0.02)
+        await editor.submit(987, "🚫 Game cancelled", immediate=True)
+        await asyncio.sleep(0.15)
+
+        texts = [call[1]["text"] for call in mock_bot.edit_message_text.call_args_list]
+        assert texts == ["👥 Players: 5", "🚫 Game cancelled"]
+        assert editor.pending_count == 0
+
+    @pytest.mark.asyncio
+    async def test_not_modified_counts_as_success(self, editor, mock_bot):
+        mock_bot.edit_message_text.side_effect = BadRequest("Message is not modified")
+
+        await editor.submit(987, "👥 Players: 5")
+        await asyncio.sleep(0.1)
+        await editor.submit(987, "👥 Players: 5")
+        await asyncio.sleep(0.1)
+
+        mock_bot.edit_message_text.assert_called_once()
+        assert editor.stats["failures"] == 0
+
+    @pytest.mark.asyncio
+    async def test_flush_all_survives_timers_firing_mid_flush(self, editor, mock_bot):
+        async def slow_edit(**kwargs):
+            await asyncio.sleep(0.1)
+        mock_bot.edit_message_text.side_effect = slow_edit
+
+        await editor.submit(1, "👥 Players: 2")
+        await asyncio.sleep(0.04)
+        await editor.submit(2, "👥 Players: 3")
+        await editor.submit(3, "👥 Players: 4")
+
+        await editor.flush_all()
+        await asyncio.sleep(0.1)
+
+        edited = sorted(call[1]["message_id"] for call in mock_bot.edit_message_text.call_args_list)
+        assert edited == [1, 2, 3]
+        assert editor.pending_count == 0
+
+    @pytest.mark.asyncio
+    async def test_final_edit_waits_for_an_edit_in_flight(self, editor, mock_bot):
+        started, sent = [], []
+        release = asyncio.Event()
+
+        async def edit_message_text(**kwargs):
+            started.append(kwargs["text"])
+            if len(started) == 1:
+                await release.wait()
+            sent.append(kwargs["text"])
+
+        mock_bot.edit_message_text.side_effect = edit_message_text
+        await editor.submit(987, "👥 Players: 4")
+        await asyncio.sleep(0.1)
+
+        final = asyncio.create_task(editor.submit(987, "❌ CANCELLED", immediate=True))
+        await asyncio.sleep(0.01)
+        release.set()
+        await final
+
+        assert started == sent == ["👥 Players: 4", "❌ CANCELLED"]
+
+    @pytest.mark.asyncio
+    async def test_state_is_dropped_after_the_final_edit(self, editor, mock_bot):
+        await editor.submit(987, "👥 Players: 4")
+        await asyncio.sleep(0.1)
+        await editor.submit(987, "❌ CANCELLED", immediate=True)
+
+        assert editor._desired == {}
+        assert editor._sent_hashes == {}
+        assert editor._locks == {}
@@ -152,6 +152,39 @@ class TestGameDatabase:
         assert result[0]["sport"] == "Football"
 
 
+    @pytest.mark.asyncio
+    async def test_expiry_sweep_falls_back_to_open_games_daily(self, database):
+        legacy_doc = MagicMock()
+        legacy_doc.id = "legacy123"
+        legacy_doc.to_dict.return_value = {"status": "open", "date": "25/12/2099", "end_time_24": "16:00"}
+        open_query = MagicMock()
+        open_query.stream.return_value = [legacy_doc]
+        database.mock_collection.where.return_value = open_query
+
+        await database.close_expired_games(MagicMock())
+
+        # The first sweep reads every open game and backfills end_at
+        open_query.where.assert_not_called()
+        assert legacy_doc.reference.update.call_args[0][0]["end_at"].year == 2099
+
+        await database.close_expired_games(MagicMock())
+
+        # Later sweeps only range-query end_at
+        open_query.where.return_value.stream.assert_called_once()
+        legacy_doc.reference.update.assert_called_once()
+
+
+    def test_creation_record_errors_are_raised(self, database):
+        # A creation that can't record its progress must not carry on
+        database.mock_document.set.side_effect = RuntimeError("Firestore unavailable")
+        database.mock_document.get.side_effect = RuntimeError("Firestore unavailable")
+
+        with pytest.raises(RuntimeError):
+            database.update_creation_record("key1", {"status": "group_created"})
+        with pytest.raises(RuntimeError):
+            database.get_creation_record("key1")
+
+
     def test_check_game_expired(self, database):
         game_data = {
             "date": "25/12/2025",
@@ -0,0 +1,67 @@
+import pytest
+from unittest.mock import AsyncMock, Mock
+import sys
+import os
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from bot.services.expiry import ExpiryService, EXPIRY_KIND
+from bot.services.reminder_engine import ReminderEngine
+from bot.utils import DateTimeHelper
+
+class TestExpiryService:
+
+    @pytest.fixture
+    def engine(self):
+        return ReminderEngine()
+
+    @pytest.fixture
+    def mock_db(self):
+        db = Mock()
+        db.expire_games = AsyncMock(return_value=[{"id": "g1", "group_id": "123"}])
+        db.get_all_open_games = AsyncMock(return_value=[
+            {"id": "g1", "date": "25/12/2030", "end_time_24": "16:00"},
+            {"id": "g2", "date": "bad", "end_time_24": "16:00"},
+        ])
+        return db
+
+    def test_expiry_timer_is_set_at_game_end(self, engine, mock_db):
+        expiry = ExpiryService(mock_db, engine)
+
+        assert expiry.schedule_game_expiry({"date": "25/12/2030", "end_time_24": "16:00"}, "g1")
+
+        game_end = DateTimeHelper.parse_game_datetime("25/12/2030", "16:00")
+        assert engine.due_time("g1", EXPIRY_KIND) == game_end.timestamp()
+
+        expiry.cancel_game_expiry("g1")
+        assert len(engine) == 0
+
+    @pytest.mark.asyncio
+    async def test_due_games_are_closed_and_untracked(self, engine, mock_db):
+        expiry = ExpiryService(mock_db, engine)
+        context = Mock()
+        scheduler = Mock()
+        ledger = Mock()
+        context.bot_data = {'member_sync_scheduler': scheduler, 'membership_ledger': ledger}
+        engine.start(context)
+
+        engine.schedule("g1", EXPIRY_KIND, 100)
+        engine.schedule("g2", EXPIRY_KIND, 10_000)
+        await engine.fire_due(200)
+        await engine.stop()
+
+        mock_db.expire_games.assert_awaited_once_with(context, ["g1"])
+        scheduler.untrack.assert_called_once_with("g1")
+        ledger.forget.assert_called_once_with("123")
+
+    @pytest.mark.asyncio
+    async def test_existing_games_are_scheduled_once(self, engine, mock_db):
+        expiry = ExpiryService(mock_db, engine)
+
+        await expiry.schedule_all_existing(Mock())
+        await expiry.schedule_all_existing(Mock())
+
+        mock_db.get_all_open_games.assert_awaited_once()
+        assert len(engine) == 1
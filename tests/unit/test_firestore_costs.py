@@ -0,0 +1,65 @@
+import pytest
+from unittest.mock import MagicMock
+import sys
+import os
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from bot.services.firestore_costs import CountingClient, FirestoreCostLedger
+from bot.utils.structured_logging import log_context
+
+class TestFirestoreCosts:
+
+    @pytest.fixture
+    def ledger(self):
+        return FirestoreCostLedger()
+
+    @pytest.fixture
+    def client(self, ledger):
+        raw = MagicMock()
+        raw.collection.return_value.where.return_value.stream.return_value = [MagicMock() for _ in range(40)]
+        return CountingClient(raw, ledger), raw
+
+    def test_query_reads_are_attributed_to_the_handler(self, ledger, client):
+        client, _ = client
+
+        with log_context(handler="show_results", update_id=101):
+            games = list(client.collection("game").where("status", "==", "open").stream())
+        with log_context(handler="job:periodic_member_sync"):
+            client.collection("game").document("g1").get()
+
+        assert len(games) == 40
+        assert ledger.totals["show_results"]["reads"] == 40
+        assert ledger.totals["job:periodic_member_sync"]["reads"] == 1
+        assert ledger.update_cost(101) == {"source": "show_results", "reads": 40, "writes": 0, "deletes": 0}
+
+    def test_writes_through_snapshots_and_batches_are_counted(self, ledger, client):
+        client, raw = client
+
+        with log_context(handler="job:cleanup_expired_games"):
+            for game in client.collection("game").where("status", "==", "open").stream():
+                game.reference.update({"status": "closed"})
+                break
+            batch = client.batch()
+            batch.update(client.collection("game").document("g1"), {"player_count": 3})
+            batch.delete(client.collection("game").document("g2"))
+            batch.commit()
+
+        counts = ledger.totals["job:cleanup_expired_games"]
+        assert counts == {"reads": 1, "writes": 2, "deletes": 1}
+        # The underlying batch gets the real document references
+        assert raw.batch.return_value.update.call_args[0][0] is raw.collection.return_value.document.return_value
+
+    def test_report_lists_top_sources(self, ledger, client):
+        client, _ = client
+        with log_context(handler="handle_navigation", update_id=7):
+            list(client.collection("game").where("status", "==", "open").stream())
+        with log_context(handler="save_game"):
+            client.collection("game").document().set({})
+
+        report = ledger.report()
+        assert "Total: 40 reads, 1 writes, 0 deletes" in report
+        assert report.index("handle_navigation") < report.index("save_game")
+        assert "update 7 (handle_navigation): 40 reads" in report
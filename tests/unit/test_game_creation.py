@@ -0,0 +1,78 @@
+import asyncio
+import pytest
+from unittest.mock import Mock
+import sys
+import os
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from bot.services.game_creation import GameCreationService
+
+class TestGameCreationService:
+
+    @pytest.fixture
+    def mock_db(self):
+        db = Mock()
+        db.get_creation_record = Mock(return_value=None)
+        db.update_creation_record = Mock()
+        return db
+
+    @pytest.fixture
+    def creation_service(self, mock_db):
+        return GameCreationService(mock_db)
+
+    @pytest.mark.asyncio
+    async def test_duplicate_confirm_attaches_to_in_flight_creation(self, creation_service):
+        calls = 0
+        release = asyncio.Event()
+
+        async def operation():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return "created"
+
+        first = asyncio.create_task(creation_service.run("key1", operation))
+        second = asyncio.create_task(creation_service.run("key1", operation))
+        await asyncio.sleep(0)
+
+        assert creation_service.is_in_flight("key1")
+        release.set()
+
+        assert await first == "created"
+        assert await second == "created"
+        assert calls == 1
+        assert not creation_service.is_in_flight("key1")
+
+    @pytest.mark.asyncio
+    async def test_failed_creation_can_be_retried(self, creation_service):
+        attempts = []
+
+        async def operation():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise RuntimeError("flaky network")
+            return "created"
+
+        with pytest.raises(RuntimeError):
+            await creation_service.run("key1", operation)
+
+        assert await creation_service.run("key1", operation) == "created"
+        assert len(attempts) == 2
+
+    def test_record_persists_only_new_fields(self, creation_service, mock_db):
+        mock_db.get_creation_record.return_value = {"status": "group_created", "group_id": 42}
+
+        record = creation_service.load("key1")
+        record = creation_service.record("key1", record, status="saved", game_id="game123")
+
+        assert record == {"status": "saved", "group_id": 42, "game_id": "game123"}
+        mock_db.update_creation_record.assert_called_once_with(
+            "key1", {"status": "saved", "game_id": "game123"}
+        )
+
+    def test_load_missing_record(self, creation_service):
+        assert creation_service.load("unknown") == {}
+        assert len(GameCreationService.new_key()) == 32
@@ -0,0 +1,34 @@
+import pytest
+import sys
+import os
+import types
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from bot.utils.lazy_import import lazy_import
+
+class TestLazyImport:
+
+    def test_module_is_imported_on_first_attribute_access(self, monkeypatch):
+        proxy = lazy_import("fake_heavy_dependency")
+
+        fake_module = types.ModuleType("fake_heavy_dependency")
+        fake_module.load = lambda name: f"loaded {name}"
+        monkeypatch.setitem(sys.modules, "fake_heavy_dependency", fake_module)
+
+        assert proxy.load("model") == "loaded model"
+
+    def test_missing_module_fails_on_use_not_on_import(self):
+        proxy = lazy_import("module_that_is_not_installed")
+
+        with pytest.raises(ModuleNotFoundError):
+            proxy.load
+
+    def test_services_package_resolves_exports_on_demand(self):
+        import bot.services
+
+        assert bot.services.ReminderService.__name__ == "ReminderService"
+        with pytest.raises(AttributeError):
+            bot.services.NotAService
@@ -0,0 +1,53 @@
+import asyncio
+import logging
+import time
+import pytest
+import sys
+import os
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from bot.services.loop_monitor import LoopLagMonitor
+from bot.services.metrics import SLOW_CALLBACKS, _attributed
+
+def stream_all_open_games():
+    # Stands in for a synchronous Firestore stream inside a handler
+    time.sleep(0.3)
+
+async def show_filter_options(update, context):
+    stream_all_open_games()
+
+class TestLoopLagMonitor:
+
+    @pytest.mark.asyncio
+    async def test_blocking_handler_is_named_in_slow_callback_report(self, caplog):
+        monitor = LoopLagMonitor(interval=0.01, threshold=0.05)
+        handler = _attributed(show_filter_options, show_filter_options)
+        before = SLOW_CALLBACKS.value(handler="show_filter_options")
+
+        with caplog.at_level(logging.WARNING, logger="bot.services.loop_monitor"):
+            monitor.start()
+            await asyncio.sleep(0.03)
+            await handler(None, None)
+            await asyncio.sleep(0.05)
+            await monitor.stop()
+
+        assert monitor.slow_callbacks == 1
+        assert SLOW_CALLBACKS.value(handler="show_filter_options") == before + 1
+        report = next(record.getMessage() for record in caplog.records if "Slow callback" in record.getMessage())
+        assert "in show_filter_options" in report
+        assert "stream_all_open_games" in report
+
+    @pytest.mark.asyncio
+    async def test_quiet_loop_reports_nothing(self, caplog):
+        monitor = LoopLagMonitor(interval=0.01, threshold=0.2)
+
+        with caplog.at_level(logging.WARNING, logger="bot.services.loop_monitor"):
+            monitor.start()
+            await asyncio.sleep(0.1)
+            await monitor.stop()
+
+        assert monitor.slow_callbacks == 0
+        assert not caplog.records
@@ -0,0 +1,66 @@
+import pytest
+import sys
+import os
+from datetime import timedelta
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from bot.services.member_sync import MemberSyncScheduler
+from bot.utils import DateTimeHelper
+
+def make_game(game_id, hours_from_now):
+    start = DateTimeHelper.get_current_singapore_time() + timedelta(hours=hours_from_now)
+    return {
+        "id": game_id,
+        "group_id": f"group_{game_id}",
+        "date": start.strftime("%d/%m/%Y"),
+        "start_time_24": start.strftime("%H:%M"),
+    }
+
+class TestMemberSyncScheduler:
+
+    @pytest.fixture
+    def scheduler(self):
+        return MemberSyncScheduler(calls_per_second=1, calls_per_game=3, burst_seconds=6)
+
+    def test_new_games_are_due_immediately_within_budget(self, scheduler):
+        games = [make_game(f"game{i}", 48) for i in range(5)]
+        scheduler.refresh(games, now=0)
+
+        # Budget of 6 calls covers two games of 3 calls each
+        assert len(scheduler.pop_due(now=0)) == 2
+        assert scheduler.pop_due(now=0) == []
+        # Three more calls accrue after three seconds
+        assert len(scheduler.pop_due(now=3)) == 1
+
+    def test_interval_depends_on_start_time(self, scheduler):
+        scheduler.track(make_game("soon", 1), now=0)
+        scheduler.track(make_game("later", 12), now=0)
+        scheduler.track(make_game("far", 24 * 7), now=0)
+
+        assert scheduler.next_interval("soon") == MemberSyncScheduler.STARTING_SOON_INTERVAL
+        assert scheduler.next_interval("later") == MemberSyncScheduler.TODAY_INTERVAL
+        assert scheduler.next_interval("far") == MemberSyncScheduler.QUIET_INTERVAL
+
+    def test_join_activity_pulls_next_check_forward(self, scheduler):
+        game = make_game("far", 24 * 7)
+        scheduler.track(game, now=0)
+        assert scheduler.pop_due(now=MemberSyncScheduler.ACTIVE_INTERVAL) == []
+
+        scheduler.note_activity(game, now=10)
+        due = scheduler.pop_due(now=10 + MemberSyncScheduler.ACTIVE_INTERVAL)
+        assert [g["id"] for g in due] == ["far"]
+
+        # Recently active games keep the short interval after reconciling
+        assert scheduler.next_interval("far", now=200) == MemberSyncScheduler.ACTIVE_INTERVAL
+
+    def test_refresh_drops_closed_games(self, scheduler):
+        scheduler.refresh([make_game("a", 48), make_game("b", 48)], now=0)
+        scheduler.refresh([make_game("a", 48)], now=10)
+
+        assert len(scheduler) == 1
+        assert [g["id"] for g in scheduler.pop_due(now=10)] == ["a"]
+        assert not scheduler.needs_refresh(now=20)
+        assert scheduler.needs_refresh(now=10 + scheduler.refresh_interval)
@@ -0,0 +1,98 @@
+import pytest
+import sys
+import os
+from datetime import datetime, timedelta, timezone
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from bot.services.membership import MembershipLedger
+
+class TestMembershipLedger:
+
+    @pytest.fixture
+    def ledger(self):
+        ledger = MembershipLedger()
+        ledger.load("123456789", {"player_count": 1, "players_list": []})
+        return ledger
+
+    @pytest.fixture
+    def t0(self):
+        return datetime(2025, 12, 25, 10, 0, tzinfo=timezone.utc)
+
+    def test_join_and_leave_are_counted_exactly(self, ledger, t0):
+        assert ledger.apply("123456789", 111, True, t0)
+        assert ledger.apply("123456789", 222, True, t0)
+        assert ledger.apply("123456789", 111, False, t0 + timedelta(seconds=5))
+
+        assert ledger.count("123456789") == 2  # host + 222
+        assert ledger.members("123456789") == [222]
+
+    def test_duplicate_events_are_ignored(self, ledger, t0):
+        # Same join delivered as a service message and a chat_member update
+        assert ledger.apply("123456789", 111, True, t0)
+        assert not ledger.apply("123456789", 111, True, t0)
+
+        assert ledger.count("123456789") == 2
+
+    def test_out_of_order_events_are_ignored(self, ledger, t0):
+        assert ledger.apply("123456789", 111, True, t0)
+        assert ledger.apply("123456789", 111, False, t0 + timedelta(seconds=10))
+        # The join arrives late and must not resurrect the member
+        assert not ledger.apply("123456789", 111, True, t0 + timedelta(seconds=5))
+
+        assert ledger.count("123456789") == 1
+
+    def test_seeds_untracked_members_from_stored_count(self, t0):
+        ledger = MembershipLedger()
+        ledger.load("123456789", {"player_count": 4, "players_list": [111]})
+
+        assert ledger.count("123456789") == 4
+        # Someone who joined before the ledger existed leaves
+        assert ledger.apply("123456789", 999, False, t0)
+        assert ledger.count("123456789") == 3
+        assert ledger.members("123456789") == [111]
+
+    def test_reconcile_adjusts_untracked_members(self, ledger, t0):
+        ledger.apply("123456789", 111, True, t0)
+
+        assert ledger.reconcile("123456789", 5)
+        assert ledger.count("123456789") == 5
+        assert not ledger.reconcile("123456789", 5)
+
+    def test_reconcile_corrects_missed_leaves_downwards(self, ledger, t0):
+        # Restored from a stale players_list after leaves the bot never saw
+        ledger.load("987654321", {"player_count": 4, "players_list": [111, 222, 333]})
+
+        assert ledger.reconcile("987654321", 2)
+        assert ledger.count("987654321") == 2
+        assert not ledger.reconcile("987654321", 2)
+
+        # A leave arriving late is one reconciliation already counted
+        assert ledger.apply("987654321", 222, False, t0)
+        assert ledger.count("987654321") == 2
+        assert ledger.apply("987654321", 444, True, t0)
+        assert ledger.count("987654321") == 3
+
+    def test_clamped_count_survives_a_restart(self, ledger):
+        ledger.load("987654321", {"player_count": 2, "players_list": [111, 222, 333]})
+
+        assert ledger.count("987654321") == 2
+        assert not ledger.reconcile("987654321", 2)
+
+    def test_join_counted_by_reconcile_is_not_counted_again(self, ledger, t0):
+        ledger.load("987654321", {"player_count": 2, "players_list": [111]})
+
+        # Telegram already counts a member whose join is still in flight
+        assert ledger.reconcile("987654321", 3)
+        assert ledger.count("987654321") == 3
+
+        assert ledger.apply("987654321", 222, True, t0)
+        assert ledger.count("987654321") == 3
+        assert ledger.members("987654321") == [111, 222]
+        assert not ledger.reconcile("987654321", 3)
+
+        # Only the joins reconciliation counted are absorbed
+        assert ledger.apply("987654321", 333, True, t0)
+        assert ledger.count("987654321") == 4
@@ -32,6 +32,7 @@ sys.modules['services'] = mock_services
 sys.modules['services.database'] = mock_database
 sys.modules['services.telethon_service'] = MagicMock()
 
+import asyncio
 from telegram import Chat, User
 from telegram.constants import ChatMemberStatus
 
@@ -42,6 +43,8 @@ try:
         track_left_members,
         track_chat_member_updates,
         update_member_count,
+        get_actual_member_count,
+        invalidate_bot_member_offset,
     )
     IMPORTS_SUCCESSFUL = True
 except ImportError as e:
@@ -51,6 +54,8 @@ except ImportError as e:
     track_left_members = AsyncMock()
     track_chat_member_updates = AsyncMock()
     update_member_count = AsyncMock()
+    get_actual_member_count = AsyncMock()
+    invalidate_bot_member_offset = MagicMock()
 
 class TestMemberTracking(unittest.IsolatedAsyncioTestCase):
     def setUp(self):
@@ -63,6 +68,10 @@ class TestMemberTracking(unittest.IsolatedAsyncioTestCase):
         # Mock context
         self.context = MagicMock()
         self.context.bot_data = {'db': MagicMock()}
+        firestore = self.context.bot_data['db'].firestore
+        firestore.Increment.side_effect = lambda value: MagicMock(value=value)
+        firestore.ArrayUnion.side_effect = lambda values: MagicMock(values=values)
+        firestore.ArrayRemove.side_effect = lambda values: MagicMock(values=values)
         self.context.bot = MagicMock()
         
         # Mock game data
@@ -102,7 +111,9 @@ class TestMemberTracking(unittest.IsolatedAsyncioTestCase):
         self.context.bot_data['db'].update_game.assert_called_once()
         call_args = self.context.bot_data['db'].update_game.call_args
         self.assertEqual(call_args[0][0], 'game123')
-        self.assertEqual(call_args[0][1]['player_count'], 5)  # 3 + 2 new members
+        self.assertEqual(call_args[0][1]['player_count'].value, 2)  # 3 + 2 new members
+        self.assertEqual(call_args[0][1]['players_list'].values, [123, 456])
+        self.assertEqual(self.game_data['player_count'], 5)
 
     @unittest.skipUnless(IMPORTS_SUCCESSFUL, "Module imports failed")
     @patch('bot.handlers.membertracking.get_game_by_group_id')
@@ -125,7 +136,8 @@ class TestMemberTracking(unittest.IsolatedAsyncioTestCase):
         self.context.bot_data['db'].update_game.assert_called_once()
         call_args = self.context.bot_data['db'].update_game.call_args
         self.assertEqual(call_args[0][0], 'game123')
-        self.assertEqual(call_args[0][1]['player_count'], 2)  # 3 - 1 member
+        self.assertEqual(call_args[0][1]['player_count'].value, -1)  # 3 - 1 member
+        self.assertEqual(self.game_data['player_count'], 2)
 
     @unittest.skipUnless(IMPORTS_SUCCESSFUL, "Module imports failed")
     @patch('bot.handlers.membertracking.get_game_by_group_id')
@@ -152,8 +164,97 @@ class TestMemberTracking(unittest.IsolatedAsyncioTestCase):
         self.context.bot_data['db'].update_game.assert_called_once()
         call_args = self.context.bot_data['db'].update_game.call_args
         self.assertEqual(call_args[0][0], 'game123')
-        self.assertEqual(call_args[0][1]['player_count'], 2)  # 3 - 1 banned member
+        self.assertEqual(call_args[0][1]['player_count'].value, -1)  # 3 - 1 banned member
+        self.assertEqual(self.game_data['player_count'], 2)
 
+    @unittest.skipUnless(IMPORTS_SUCCESSFUL, "Module imports failed")
+    @patch('bot.handlers.membertracking.update_announcement_with_count')
+    async def test_join_burst_is_batched_per_game(self, mock_update_announcement):
+        mock_update_announcement.return_value = True
+        self.context.bot_data['db'].update_game = MagicMock()
+        users = [MagicMock(id=1000 + i, first_name=f"User{i}", is_bot=False) for i in range(6)]
+
+        # Concurrent joins for one game, each with its own snapshot of the game
+        await asyncio.gather(*(
+            update_member_count(self.context, dict(self.game_data), [user], True)
+            for user in users
+        ))
+
+        calls = self.context.bot_data['db'].update_game.call_args_list
+        self.assertLess(len(calls), len(users))
+        self.assertEqual(sum(call[0][1]['player_count'].value for call in calls), 6)
+
+    @unittest.skipUnless(IMPORTS_SUCCESSFUL, "Module imports failed")
+    @patch('bot.handlers.membertracking.get_game_by_group_id')
+    @patch('bot.handlers.membertracking.update_announcement_with_count')
+    async def test_join_burst_looks_up_the_game_once_per_batch(self, mock_update_announcement, mock_get_game):
+        mock_get_game.return_value = self.game_data
+        mock_update_announcement.return_value = True
+        self.context.bot_data['db'].update_game = MagicMock()
+        updates = []
+        for i in range(6):
+            update = MagicMock()
+            update.message.chat = self.chat
+            update.message.new_chat_members = [MagicMock(id=2000 + i, first_name=f"User{i}", is_bot=False)]
+            updates.append(update)
+
+        await asyncio.gather(*(track_new_members(update, self.context) for update in updates))
+
+        self.assertLess(mock_get_game.await_count, len(updates))
+        self.assertEqual(self.game_data['player_count'], 9)
+
+    @unittest.skipUnless(IMPORTS_SUCCESSFUL, "Module imports failed")
+    async def test_reconcile_writes_absolute_count(self):
+        from bot.handlers.membertracking import reconcile_member_count
+        self.context.bot_data['db'].update_game = MagicMock()
+        self.game_data['announcement_msg_id'] = None
+
+        changed = await reconcile_member_count(self.context, self.game_data, 4)
+
+        self.assertTrue(changed)
+        call_args = self.context.bot_data['db'].update_game.call_args
+        self.assertEqual(call_args[0][1], {"player_count": 4})
+
+
+    @unittest.skipUnless(IMPORTS_SUCCESSFUL, "Module imports failed")
+    async def test_actual_member_count_caches_bot_offset(self):
+        # Setup
+        bot_admin = MagicMock()
+        bot_admin.user.is_bot = True
+        host_admin = MagicMock()
+        host_admin.user.is_bot = False
+        self.context.bot.get_chat = AsyncMock()
+        self.context.bot.get_chat_member_count = AsyncMock(return_value=6)
+        self.context.bot.get_chat_administrators = AsyncMock(return_value=[bot_admin, host_admin])
+
+        # Test
+        first = await get_actual_member_count(self.context, '123456789')
+        second = await get_actual_member_count(self.context, '123456789')
+
+        # Verify
+        self.assertEqual(first, 5)
+        self.assertEqual(second, 5)
+        self.context.bot.get_chat.assert_not_called()
+        self.assertEqual(self.context.bot.get_chat_member_count.call_count, 2)
+        self.context.bot.get_chat_administrators.assert_called_once()
+
+        # The bot's own membership change drops the cached offset
+        invalidate_bot_member_offset(self.context, -1000123456789)
+        await get_actual_member_count(self.context, '123456789')
+        self.assertEqual(self.context.bot.get_chat_administrators.call_count, 2)
+
+
+    @unittest.skipUnless(IMPORTS_SUCCESSFUL, "Module imports failed")
+    async def test_failed_member_count_lookup_writes_nothing(self):
+        from bot.handlers.membertracking import sync_member_count
+        self.context.bot_data['db'].update_game = MagicMock()
+        self.context.bot.get_chat_member_count = AsyncMock(side_effect=RuntimeError("Flood control exceeded"))
+
+        self.assertIsNone(await get_actual_member_count(self.context, '123456789'))
+        changed = await sync_member_count(self.context, self.game_data)
+
+        self.assertFalse(changed)
+        self.context.bot_data['db'].update_game.assert_not_called()
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
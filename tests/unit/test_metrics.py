@@ -0,0 +1,84 @@
+import asyncio
+import pytest
+import sys
+import os
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from telegram.ext import Application, CallbackQueryHandler, CommandHandler, ConversationHandler
+from bot.services.metrics import MetricsRegistry, MetricsServer, HANDLER_SECONDS, instrument_handlers, timed
+
+class TestMetrics:
+
+    def test_registry_renders_prometheus_text(self):
+        registry = MetricsRegistry()
+        reads = registry.counter("reads_total", "Documents read", ["handler"])
+        latency = registry.histogram("latency_seconds", "Latency", ["handler"], buckets=(0.1, 1.0))
+
+        reads.inc(3, handler="show_results")
+        latency.observe(0.05, handler="show_results")
+        latency.observe(2.0, handler="show_results")
+
+        text = registry.render()
+        assert '# TYPE reads_total counter' in text
+        assert 'reads_total{handler="show_results"} 3' in text
+        assert 'latency_seconds_bucket{handler="show_results",le="0.1"} 1' in text
+        assert 'latency_seconds_bucket{handler="show_results",le="1.0"} 1' in text
+        assert 'latency_seconds_bucket{handler="show_results",le="+Inf"} 2' in text
+        assert 'latency_seconds_count{handler="show_results"} 2' in text
+
+    @pytest.mark.asyncio
+    async def test_timed_counts_errors_and_latency(self):
+        registry = MetricsRegistry()
+        latency = registry.histogram("call_seconds", "Latency", ["method"])
+        errors = registry.counter("call_errors_total", "Errors", ["method"])
+
+        @timed(latency, errors, method="get_all_open_games")
+        async def failing_call():
+            raise RuntimeError("quota exceeded")
+
+        with pytest.raises(RuntimeError):
+            await failing_call()
+
+        assert latency.count(method="get_all_open_games") == 1
+        assert errors.value(method="get_all_open_games") == 1
+
+    @pytest.mark.asyncio
+    async def test_handlers_inside_conversations_are_instrumented(self):
+        async def show_results(update, context):
+            return 1
+
+        async def host_game(update, context):
+            return 0
+
+        application = Application.builder().token("123:abc").build()
+        conversation = ConversationHandler(
+            entry_points=[CallbackQueryHandler(host_game, pattern="^host_game$")],
+            states={0: [CallbackQueryHandler(show_results)]},
+            fallbacks=[]
+        )
+        application.add_handler(conversation)
+        application.add_handler(CommandHandler("start", host_game))
+        instrument_handlers(application)
+
+        assert await conversation.states[0][0].callback(None, None) == 1
+        assert HANDLER_SECONDS.count(handler="show_results") >= 1
+
+    @pytest.mark.asyncio
+    async def test_metrics_endpoint_serves_registry(self):
+        registry = MetricsRegistry()
+        registry.gauge("queue_depth", "Waiting requests").set(4)
+        server = MetricsServer(registry, port=0)
+        await server.start()
+
+        reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+        writer.write(b"GET /metrics HTTP/1.1\r\nHost: localhost\r\n\r\n")
+        await writer.drain()
+        response = (await reader.read()).decode()
+        writer.close()
+        await server.stop()
+
+        assert response.startswith("HTTP/1.1 200 OK")
+        assert "queue_depth 4" in response
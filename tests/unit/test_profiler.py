@@ -0,0 +1,96 @@
+import asyncio
+import threading
+import time
+import pytest
+import sys
+import os
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from bot.services.profiler import UpdateProfiler
+from bot.utils.structured_logging import log_context
+
+def busy_filter_games(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+class TestUpdateProfiler:
+
+    @pytest.mark.asyncio
+    async def test_selected_handler_is_sampled_into_folded_stacks(self, tmp_path):
+        profiler = UpdateProfiler(handlers={"show_results"}, interval=0.001, output_dir=str(tmp_path))
+
+        async def show_results():
+            busy_filter_games(0.1)
+            await asyncio.sleep(0)
+            return "page"
+
+        async def start():
+            busy_filter_games(0.02)
+
+        assert await profiler.run("show_results", show_results) == "page"
+        await profiler.run("start", start)
+        profiler.configure(handlers=set())
+
+        summary = profiler.summary()
+        assert summary["show_results"]["calls"] == 1
+        assert summary["show_results"]["samples"] > 0
+        assert "start" not in summary
+
+        paths, _ = profiler.dump()
+        combined = open([path for path in paths if path.endswith("-all.folded")][0]).read().splitlines()
+        assert all(line.startswith("show_results;") for line in combined)
+        assert any("test_profiler:busy_filter_games" in line for line in combined)
+        assert profiler.summary() == {}
+
+    @pytest.mark.asyncio
+    async def test_updates_from_a_chosen_user_are_profiled(self):
+        profiler = UpdateProfiler(users={42}, interval=0.001)
+
+        async def join_game():
+            busy_filter_games(0.02)
+
+        with log_context(user_id=7):
+            await profiler.run("join_game", join_game)
+        with log_context(user_id=42):
+            await profiler.run("join_game", join_game)
+        profiler.configure(users=set())
+
+        assert profiler.calls["join_game"] == 1
+
+    @pytest.mark.asyncio
+    async def test_profile_command_can_read_stats_while_itself_profiled(self, tmp_path):
+        profiler = UpdateProfiler(sample_rate=1.0, interval=0.0005, output_dir=str(tmp_path))
+
+        async def profile():
+            # Many distinct stacks keep the sampler adding keys mid-read
+            for depth in range(200):
+                busy_filter_games(0.0005)
+                profiler.summary()
+            return profiler.dump()
+
+        paths, summary = await profiler.run("profile", profile)
+        profiler.configure(sample_rate=0.0)
+
+        assert paths
+        assert summary["profile"]["calls"] == 1
+
+    @pytest.mark.asyncio
+    async def test_restarting_sampler_leaves_a_single_thread(self):
+        profiler = UpdateProfiler(handlers={"join_game"}, interval=0.001)
+
+        async def join_game():
+            busy_filter_games(0.01)
+
+        for _ in range(5):
+            await profiler.run("join_game", join_game)
+            profiler.configure(handlers=set())
+            profiler.configure(handlers={"join_game"})
+        await profiler.run("join_game", join_game)
+
+        samplers = [thread for thread in threading.enumerate() if thread.name == "update-profiler" and thread.is_alive()]
+        profiler.configure(handlers=set())
+        assert len(samplers) == 1
@@ -0,0 +1,97 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock
+import sys
+import os
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from telegram.error import RetryAfter
+from bot.services.rate_limiter import PriorityRateLimiter, background_priority, BACKGROUND, INTERACTIVE
+
+class TestPriorityRateLimiter:
+
+    @pytest.fixture
+    def limiter(self):
+        return PriorityRateLimiter(overall_rate=20, interactive_reserve=0)
+
+    async def _call(self, limiter, log, name, endpoint="getMe", data=None):
+        async def callback():
+            log.append(name)
+            return name
+        return await limiter.process_request(callback, (), {}, endpoint, data or {}, None)
+
+    @pytest.mark.asyncio
+    async def test_interactive_requests_go_ahead_of_background(self, limiter):
+        await limiter.initialize()
+        limiter._global.tokens = 0
+        log = []
+
+        async def background_call(i):
+            with background_priority():
+                await self._call(limiter, log, f"bg{i}")
+
+        tasks = [asyncio.create_task(background_call(i)) for i in range(3)]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(self._call(limiter, log, "user")))
+        await asyncio.gather(*tasks)
+
+        assert log[0] == "user"
+        snapshot = limiter.snapshot()
+        assert snapshot["requests"] == 4
+        assert snapshot["queue_delay"]["background"]["count"] == 3
+        assert snapshot["queue_delay"]["background"]["max"] > 0
+
+    @pytest.mark.asyncio
+    async def test_throttled_group_does_not_block_other_chats(self, limiter):
+        await limiter.initialize()
+        log = []
+        limiter._chat_bucket("-1001", INTERACTIVE).tokens = 0
+
+        blocked = asyncio.create_task(
+            self._call(limiter, log, "group", "sendMessage", {"chat_id": "-1001"})
+        )
+        await asyncio.sleep(0)
+        await self._call(limiter, log, "private", "sendMessage", {"chat_id": 42})
+
+        assert log == ["private"]
+        assert not blocked.done()
+        blocked.cancel()
+        await limiter.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_retry_after_is_retried_and_counted(self, limiter):
+        callback = AsyncMock(side_effect=[RetryAfter(0), "ok"])
+
+        result = await limiter.process_request(callback, (), {}, "editMessageText", {"chat_id": "@channel"}, None)
+
+        assert result == "ok"
+        assert callback.await_count == 2
+        assert limiter.snapshot()["retry_after"] == 1
+
+    @pytest.mark.asyncio
+    async def test_explicit_priority_overrides_context(self, limiter):
+        assert limiter._priority({"priority": BACKGROUND}) == BACKGROUND
+        with background_priority():
+            assert limiter._priority(None) == BACKGROUND
+        assert limiter._priority(None) != BACKGROUND
+
+    @pytest.mark.asyncio
+    async def test_quick_taps_in_a_private_chat_are_not_queued(self, limiter):
+        await limiter.initialize()
+        log = []
+
+        for i in range(6):
+            await self._call(limiter, log, f"tap{i}", "editMessageText", {"chat_id": 42})
+
+        assert limiter.snapshot()["queue_delay"]["interactive"]["max"] < 0.1
+
+        # Background sends to the same chat still keep to the private pace
+        with background_priority():
+            for i in range(4):
+                await self._call(limiter, log, f"bg{i}", "sendMessage", {"chat_id": 42})
+
+        assert limiter.snapshot()["queue_delay"]["background"]["max"] > 0.5
+        await limiter.shutdown()
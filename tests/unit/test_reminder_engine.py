@@ -0,0 +1,157 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, Mock
+import sys
+import os
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from bot.services.reminder_engine import ReminderEngine
+from bot.services.timer_store import TimerStore
+
+class TestReminderEngine:
+
+    @pytest.fixture
+    def engine(self):
+        return ReminderEngine()
+
+    def test_due_entries_are_popped_together_by_kind(self, engine):
+        engine.schedule("g1", "reminder_2h", 100)
+        engine.schedule("g2", "reminder_2h", 105)
+        engine.schedule("g3", "reminder_24h", 103)
+        engine.schedule("g4", "reminder_2h", 200)
+
+        due = engine.pop_due(110)
+
+        assert [game_id for game_id, _ in due["reminder_2h"]] == ["g1", "g2"]
+        assert [game_id for game_id, _ in due["reminder_24h"]] == ["g3"]
+        assert len(engine) == 1
+        assert engine.next_due() == 200
+
+    def test_batch_window_only_applies_to_its_own_kind(self, engine):
+        engine.register("reminder_2h", AsyncMock(), batch_window=30)
+        engine.register("expiry", AsyncMock())
+        engine.schedule("g1", "reminder_2h", 100)
+        engine.schedule("g2", "reminder_2h", 125)
+        engine.schedule("g3", "expiry", 110)
+
+        due = engine.pop_due(100)
+
+        assert [game_id for game_id, _ in due["reminder_2h"]] == ["g1", "g2"]
+        assert "expiry" not in due
+        assert engine.next_due() == 110
+
+    def test_cancel_and_reschedule_replace_existing_timer(self, engine):
+        engine.schedule("g1", "reminder_2h", 100)
+        engine.schedule("g1", "reminder_24h", 50)
+        engine.schedule("g1", "reminder_2h", 300)
+
+        assert engine.due_time("g1", "reminder_2h") == 300
+        assert engine.cancel("g1", "reminder_24h") == 1
+        assert engine.pop_due(200) == {}
+        assert engine.pop_due(300) == {"reminder_2h": [("g1", None)]}
+
+        engine.schedule("g2", "reminder_2h", 100)
+        engine.schedule("g2", "reminder_24h", 100)
+        assert engine.cancel("g2") == 2
+        assert len(engine) == 0
+
+    def test_stale_heap_entries_are_compacted(self, engine):
+        for due in range(1000):
+            engine.schedule("g1", "reminder_2h", due)
+
+        assert len(engine) == 1
+        assert len(engine._heap) < 100
+
+    @pytest.mark.asyncio
+    async def test_engine_wakes_for_an_earlier_timer(self, engine):
+        handler = AsyncMock()
+        engine.register("reminder_2h", handler)
+        context = Mock()
+
+        engine.schedule("later", "reminder_2h", engine.now() + 3600)
+        engine.start(context)
+        await asyncio.sleep(0)
+        engine.schedule("soon", "reminder_2h", engine.now() + 0.05)
+        await asyncio.sleep(0.2)
+        await engine.stop()
+
+        handler.assert_awaited_once_with(context, [("soon", None)])
+        assert engine.due_time("later", "reminder_2h") is not None
+
+    def test_schedule_is_restored_after_restart(self, tmp_path):
+        path = str(tmp_path / "timers.sqlite3")
+        engine = ReminderEngine(TimerStore(path))
+        engine.schedule("g1", "reminder_24h", 100, {"deadline": 200})
+        engine.schedule("g1", "reminder_2h", 300)
+        engine.schedule("g2", "reminder_2h", 300)
+        engine.cancel("g2")
+        engine.mark_bootstrapped("reminders")
+
+        restarted = ReminderEngine(TimerStore(path))
+        assert restarted.restore(now=50) == 2
+        assert restarted.is_bootstrapped("reminders")
+        assert not restarted.is_bootstrapped("expiry")
+        assert restarted.due_time("g1", "reminder_2h") == 300
+        assert restarted.pop_due(100) == {"reminder_24h": [("g1", {"deadline": 200})]}
+
+    @pytest.mark.asyncio
+    async def test_store_opened_in_a_worker_thread_is_usable_on_the_loop(self, tmp_path):
+        store = await asyncio.to_thread(TimerStore, str(tmp_path / "timers.sqlite3"))
+        engine = ReminderEngine(store)
+        engine.schedule("g1", "expiry", 100)
+
+        assert engine.restore(now=50) == 1
+
+    @pytest.mark.asyncio
+    async def test_missed_timers_are_caught_up_until_their_deadline(self, tmp_path):
+        store = TimerStore(str(tmp_path / "timers.sqlite3"))
+        store.save("missed", "reminder_2h", 100, {"deadline": 1000})
+        store.save("too_late", "reminder_2h", 100, {"deadline": 400})
+
+        engine = ReminderEngine(store)
+        handler = AsyncMock()
+        engine.register("reminder_2h", handler)
+        engine.restore(now=500)
+        assert not engine.is_bootstrapped("reminders")
+
+        await engine.fire_due(500)
+
+        handler.assert_awaited_once_with(None, [("missed", {"deadline": 1000})])
+        assert store.load_all() == []
+
+    @pytest.mark.asyncio
+    async def test_unfinished_timers_are_retried_with_backoff(self, tmp_path):
+        store = TimerStore(str(tmp_path / "timers.sqlite3"))
+        engine = ReminderEngine(store)
+        engine.register("reminder_2h", AsyncMock(return_value=["failed"]))
+        engine.schedule("sent", "reminder_2h", 100, {"deadline": 10000})
+        engine.schedule("failed", "reminder_2h", 100, {"deadline": 10000})
+
+        await engine.fire_due(100)
+
+        assert engine.due_time("sent", "reminder_2h") is None
+        assert engine.due_time("failed", "reminder_2h") == 100 + ReminderEngine.RETRY_DELAY
+        assert [(game_id, payload) for game_id, _, _, payload in store.load_all()] == [
+            ("failed", {"deadline": 10000, "attempts": 1})
+        ]
+
+        await engine.fire_due(130)
+
+        assert engine.due_time("failed", "reminder_2h") == 130 + 2 * ReminderEngine.RETRY_DELAY
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_is_retried_until_its_deadline(self, tmp_path):
+        store = TimerStore(str(tmp_path / "timers.sqlite3"))
+        engine = ReminderEngine(store)
+        engine.register("reminder_2h", AsyncMock(side_effect=RuntimeError("Firestore unavailable")))
+        engine.schedule("early", "reminder_2h", 100, {"deadline": 1000})
+        engine.schedule("late", "reminder_2h", 100, {"deadline": 110})
+
+        await engine.fire_due(100)
+
+        assert engine.due_time("early", "reminder_2h") == 130
+        assert engine.due_time("late", "reminder_2h") is None
+        assert [game_id for game_id, _, _, _ in store.load_all()] == ["early"]
@@ -26,6 +26,8 @@ class TestReminderService:
         db = Mock()
         db.db = Mock()
         db.update_game = Mock()
+        db.update_games = Mock()
+        db.with_pending_writes = Mock(side_effect=lambda game_id, game_data: game_data)
         return db
     
     @pytest.fixture
@@ -141,4 +143,68 @@ class TestReminderService:
                 game_id, {'reminder_2h_sent': True}
             )
         
-        print("✅ 2h reminder without poll sent successfully")
\ No newline at end of file
+        print("✅ 2h reminder without poll sent successfully")
+
+    @pytest.mark.asyncio
+    @freeze_time("2024-12-20 10:00:00")
+    async def test_reminders_scheduled_on_engine(self, mock_db, mock_context, sample_game_data):
+        from bot.services.reminder_engine import ReminderEngine
+        engine = ReminderEngine()
+        reminder_service = ReminderService(mock_db, engine)
+
+        await reminder_service.schedule_game_reminders(mock_context, sample_game_data, "test_game_id")
+
+        assert len(engine) == 2
+        assert engine.due_time("test_game_id", "reminder_2h") - engine.due_time("test_game_id", "reminder_24h") == 22 * 3600
+        mock_context.job_queue.run_once.assert_not_called()
+
+        await reminder_service.cancel_game_reminders(mock_context, "test_game_id")
+        assert len(engine) == 0
+
+    @pytest.mark.asyncio
+    @freeze_time("2024-12-25 01:30:00")
+    async def test_new_game_skips_past_reminders_but_startup_catches_up(self, mock_db, mock_context, sample_game_data):
+        from bot.services.reminder_engine import ReminderEngine
+        # 5 hours before kick-off: the 24h reminder is overdue, the 2h one isn't
+        engine = ReminderEngine()
+        reminder_service = ReminderService(mock_db, engine)
+
+        await reminder_service.schedule_game_reminders(mock_context, sample_game_data, "new_game")
+
+        assert engine.due_time("new_game", "reminder_24h") is None
+        assert engine.due_time("new_game", "reminder_2h") is not None
+
+        await reminder_service.schedule_reminders_for_games(mock_context, [{**sample_game_data, "id": "old_game"}])
+
+        assert engine.due_time("old_game", "reminder_24h") is not None
+        assert engine.due_time("old_game", "reminder_2h") is not None
+
+    @pytest.mark.asyncio
+    async def test_due_reminders_share_one_read_and_one_commit(self, reminder_service, mock_context, sample_game_data):
+        def game_doc(game_id, **overrides):
+            doc = Mock()
+            doc.id = game_id
+            doc.exists = True
+            doc.to_dict.return_value = {**sample_game_data, **overrides}
+            return doc
+
+        reminder_service.db.db.get_all.return_value = [
+            game_doc("g1"),
+            game_doc("g2"),
+            game_doc("g3", status="cancelled"),
+            game_doc("g4", reminder_2h_sent=True),
+        ]
+        mock_context.bot.send_message = AsyncMock()
+
+        with patch('bot.services.reminder.GroupIdHelper') as mock_group_helper:
+            mock_group_helper.to_telegram_format.return_value = -123456789
+            unsent = await reminder_service._send_due_reminders(mock_context, '2h', ["g1", "g2", "g3", "g4"])
+
+        assert unsent == []
+        reminder_service.db.db.get_all.assert_called_once()
+        assert mock_context.bot.send_message.await_count == 2
+        reminder_service.db.update_games.assert_called_once_with({
+            "g1": {'reminder_2h_sent': True},
+            "g2": {'reminder_2h_sent': True},
+        })
+        reminder_service.db.update_game.assert_not_called()
@@ -0,0 +1,66 @@
+import asyncio
+import pytest
+import sys
+import os
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from bot.services.startup import StartupState
+
+class TestStartupState:
+
+    @pytest.mark.asyncio
+    async def test_waiters_are_released_when_component_is_ready(self):
+        state = StartupState()
+        waiter = asyncio.create_task(state.wait_ready("bootstrap", timeout=1))
+        await asyncio.sleep(0)
+
+        assert not state.is_ready("bootstrap")
+        state.mark_ready("bootstrap")
+
+        assert await waiter
+        assert state.is_ready("bootstrap")
+        assert state.snapshot()["bootstrap"]["ready"]
+
+    @pytest.mark.asyncio
+    async def test_failure_is_reported_until_ready(self):
+        state = StartupState()
+        state.mark_failed("telethon", "connection refused")
+
+        assert not await state.wait_ready("telethon", timeout=0.01)
+        assert state.snapshot()["telethon"] == {"ready": False, "seconds": None, "error": "connection refused"}
+
+        state.mark_ready("telethon")
+        assert state.snapshot()["telethon"]["error"] is None
+
+    @pytest.mark.asyncio
+    async def test_components_warm_up_concurrently(self):
+        state = StartupState()
+
+        async def slow_component():
+            await asyncio.sleep(0.1)
+
+        await asyncio.wait_for(asyncio.gather(
+            state.run("database", slow_component),
+            state.run("telethon", slow_component),
+        ), timeout=0.15)
+
+        assert state.is_ready("database")
+        assert state.is_ready("telethon")
+
+    @pytest.mark.asyncio
+    async def test_failed_component_is_retried(self):
+        state = StartupState()
+        attempts = []
+
+        async def flaky_component():
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise RuntimeError("credentials not loaded")
+
+        assert await state.run("database", flaky_component, retry_delay=0)
+        assert len(attempts) == 3
+        assert state.is_ready("database")
+        assert not state.has_failed("database")
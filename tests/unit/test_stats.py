@@ -0,0 +1,101 @@
+import asyncio
+import time
+import pytest
+import sys
+import os
+from unittest.mock import MagicMock
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from bot.handlers.admin import build_stats
+from bot.services.firestore_costs import FirestoreCostLedger
+from bot.services.loop_monitor import LoopLagMonitor
+from bot.services.metrics import MetricsRegistry, RecentSamples, EVENT_LOOP_LAG_SECONDS
+from bot.services.reminder_engine import ReminderEngine
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+class TestRecentSamples:
+
+    def test_quantiles_only_cover_the_requested_window(self):
+        registry = MetricsRegistry()
+        latency = registry.histogram("handler_seconds", "Latency", ["handler"], recent_minutes=60)
+        clock = FakeClock()
+        latency.recent.clock = clock
+
+        for _ in range(100):
+            latency.observe(5.0, handler="show_results")
+        clock.now += 20 * 60
+        for value in range(1, 101):
+            latency.observe(value / 1000, handler="join_game")
+
+        per_handler, (count, (p50, p99)) = latency.recent_quantiles((0.5, 0.99), minutes=10)
+        assert count == 100
+        assert p50 == pytest.approx(0.05)
+        assert p99 == pytest.approx(0.099)
+        assert "show_results" not in per_handler
+
+        per_handler, (count, _) = latency.recent_quantiles((0.5,), minutes=30)
+        assert count == 200
+        assert per_handler["show_results"][0] == 100
+
+    def test_reservoir_keeps_counts_when_samples_are_capped(self):
+        samples = RecentSamples(per_minute=10, clock=FakeClock())
+        for value in range(1000):
+            samples.observe(value)
+
+        kept = samples.by_key(5)[()]
+        assert len(kept) == 10
+        assert sum(weight for _, weight in kept) == pytest.approx(1000)
+
+class TestStats:
+
+    def test_firestore_reads_in_last_hour(self):
+        clock = FakeClock()
+        ledger = FirestoreCostLedger(clock=clock)
+        ledger.record("reads", 500)
+        clock.now += 61 * 60
+        ledger.record("reads", 7)
+        ledger.record("writes", 2)
+
+        assert ledger.recent(60) == {"reads": 7, "writes": 2, "deletes": 0}
+
+    def test_stats_read_in_memory_state_only(self):
+        engine = ReminderEngine()
+        engine.schedule("game1", "expiry", 100.0)
+        engine.schedule("game2", "expiry", 100.0)
+        engine.schedule("game1", "1h", 50.0)
+
+        db = MagicMock()
+        db.write_buffer.pending_count = 3
+        db.write_buffer.stats = {"staged": 10, "merged": 4}
+        db.cost_ledger = FirestoreCostLedger()
+        editor = MagicMock(pending_count=2, stats={"submitted": 8, "skipped": 2})
+
+        text = build_stats({"reminder_engine": engine, "db": db, "announcement_editor": editor})
+
+        assert "Open games: 2" in text
+        assert "reminders: 1 scheduled" in text
+        assert "announcement edits: 2 pending" in text
+        assert "buffered writes merged: 40% of 10" in text
+        assert "Firestore reads, last hour: 0" in text
+        assert db.method_calls == []
+
+    @pytest.mark.asyncio
+    async def test_loop_lag_monitor_sees_a_blocked_loop(self):
+        monitor = LoopLagMonitor(interval=0.01)
+        monitor.start()
+        await asyncio.sleep(0.02)
+        time.sleep(0.1)
+        await asyncio.sleep(0.03)
+        await monitor.stop()
+
+        _, (_, (max_lag,)) = EVENT_LOOP_LAG_SECONDS.recent_quantiles((1.0,), minutes=1)
+        assert max_lag >= 0.05
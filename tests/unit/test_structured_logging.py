@@ -0,0 +1,88 @@
+import io
+import json
+import logging
+import queue
+import sys
+import os
+from logging.handlers import QueueListener
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from bot.utils.structured_logging import (
+    ContextFilter,
+    DebugSampler,
+    DeferredQueueHandler,
+    JsonFormatter,
+    log_context,
+    parse_module_levels
+)
+
+class TestStructuredLogging:
+
+    def make_logger(self, name, sample_every=1):
+        stream = io.StringIO()
+        output = logging.StreamHandler(stream)
+        output.setFormatter(JsonFormatter())
+
+        log_queue = queue.SimpleQueue()
+        handler = DeferredQueueHandler(log_queue)
+        handler.addFilter(DebugSampler(sample_every))
+        handler.addFilter(ContextFilter())
+
+        logger = logging.getLogger(name)
+        logger.handlers = [handler]
+        logger.propagate = False
+        logger.setLevel(logging.DEBUG)
+        return logger, QueueListener(log_queue, output), stream
+
+    def test_records_are_written_as_json_with_update_context(self):
+        logger, listener, stream = self.make_logger("test.structured.json")
+        listener.start()
+
+        with log_context(update_id=42, user_id=7, handler="chat_member"):
+            logger.info("👥 %s joined. New count: %s", "Alice", 3)
+        logger.warning("outside an update")
+        listener.stop()
+
+        first, second = [json.loads(line) for line in stream.getvalue().splitlines()]
+        assert first["msg"] == "👥 Alice joined. New count: 3"
+        assert first["update_id"] == 42
+        assert first["user_id"] == 7
+        assert first["handler"] == "chat_member"
+        assert second["level"] == "WARNING"
+        assert "update_id" not in second
+
+    def test_arguments_are_rendered_before_they_cross_threads(self):
+        logger, listener, stream = self.make_logger("test.structured.snapshot")
+
+        players = ["Alice"]
+        logger.info("👥 Players: %s", players)
+        players.append("Bob")
+        listener.start()
+        listener.stop()
+
+        assert json.loads(stream.getvalue())["msg"] == "👥 Players: ['Alice']"
+
+    def test_debug_records_are_sampled_per_call_site(self):
+        logger, listener, stream = self.make_logger("test.structured.sampling", sample_every=10)
+        listener.start()
+
+        for i in range(25):
+            logger.debug("member event %s", i)
+        for i in range(3):
+            logger.info("count changed %s", i)
+        listener.stop()
+
+        records = [json.loads(line) for line in stream.getvalue().splitlines()]
+        assert [record["msg"] for record in records if record["level"] == "DEBUG"] == [
+            "member event 0", "member event 10", "member event 20"
+        ]
+        assert len([record for record in records if record["level"] == "INFO"]) == 3
+
+    def test_module_levels_are_parsed_from_env_style_spec(self):
+        assert parse_module_levels("bot.handlers.membertracking=debug, httpx=WARNING,bad") == {
+            "bot.handlers.membertracking": "DEBUG",
+            "httpx": "WARNING"
+        }
@@ -0,0 +1,87 @@
+import asyncio
+import json
+import pytest
+from unittest.mock import MagicMock
+import sys
+import os
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from bot.services.tracing import TRACER, FileSpanExporter, Tracer
+from bot.services.firestore_costs import CountingClient, FirestoreCostLedger
+
+class MemoryExporter:
+    def __init__(self):
+        self.spans = []
+
+    def export(self, payload):
+        for resource in payload["resourceSpans"]:
+            for scope in resource["scopeSpans"]:
+                self.spans.extend(scope["spans"])
+
+class TestTracing:
+
+    @pytest.mark.asyncio
+    async def test_spans_nest_across_awaits_and_tasks(self):
+        exporter = MemoryExporter()
+        tracer = Tracer(exporter)
+
+        async def stage(name):
+            with tracer.span(name, root=False):
+                await asyncio.sleep(0)
+
+        with tracer.span("save_game"):
+            await stage("create_game.group")
+            await asyncio.gather(asyncio.create_task(stage("create_game.save")), stage("create_game.announcement"))
+        await tracer.flush()
+
+        spans = {span["name"]: span for span in exporter.spans}
+        root = spans["save_game"]
+        assert "parentSpanId" not in root
+        for name in ("create_game.group", "create_game.save", "create_game.announcement"):
+            assert spans[name]["traceId"] == root["traceId"]
+            assert spans[name]["parentSpanId"] == root["spanId"]
+
+    @pytest.mark.asyncio
+    async def test_instrumented_calls_outside_a_trace_are_not_recorded(self):
+        exporter = MemoryExporter()
+        tracer = Tracer(exporter)
+
+        with tracer.span("firestore.get", root=False) as span:
+            assert span is None
+        assert await tracer.flush() == 0
+
+    @pytest.mark.asyncio
+    async def test_errors_are_marked_and_file_export_is_otlp_json(self, tmp_path):
+        path = tmp_path / "traces.jsonl"
+        tracer = Tracer(FileSpanExporter(str(path)))
+
+        with pytest.raises(RuntimeError):
+            with tracer.span("post_announcement", chat="@channel"):
+                raise RuntimeError("Bad Request")
+        await tracer.flush()
+
+        payload = json.loads(path.read_text().splitlines()[0])
+        span = payload["resourceSpans"][0]["scopeSpans"][0]["spans"][0]
+        assert span["status"] == {"code": 2, "message": "RuntimeError: Bad Request"}
+        assert {"key": "chat", "value": {"stringValue": "@channel"}} in span["attributes"]
+
+    @pytest.mark.asyncio
+    async def test_firestore_calls_become_child_spans(self, monkeypatch):
+        exporter = MemoryExporter()
+        monkeypatch.setattr(TRACER, "exporter", exporter)
+        raw = MagicMock()
+        raw.collection.return_value.where.return_value.stream.return_value = [MagicMock(), MagicMock()]
+        client = CountingClient(raw, FirestoreCostLedger())
+
+        with TRACER.span("show_results"):
+            client.collection("game").document("g1").update({"player_count": 2})
+            list(client.collection("game").where("status", "==", "open").stream())
+        await TRACER.flush()
+
+        names = [span["name"] for span in exporter.spans]
+        assert names == ["firestore.update", "firestore.stream", "show_results"]
+        stream_span = exporter.spans[1]
+        assert {"key": "documents", "value": {"intValue": "2"}} in stream_span["attributes"]
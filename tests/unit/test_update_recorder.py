@@ -0,0 +1,102 @@
+import gzip
+import json
+import pytest
+import sys
+import os
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from telegram import Update
+from bot.services.update_recorder import UpdateRecorder, UpdateScrubber, read_recording
+
+BOT = {"id": 7000000001, "is_bot": True, "first_name": "Bookliao", "username": "bookliao_bot"}
+ALICE = {"id": 555001, "is_bot": False, "first_name": "Alice", "last_name": "Tan", "username": "alicetan"}
+ALICE_CHAT = {"id": 555001, "type": "private", "first_name": "Alice", "last_name": "Tan", "username": "alicetan"}
+GROUP = {"id": -1001234567890, "type": "supergroup", "title": "Football with Alice"}
+
+def private_message(text):
+    return {"update_id": 1, "message": {
+        "message_id": 10, "date": 1700000000, "chat": ALICE_CHAT, "from": ALICE, "text": text,
+    }}
+
+class TestUpdateScrubber:
+
+    def test_user_and_private_chat_share_a_pseudonym(self):
+        scrubbed = UpdateScrubber("salt").scrub(private_message("25/12/2026"))
+
+        message = scrubbed["message"]
+        assert message["from"]["id"] != ALICE["id"]
+        assert message["from"]["id"] == message["chat"]["id"]
+        assert "Alice" not in json.dumps(scrubbed)
+        assert "alicetan" not in json.dumps(scrubbed)
+        assert "Tan" not in json.dumps(scrubbed)
+        # Typed answers drive the conversations, so they survive
+        assert message["text"] == "25/12/2026"
+
+    def test_pseudonyms_are_stable_per_salt(self):
+        first = UpdateScrubber("salt").scrub(private_message("hi"))
+        again = UpdateScrubber("salt").scrub(private_message("hi"))
+        other = UpdateScrubber("other").scrub(private_message("hi"))
+
+        assert first["message"]["from"]["id"] == again["message"]["from"]["id"]
+        assert first["message"]["from"]["id"] != other["message"]["from"]["id"]
+
+    def test_contact_details_are_redacted_from_typed_text(self):
+        scrubbed = UpdateScrubber("salt").scrub(private_message("call +65 9123 4567 or alice@example.com, ask @bobby"))
+
+        assert scrubbed["message"]["text"] == "call [phone] or [email], ask @user"
+
+    def test_group_text_and_bot_messages_are_dropped(self):
+        scrubber = UpdateScrubber("salt")
+        group = scrubber.scrub({"update_id": 2, "message": {
+            "message_id": 11, "date": 1700000000, "chat": GROUP, "from": ALICE, "text": "see you Alice",
+        }})
+        command = scrubber.scrub({"update_id": 3, "message": {
+            "message_id": 12, "date": 1700000000, "chat": GROUP, "from": ALICE, "text": "/start@bookliao_bot hello",
+            "entities": [{"type": "bot_command", "offset": 0, "length": 19}],
+        }})
+        callback = scrubber.scrub({"update_id": 4, "callback_query": {
+            "id": "1", "from": ALICE, "chat_instance": "42", "data": "join_game",
+            "message": {"message_id": 13, "date": 1700000000, "chat": ALICE_CHAT, "from": BOT,
+                        "text": "Players: @alicetan"},
+        }})
+
+        assert group["message"]["text"] == "[redacted]"
+        # Group ids are kept, since handlers look games up by them
+        assert group["message"]["chat"]["id"] == GROUP["id"]
+        assert group["message"]["chat"]["title"] != GROUP["title"]
+        assert command["message"]["text"] == "/start@bookliao_bot"
+        assert command["message"]["entities"][0]["length"] == len("/start@bookliao_bot")
+        assert callback["callback_query"]["message"]["text"] == "[redacted]"
+        assert callback["callback_query"]["message"]["from"] == BOT
+        assert callback["callback_query"]["data"] == "join_game"
+
+class TestUpdateRecorder:
+
+    @pytest.mark.asyncio
+    async def test_recorded_updates_round_trip_through_gzip(self, tmp_path):
+        recorder = UpdateRecorder(str(tmp_path / "updates.jsonl.gz"), salt="salt")
+        recorder.start()
+        for update_id in range(3):
+            await recorder.record(Update.de_json({**private_message(f"msg {update_id}"), "update_id": update_id}, None), None)
+        recorder.close()
+
+        entries = list(read_recording(recorder.path))
+
+        assert recorder.recorded == 3
+        assert [update["message"]["text"] for _, update in entries] == ["msg 0", "msg 1", "msg 2"]
+        assert entries[0][0] <= entries[2][0]
+        assert Update.de_json(entries[0][1], None).effective_user.first_name.startswith("User ")
+
+    def test_truncated_recording_is_read_up_to_the_cut(self, tmp_path):
+        path = tmp_path / "updates.jsonl.gz"
+        lines = "".join(json.dumps({"t": i, "update": {"update_id": i}}) + "\n" for i in range(200))
+        data = gzip.compress(lines.encode())
+        path.write_bytes(data[: len(data) // 2])
+
+        entries = list(read_recording(str(path)))
+
+        assert 0 < len(entries) < 200
+        assert [update["update_id"] for _, update in entries] == list(range(len(entries)))
@@ -0,0 +1,71 @@
+import pytest
+from unittest.mock import MagicMock
+import sys
+import os
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from google.cloud import firestore
+from bot.services.write_buffer import WriteBehindBuffer
+
+class TestWriteBehindBuffer:
+
+    @pytest.fixture
+    def client(self):
+        return MagicMock()
+
+    @pytest.fixture
+    def buffer(self, client):
+        return WriteBehindBuffer(client, firestore, max_pending=10, flush_interval=60)
+
+    def test_updates_to_one_document_are_merged(self, buffer, client):
+        buffer.stage("game", "g1", {"player_count": firestore.Increment(1)})
+        buffer.stage("game", "g1", {"player_count": firestore.Increment(2), "reminder_24h_sent": True})
+        buffer.stage("game", "g1", {"players_list": firestore.ArrayUnion([1])})
+        buffer.stage("game", "g1", {"players_list": firestore.ArrayUnion([2])})
+
+        assert buffer.pending_count == 1
+        client.batch.assert_not_called()
+
+        assert buffer.flush() == 1
+        batch = client.batch.return_value
+        fields = batch.update.call_args[0][1]
+        assert fields["player_count"].value == 3
+        assert fields["players_list"].values == [1, 2]
+        assert fields["reminder_24h_sent"] is True
+        batch.commit.assert_called_once()
+
+    def test_reads_see_pending_writes(self, buffer):
+        buffer.stage("game", "g1", {"player_count": firestore.Increment(-1), "announcement_msg_id": 42})
+        buffer.stage("game", "g1", {"players_list": firestore.ArrayRemove([7])})
+
+        data = buffer.overlay("game", "g1", {"player_count": 4, "players_list": [7, 8]})
+
+        assert data == {"player_count": 3, "players_list": [8], "announcement_msg_id": 42}
+        assert buffer.overlay("game", "g2", {"player_count": 4}) == {"player_count": 4}
+
+    def test_flushes_when_size_threshold_is_reached(self, buffer, client):
+        for i in range(10):
+            buffer.stage("game", f"g{i}", {"player_count": i})
+
+        assert buffer.pending_count == 0
+        assert client.batch.return_value.update.call_count == 10
+
+    def test_conflicting_transforms_are_written_in_order(self, buffer, client):
+        buffer.stage("game", "g1", {"players_list": firestore.ArrayUnion([1])})
+        buffer.stage("game", "g1", {"players_list": firestore.ArrayRemove([2])})
+
+        # The union is written straight away, the removal stays pending
+        written = client.collection.return_value.document.return_value.update.call_args[0][0]
+        assert written["players_list"].values == [1]
+        assert buffer.overlay("game", "g1", {"players_list": [1, 2]}) == {"players_list": [1]}
+
+    def test_failed_batch_falls_back_to_single_writes(self, buffer, client):
+        client.batch.return_value.commit.side_effect = Exception("No document to update")
+        buffer.stage("game", "g1", {"player_count": 2})
+        buffer.stage("game", "g2", {"player_count": 3})
+
+        assert buffer.flush() == 2
+        assert client.collection.return_value.document.return_value.update.call_count == 2